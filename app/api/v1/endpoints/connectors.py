@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from pymongo.errors import DuplicateKeyError
 from app.models.domain.connectors import ConnectorIn, ConnectorOut
 from app.models.responses import MessageResponse, ConnectorCreateResponse
-from app.db.mongo import conectores_collection
 from app.db.crud import connectors as crud
+from app.db.crud_async import connectors as crud_async
+from app.db import mongo, mongo_async
+from app.db import postgres_pool
 from app.services.connector_service import testar_conexao_postgres
 from app.utils.crypto import encrypt_password
 from app.core.logging import logger
-from typing import List
+from app.utils.listagem import responder_listagem, FORMATOS_LISTAGEM, CAMPOS_LISTAGEM
+from typing import Any, Dict, List, Optional
 
 router = APIRouter()
 
@@ -14,17 +18,22 @@ CONECTOR_NAO_ENCONTRADO = "Conector não encontrado"
 
 
 def get_collection():
-    return conectores_collection
+    return mongo.conectores_collection()
 
-def _testar_conexao(conector: ConnectorIn, acao: str):
+def get_async_collection(client=Depends(mongo_async.get_async_client)):
+    return mongo_async.conectores_collection(client)
+
+def _testar_conexao(conector: ConnectorIn, acao: str) -> postgres_pool.PoolConexoes:
     logger.info(f"🔍 Testando conexão antes de {acao} conector '{conector.nome}'")
     try:
-        if not testar_conexao_postgres(conector):
+        pool = testar_conexao_postgres(conector)
+        if not pool:
             raise HTTPException(
                 status_code=400,
                 detail="❌ Falha no teste de conexão. Verifique os dados fornecidos."
             )
         logger.info(f"✅ Teste de conexão bem-sucedido para '{conector.nome}'")
+        return pool
     except Exception as e:
         logger.error(f"❌ Erro no teste de conexão para '{conector.nome}': {e}")
         raise HTTPException(
@@ -51,11 +60,14 @@ def cadastrar_conector(conector: ConnectorIn, collection=Depends(get_collection)
             status_code=400,
             detail=f"Já existe um conector com o nome '{conector.nome}'"
         )
-    _testar_conexao(conector, "cadastrar")
+    pool = _testar_conexao(conector, "cadastrar")
     try:
-        doc = conector.dict()
+        doc = conector.model_dump()
         doc["senha"] = encrypt_password(doc["senha"])
         crud.insert_conector(doc, collection)
+        # Só depois de gravado o conector: a conexão aberta no teste é reaproveitada pelas gerações
+        postgres_pool.registrar_pool(conector.nome, pool)
+        pool = None
         logger.info(f"✅ Conector '{conector.nome}' cadastrado com sucesso")
         return ConnectorCreateResponse(
             success=True,
@@ -63,27 +75,55 @@ def cadastrar_conector(conector: ConnectorIn, collection=Depends(get_collection)
             connector_name=conector.nome,
             connection_tested=True
         )
+    except DuplicateKeyError:
+        # Cadastro concorrente com o mesmo nome: o índice único em 'nome' rejeita o segundo
+        raise HTTPException(
+            status_code=400,
+            detail=f"Já existe um conector com o nome '{conector.nome}'"
+        )
     except Exception as e:
         logger.error(f"❌ Erro ao cadastrar conector '{conector.nome}': {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Erro interno ao cadastrar conector: {str(e)}"
         )
+    finally:
+        if pool is not None:
+            pool.fechar()
 
 @router.get("/connectors/", response_model=List[ConnectorOut])
-def listar_conectores(collection=Depends(get_collection)):
+async def listar_conectores(
+    limite: Optional[int] = Query(None, ge=1, le=1000, description="Máximo de conectores por página (sem limite: todos)"),
+    apos: Optional[str] = Query(None, description="Cursor: nome do último conector da página anterior"),
+    campos: str = Query('completo', description="completo ou resumo (nome, host, porta e banco)"),
+    formato: str = Query('json', description="json (lista) ou ndjson (um conector por linha, em streaming)"),
+    collection=Depends(get_async_collection)
+):
+    """
+    Lista os conectores cadastrados em ordem de nome, com paginação por cursor (sem as senhas).
+    Quando a página está cheia, o cursor da próxima vem no cabeçalho X-Proximo-Cursor (em JSON).
+    """
+    if campos not in CAMPOS_LISTAGEM:
+        raise HTTPException(status_code=400, detail="campos deve ser 'completo' ou 'resumo'")
+    if formato not in FORMATOS_LISTAGEM:
+        raise HTTPException(status_code=400, detail="formato deve ser 'json' ou 'ndjson'")
+    itens = crud_async.iter_conectores(collection, apos=apos, limite=limite, resumo=campos == 'resumo')
+    transformar = None if campos == 'resumo' else lambda c: ConnectorOut(**_remover_campos_sensiveis(c)).model_dump()
+    return await responder_listagem(itens, formato, "nome", limite, transformar)
+
+@router.get("/connectors/pools/estatisticas", response_model=Dict[str, Dict[str, Any]])
+def estatisticas_pools():
     """
-    Lista todos os conectores cadastrados
+    Retorna as estatísticas dos pools de conexões PostgreSQL ativos, por conector
     """
-    conectores = crud.get_conectores(collection)
-    return [_remover_campos_sensiveis(c) for c in conectores]
+    return postgres_pool.estatisticas_pools()
 
 @router.get("/connectors/{nome}", response_model=ConnectorOut)
-def buscar_conector(nome: str, collection=Depends(get_collection)):
+async def buscar_conector(nome: str, collection=Depends(get_async_collection)):
     """
     Busca um conector específico pelo nome
     """
-    conector = crud.get_conector_por_nome(nome, collection)
+    conector = await crud_async.get_conector_por_nome(nome, collection)
     if not conector:
         raise HTTPException(status_code=404, detail=CONECTOR_NAO_ENCONTRADO)
     return _remover_campos_sensiveis(conector)
@@ -97,12 +137,16 @@ def atualizar_conector(nome: str, conector: ConnectorIn, collection=Depends(get_
     conector_existente = crud.get_conector_por_nome(nome, collection)
     if not conector_existente:
         raise HTTPException(status_code=404, detail=CONECTOR_NAO_ENCONTRADO)
-    _testar_conexao(conector, "atualizar")
+    pool = _testar_conexao(conector, "atualizar")
     try:
-        doc = conector.dict()
+        doc = conector.model_dump()
         doc["senha"] = encrypt_password(doc["senha"])
         atualizado = crud.update_conector(nome, doc, collection)
         if atualizado:
+            # O pool com os parâmetros antigos só é substituído depois de gravados os novos
+            postgres_pool.invalidar_pool(nome)
+            postgres_pool.registrar_pool(conector.nome, pool)
+            pool = None
             logger.info(f"✅ Conector '{nome}' atualizado com sucesso")
             return {"message": "✅ Conector atualizado com sucesso!"}
         else:
@@ -113,6 +157,9 @@ def atualizar_conector(nome: str, conector: ConnectorIn, collection=Depends(get_
             status_code=500,
             detail=f"Erro interno ao atualizar conector: {str(e)}"
         )
+    finally:
+        if pool is not None:
+            pool.fechar()
 
 @router.delete("/connectors/{nome}", response_model=MessageResponse)
 def remover_conector(nome: str, collection=Depends(get_collection)):
@@ -122,5 +169,6 @@ def remover_conector(nome: str, collection=Depends(get_collection)):
     removido = crud.delete_conector(nome, collection)
     if not removido:
         raise HTTPException(status_code=404, detail=CONECTOR_NAO_ENCONTRADO)
+    postgres_pool.invalidar_pool(nome)
     logger.info(f"✅ Conector '{nome}' removido com sucesso")
     return {"message": "✅ Conector removido com sucesso!"}
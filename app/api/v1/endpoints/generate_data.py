@@ -1,26 +1,53 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from app.db.mongo import tabelas_collection, conectores_collection, dados_sinteticos_collection
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, Body
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from app.db.crud import schemas as crud_schemas, connectors as crud_connectors, dados_sinteticos as crud_dados_sinteticos
+from app.db.crud import jobs as crud_jobs
+from app.db import postgres_pool, mongo, mongo_async
+from app.db.crud_async import dados_sinteticos as crud_dados_sinteticos_async, jobs as crud_jobs_async
 from app.utils.crypto import decrypt_password
-from app.services import data_generation
+from app.services import check_constraints, data_generation, file_export, job_service, parallel_loading, uniqueness
+from app.services.schema_cache import schema_cache
+from app.services.result_cache import cache_resultados, chave_resultado
+from app.core.config import EXPORTACAO_DIR
 from app.core.logging import logger
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional, Tuple
+import os
+import re
+import shutil
+import tempfile
+import zlib
 
 router = APIRouter()
 
+MODOS_GERACAO = ('executar', 'sql', 'sql_stream')
+FORMATOS_SQL = ('insert', 'copy')
+DADOS_NAO_ENCONTRADOS = "Nenhum dado sintético encontrado para este schema."
+VERSAO_NAO_ENCONTRADA = "Versão não encontrada para este schema."
+NOME_DESTINO_VALIDO = re.compile(r"^[A-Za-z0-9_.-]+$")
+
 
 def get_tabelas_collection():
-    return tabelas_collection
+    return mongo.tabelas_collection()
 
 def get_conectores_collection():
-    return conectores_collection
+    return mongo.conectores_collection()
 
 def get_dados_sinteticos_collection():
-    return dados_sinteticos_collection
+    return mongo.dados_sinteticos_collection()
+
+def get_jobs_collection():
+    return mongo.jobs_collection()
+
+def get_async_dados_sinteticos_collection(client=Depends(mongo_async.get_async_client)):
+    return mongo_async.dados_sinteticos_collection(client)
+
+def get_async_jobs_collection(client=Depends(mongo_async.get_async_client)):
+    return mongo_async.jobs_collection(client)
 
 def _buscar_schema(nome_schema: str, collection) -> Dict[str, Any]:
-    schema = crud_schemas.get_schema_por_nome(nome_schema, collection)
+    schema = schema_cache.obter(nome_schema, collection)
     if not schema:
         raise HTTPException(status_code=404, detail="Schema não encontrado")
     return schema
@@ -33,44 +60,212 @@ def _buscar_conector(conector_nome: str, collection) -> Dict[str, Any]:
 
 def _montar_conn_params(conector: dict) -> dict:
     senha = decrypt_password(conector['senha'])
+    return postgres_pool.parametros_conexao(
+        conector['host'], conector['porta'], conector['banco'], conector['usuario'], senha
+    )
+
+def _pool_do_conector(conector_nome: str, conector: dict) -> postgres_pool.PoolConexoes:
+    return postgres_pool.obter_pool(conector_nome, _montar_conn_params(conector))
+
+def _validar_engine(engine: str):
+    if engine not in data_generation.ENGINES:
+        raise HTTPException(status_code=400, detail="engine deve ser 'faker' ou 'numpy'")
+    if engine == 'numpy':
+        # Import tardio: o NumPy só é carregado quando o motor vetorizado é pedido
+        from app.services import vectorized_generation
+        if not vectorized_generation.NUMPY_DISPONIVEL:
+            raise HTTPException(status_code=400, detail="engine 'numpy' indisponível: pacote numpy não instalado")
+
+def _validar_checks(schema: Dict[str, Any], ignorar_checks: bool, tabelas=None):
+    # Falha antes de gerar (e de abrir conexões) se algum CHECK não puder ser garantido: a carga seria rejeitada no banco
+    if ignorar_checks:
+        return
+    problemas = check_constraints.check_report(schema, tabelas)
+    if problemas:
+        raise HTTPException(status_code=422, detail={
+            "message": "Há CHECK constraints que a geração não garante; corrija o schema ou use ignorar_checks=true",
+            "checks": problemas,
+        })
+
+def _chave_versao(
+    rows_per_table: int, formato_sql: str, versao_schema: Optional[int], seed: Optional[int], engine: str, chunk_size: int,
+    linhas_por_insert: int = 1
+) -> Dict[str, Any]:
+    # Parâmetros que identificam uma versão persistida do script (ver crud.dados_sinteticos.CAMPOS_CHAVE_VERSAO);
+    # com seed, engine e chunk_size completam o necessário para reproduzi-la
     return {
-        'host': conector['host'],
-        'port': conector['porta'],
-        'dbname': conector['banco'],
-        'user': conector['usuario'],
-        'password': senha
+        "seed": seed, "rows_per_table": rows_per_table, "formato_sql": formato_sql, "versao_schema": versao_schema,
+        "linhas_por_insert": linhas_por_insert, "engine": engine, "chunk_size": chunk_size
     }
 
+def _gravar_lotes(schema: Dict[str, Any], chunks, gravador: crud_dados_sinteticos.GravadorScript, formato_sql: str, linhas_por_insert: int = 1):
+    # Repassa os lotes adiante gravando o SQL renderizado de cada um (o script é persistido em blocos, sem acumular)
+    for table, rows in chunks:
+        for bloco in _iter_script(schema, [(table, rows)], formato_sql, linhas_por_insert):
+            gravador.escrever(bloco)
+        yield table, rows
+
+def _finalizar_gravacao(nome_schema: str, gravador: crud_dados_sinteticos.GravadorScript, chave: Dict[str, Any]):
+    metadados = gravador.finalizar(**chave, updated_at=datetime.utcnow())
+    logger.info(f"Script SQL persistido para schema {nome_schema}: versão {metadados['script_id']} ({metadados['bytes']} bytes em {metadados['blocos']} blocos)")
+
+def _persistir_sql(nome_schema: str, sql: str, linhas: Dict[str, int], collection, chave: Dict[str, Any]):
+    metadados = crud_dados_sinteticos.upsert_sql(nome_schema, sql, collection, linhas=linhas, **chave, updated_at=datetime.utcnow())
+    logger.info(f"Script SQL persistido para schema {nome_schema}: versão {metadados['script_id']} ({metadados['bytes']} bytes em {metadados['blocos']} blocos)")
+
+def _iter_script(schema: Dict[str, Any], chunks, formato_sql: str, linhas_por_insert: int = 1) -> Iterator[str]:
+    if formato_sql == 'copy':
+        return data_generation.iter_copy_sql(schema, chunks)
+    return (bloco + '\n' for bloco in data_generation.iter_insert_sql(schema, chunks, linhas_por_insert))
+
+def _renderizar_sql(schema: Dict[str, Any], chunks, formato_sql: str, linhas_por_insert: int = 1) -> str:
+    if formato_sql == 'copy':
+        return ''.join(data_generation.iter_copy_sql(schema, chunks))
+    return '\n'.join(data_generation.iter_insert_sql(schema, chunks, linhas_por_insert))
+
+def _etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidatos or any(c.removeprefix('W/') == etag for c in candidatos)
+
+def _gzip_stream(partes: Iterator[str]) -> Iterator[bytes]:
+    # Compressão gzip incremental; o flush por bloco mantém o envio contínuo ao cliente
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for parte in partes:
+        yield compressor.compress(parte.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def _stream_script(nome_schema: str, partes: Iterator[str], gravador: Optional[crud_dados_sinteticos.GravadorScript], chave: Dict[str, Any], formato_sql: str):
+    try:
+        for parte in partes:
+            if gravador:
+                gravador.escrever(parte)
+            yield parte
+        if gravador:
+            _finalizar_gravacao(nome_schema, gravador, chave)
+        logger.info(f"Script SQL ({formato_sql}) enviado via streaming para schema {nome_schema}")
+    except BaseException as e:
+        # Inclui o cliente desconectando no meio do envio: os blocos já gravados são descartados
+        if gravador:
+            gravador.descartar()
+        if isinstance(e, Exception):
+            logger.error(f"Erro ao gerar dados em streaming: {e}")
+        raise
+
 @router.post("/gerar-dados/{nome_schema}")
 def gerar_dados(
     nome_schema: str,
+    request: Request,
+    response: Response,
     conector_nome: str = Query(..., description="Nome do conector de destino"),
     rows_per_table: int = Query(10, description="Linhas por tabela"),
-    modo: str = Query('executar', description="executar ou sql"),
-    persistir_sql: bool = Query(False, description="Se verdadeiro, persiste o SQL gerado no MongoDB"),
+    modo: str = Query('executar', description="executar, sql ou sql_stream"),
+    metodo_carga: str = Query('copy', description="copy ou insert (usado quando modo=executar)"),
+    formato_sql: str = Query('insert', description="insert ou copy (formato do script nos modos sql e sql_stream e do script persistido no modo executar)"),
+    linhas_por_insert: int = Query(1, ge=1, le=10_000, description="Linhas por comando INSERT (VALUES de várias linhas) no formato insert e no metodo_carga insert; 1 gera um INSERT por linha"),
+    gzip: bool = Query(False, description="Compacta a resposta com gzip (modo sql_stream)"),
+    conexoes_carga: int = Query(1, ge=1, le=32, description="Conexões usadas na carga (modo executar): acima de 1 cada lote é carregado em paralelo, em sua própria transação"),
+    recriar_indices: bool = Query(False, description="Remove índices avulsos e desativa triggers nas tabelas grandes durante a carga, recriando-os ao final"),
+    chunk_size: int = Query(data_generation.DEFAULT_CHUNK_SIZE, ge=1, description="Linhas por lote de geração"),
+    engine: str = Query('faker', description="faker (célula a célula) ou numpy (coluna a coluna, vetorizado)"),
+    workers: int = Query(1, ge=1, le=64, description="Processos usados na geração (tabelas e lotes independentes em paralelo)"),
+    reservar_ids: bool = Query(False, description="Reserva os intervalos de IDs das PKs via setval nas sequências (gerações concorrentes não colidem)"),
+    seed: Optional[int] = Query(None, ge=0, description="Semente da geração: mesma seed, parâmetros e PKs iniciais geram os mesmos dados"),
+    persistir_sql: bool = Query(False, description="Se verdadeiro, persiste o SQL gerado no MongoDB como uma nova versão"),
+    ignorar_checks: bool = Query(False, description="Gera mesmo com CHECK constraints que a geração não garante (ver GET /gerar-dados/{nome_schema}/checks)"),
     tabelas_col=Depends(get_tabelas_collection),
     conectores_col=Depends(get_conectores_collection),
     dados_sint_col=Depends(get_dados_sinteticos_collection)
 ):
     """
     Gera dados sintéticos para um schema e insere ou retorna o SQL.
+    No modo executar a carga é feita via COPY por padrão; metodo_carga=insert executa os INSERTs gerados.
+    Com linhas_por_insert > 1 cada INSERT leva várias linhas em um único VALUES: o script fica menor e a carga
+    por insert envia lotes de linhas_por_insert linhas via execute_values.
+    Com conexoes_carga > 1 os lotes são carregados em paralelo (ver services.parallel_loading): mais rápido, porém
+    sem transação única; as tabelas filhas só começam depois que as tabelas pai foram confirmadas.
+    O modo sql_stream envia o script como text/plain em blocos à medida que é gerado
+    (ex.: curl --compressed ... | psql), opcionalmente compactado com gzip.
+    As linhas são geradas e consumidas em lotes de chunk_size, sem materializar todas as tabelas em memória.
+    Com seed a geração é reproduzível: o resultado não muda com o número de workers. No modo sql (sem reservar_ids)
+    o script gerado com seed fica em cache pelo hash do schema, dos parâmetros e das PKs iniciais, que é também o ETag:
+    repetições respondem do cache e um If-None-Match com o ETag recebe 304.
     """
     try:
+        if modo not in MODOS_GERACAO:
+            raise HTTPException(status_code=400, detail="modo deve ser 'executar', 'sql' ou 'sql_stream'")
+        if metodo_carga not in ('copy', 'insert'):
+            raise HTTPException(status_code=400, detail="metodo_carga deve ser 'copy' ou 'insert'")
+        if formato_sql not in FORMATOS_SQL:
+            raise HTTPException(status_code=400, detail="formato_sql deve ser 'insert' ou 'copy'")
+        _validar_engine(engine)
         schema = _buscar_schema(nome_schema, tabelas_col)
+        _validar_checks(schema, ignorar_checks)
         conector = _buscar_conector(conector_nome, conectores_col)
-        conn_params = _montar_conn_params(conector)
-        fake_data = data_generation.generate_fake_data(schema, rows_per_table, conn_params=conn_params)
-        sql = data_generation.generate_insert_sql(schema, fake_data)
-        if persistir_sql:
-            crud_dados_sinteticos.upsert_sql(
-                nome_schema, sql, dados_sint_col,
-                rows_per_table=rows_per_table, updated_at=datetime.utcnow()
+        conn_params = _pool_do_conector(conector_nome, conector)
+        pk_start_vals = None
+        chave_cache = None
+        if modo == 'sql' and seed is not None and not reservar_ids:
+            # As PKs iniciais entram na chave: são lidas aqui e repassadas ao gerador para não consultar de novo
+            pk_start_vals = data_generation.get_pk_start_vals(schema, conn_params)
+            chave_cache = chave_resultado(schema, rows_per_table, seed, pk_start_vals, formato_sql, engine, chunk_size, linhas_por_insert)
+        chunks = data_generation.iter_fake_data(
+            schema, rows_per_table, conn_params=conn_params, chunk_size=chunk_size, engine=engine, workers=workers,
+            reservar_ids=reservar_ids, plans=schema_cache.planos(nome_schema, schema, engine), seed=seed,
+            pk_start_vals=pk_start_vals
+        )
+        chave = _chave_versao(
+            rows_per_table, formato_sql, crud_schemas.get_versao_schema(nome_schema, tabelas_col) if persistir_sql else None,
+            seed, engine, chunk_size, linhas_por_insert
+        )
+        if modo == 'sql_stream':
+            gravador = crud_dados_sinteticos.GravadorScript(nome_schema, dados_sint_col) if persistir_sql else None
+            if gravador:
+                chunks = data_generation.count_rows(chunks, gravador.linhas)
+            partes = _stream_script(
+                nome_schema, _iter_script(schema, chunks, formato_sql, linhas_por_insert),
+                gravador, chave, formato_sql
             )
-            logger.info(f"Script SQL persistido para schema {nome_schema} na collection dados_sinteticos")
+            if gzip:
+                return StreamingResponse(
+                    _gzip_stream(partes), media_type="text/plain; charset=utf-8",
+                    headers={"Content-Encoding": "gzip"}
+                )
+            return StreamingResponse(partes, media_type="text/plain; charset=utf-8")
         if modo == 'sql':
+            resultado = None
+            if chave_cache:
+                etag = f'"{chave_cache}"'
+                if not persistir_sql and _etag_confere(request.headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers={"ETag": etag})
+                resultado = cache_resultados.obter(chave_cache)
+                response.headers["ETag"] = etag
+                response.headers["X-Cache"] = "HIT" if resultado else "MISS"
+            if resultado:
+                sql, linhas = resultado.sql, dict(resultado.linhas)
+            else:
+                linhas: Dict[str, int] = {}
+                sql = _renderizar_sql(schema, data_generation.count_rows(chunks, linhas), formato_sql, linhas_por_insert)
+                if chave_cache:
+                    cache_resultados.armazenar(chave_cache, sql, linhas)
+            if persistir_sql:
+                _persistir_sql(nome_schema, sql, linhas, dados_sint_col, chave)
             return {"sql": sql, "persistido": persistir_sql}
-        data_generation.execute_inserts(conn_params, sql)
-        logger.info(f"Dados gerados e inseridos para schema {nome_schema} usando conector {conector_nome}")
+        gravador = crud_dados_sinteticos.GravadorScript(nome_schema, dados_sint_col) if persistir_sql else None
+        if gravador:
+            chunks = _gravar_lotes(schema, data_generation.count_rows(chunks, gravador.linhas), gravador, formato_sql, linhas_por_insert)
+        try:
+            parallel_loading.carregar(
+                conn_params, schema, chunks, rows_per_table, metodo_carga, linhas_por_insert, conexoes_carga, recriar_indices
+            )
+        except BaseException:
+            if gravador:
+                gravador.descartar()
+            raise
+        if gravador:
+            _finalizar_gravacao(nome_schema, gravador, chave)
+        logger.info(f"Dados gerados e inseridos ({metodo_carga}) para schema {nome_schema} usando conector {conector_nome}")
         return {"message": "Dados gerados e inseridos com sucesso!", "persistido": persistir_sql}
     except HTTPException as e:
         raise e
@@ -78,16 +273,427 @@ def gerar_dados(
         logger.error(f"Erro ao gerar dados: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/gerar-dados/{nome_schema}/completar")
+def completar_dados(
+    nome_schema: str,
+    alvos: Dict[str, int] = Body(..., description="Total de linhas desejado por tabela (ex.: {\"clientes\": 100000})"),
+    conector_nome: str = Query(..., description="Nome do conector de destino"),
+    metodo_carga: str = Query('copy', description="copy ou insert"),
+    linhas_por_insert: int = Query(1, ge=1, le=10_000, description="Linhas por comando INSERT (VALUES de várias linhas) no formato insert e no metodo_carga insert; 1 gera um INSERT por linha"),
+    chunk_size: int = Query(data_generation.DEFAULT_CHUNK_SIZE, ge=1, description="Linhas por lote de geração"),
+    engine: str = Query('faker', description="faker (célula a célula) ou numpy (coluna a coluna, vetorizado)"),
+    workers: int = Query(1, ge=1, le=64, description="Processos usados na geração (tabelas e lotes independentes em paralelo)"),
+    reservar_ids: bool = Query(False, description="Reserva os intervalos de IDs das PKs via setval nas sequências (gerações concorrentes não colidem)"),
+    seed: Optional[int] = Query(None, ge=0, description="Semente da geração"),
+    conexoes_carga: int = Query(1, ge=1, le=32, description="Conexões usadas na carga (modo executar): acima de 1 cada lote é carregado em paralelo, em sua própria transação"),
+    recriar_indices: bool = Query(False, description="Remove índices avulsos e desativa triggers nas tabelas grandes durante a carga, recriando-os ao final"),
+    ignorar_checks: bool = Query(False, description="Gera mesmo com CHECK constraints que a geração não garante (ver GET /gerar-dados/{nome_schema}/checks)"),
+    tabelas_col=Depends(get_tabelas_collection),
+    conectores_col=Depends(get_conectores_collection)
+):
+    """
+    Completa um banco existente até o total de linhas pedido por tabela: conta as linhas atuais no conector, gera só
+    as que faltam e insere. As FKs das linhas novas apontam tanto para chaves já existentes no banco (lidas em lote)
+    quanto para as linhas geradas agora. Tabelas fora de `alvos` não recebem linhas.
+    """
+    if metodo_carga not in ('copy', 'insert'):
+        raise HTTPException(status_code=400, detail="metodo_carga deve ser 'copy' ou 'insert'")
+    _validar_engine(engine)
+    schema = _buscar_schema(nome_schema, tabelas_col)
+    desconhecidas = [t for t in alvos if t == 'nome_schema' or t not in schema]
+    if desconhecidas:
+        raise HTTPException(status_code=400, detail=f"Tabelas inexistentes no schema: {', '.join(desconhecidas)}")
+    if any(alvo < 0 for alvo in alvos.values()):
+        raise HTTPException(status_code=400, detail="O total de linhas por tabela não pode ser negativo")
+    _validar_checks(schema, ignorar_checks, alvos)
+    conector = _buscar_conector(conector_nome, conectores_col)
+    conn_params = _pool_do_conector(conector_nome, conector)
+    try:
+        existentes = data_generation.count_table_rows(conn_params, schema, list(alvos))
+        faltantes = {t: alvo - existentes.get(t, 0) for t, alvo in alvos.items() if alvo > existentes.get(t, 0)}
+        if faltantes:
+            # Chaves referenciadas pelas FKs (até EXISTING_KEYS_LIMIT) e todos os valores das colunas únicas e PKs
+            # compostas das tabelas completadas, para que as linhas novas não colidam com as existentes
+            unicas = uniqueness.unique_refs_for(schema, faltantes)
+            refs = [ref for ref in data_generation.fk_refs_for(schema, faltantes) if ref not in unicas]
+            existing_keys = data_generation.load_existing_keys(conn_params, schema, refs) if refs else {}
+            if unicas:
+                existing_keys.update(data_generation.load_existing_keys(conn_params, schema, unicas, limit=None))
+            chunks = data_generation.iter_fake_data(
+                schema, faltantes, conn_params=conn_params, chunk_size=chunk_size, engine=engine, workers=workers,
+                reservar_ids=reservar_ids, plans=schema_cache.planos(nome_schema, schema, engine), seed=seed,
+                existing_keys=existing_keys or None
+            )
+            parallel_loading.carregar(
+                conn_params, schema, chunks, faltantes, metodo_carga, linhas_por_insert, conexoes_carga, recriar_indices
+            )
+    except Exception as e:
+        logger.error(f"Erro ao completar dados: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    logger.info(f"Dados completados para schema {nome_schema} usando conector {conector_nome}: {faltantes}")
+    return {
+        "message": "Dados completados com sucesso!" if faltantes else "Todas as tabelas já atingiram o total pedido.",
+        "linhas_existentes": existentes,
+        "linhas_geradas": faltantes,
+    }
+
+def _diretorio_exportacao(salvar_em: str) -> str:
+    # Só subdiretórios diretos de EXPORTACAO_DIR: o cliente nunca escolhe um caminho arbitrário no servidor
+    if not EXPORTACAO_DIR:
+        raise HTTPException(status_code=400, detail="Gravação local indisponível: EXPORTACAO_DIR não configurado")
+    if not NOME_DESTINO_VALIDO.match(salvar_em) or salvar_em in ('.', '..'):
+        raise HTTPException(status_code=400, detail="salvar_em deve ser um nome simples (letras, dígitos, '_', '-', '.')")
+    diretorio = os.path.join(EXPORTACAO_DIR, salvar_em)
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+@router.post("/gerar-dados/{nome_schema}/exportar")
+def exportar_dados(
+    nome_schema: str,
+    formato: str = Query('csv', description="csv, ndjson ou parquet (um arquivo por tabela)"),
+    empacotamento: str = Query('zip', description="zip, tar ou tar.gz"),
+    rows_per_table: int = Query(10, description="Linhas por tabela"),
+    conector_nome: Optional[str] = Query(None, description="Conector de destino: se informado, as PKs continuam a partir das existentes"),
+    chunk_size: int = Query(data_generation.DEFAULT_CHUNK_SIZE, ge=1, description="Linhas por lote de geração"),
+    engine: str = Query('faker', description="faker (célula a célula) ou numpy (coluna a coluna, vetorizado)"),
+    workers: int = Query(1, ge=1, le=64, description="Processos usados na geração (tabelas e lotes independentes em paralelo)"),
+    seed: Optional[int] = Query(None, ge=0, description="Semente da geração"),
+    salvar_em: Optional[str] = Query(None, description="Grava o pacote em EXPORTACAO_DIR/<salvar_em> em vez de enviá-lo como download"),
+    ignorar_checks: bool = Query(False, description="Gera mesmo com CHECK constraints que a geração não garante (ver GET /gerar-dados/{nome_schema}/checks)"),
+    tabelas_col=Depends(get_tabelas_collection),
+    conectores_col=Depends(get_conectores_collection)
+):
+    """
+    Gera os dados e exporta cada tabela para um arquivo CSV, NDJSON ou Parquet, empacotados em zip ou tar.
+    Os lotes são gravados em streaming (memória limitada) por escritores em paralelo, um por tabela.
+    O CSV pode ser carregado com \\copy schema.tabela FROM 'tabela.csv' WITH (FORMAT csv, HEADER).
+    Sem salvar_em o pacote é enviado como download; com salvar_em fica no servidor e a resposta traz o caminho.
+    """
+    try:
+        file_export.validar_formato(formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if empacotamento not in file_export.EMPACOTAMENTOS:
+        raise HTTPException(status_code=400, detail="empacotamento deve ser 'zip', 'tar' ou 'tar.gz'")
+    _validar_engine(engine)
+    schema = _buscar_schema(nome_schema, tabelas_col)
+    _validar_checks(schema, ignorar_checks)
+    conn_params = _pool_do_conector(conector_nome, _buscar_conector(conector_nome, conectores_col)) if conector_nome else None
+    diretorio = _diretorio_exportacao(salvar_em) if salvar_em else tempfile.mkdtemp(prefix="exportacao_")
+    nome_arquivo = file_export.nome_pacote(nome_schema, formato, empacotamento)
+    destino = os.path.join(diretorio, nome_arquivo)
+    try:
+        chunks = data_generation.iter_fake_data(
+            schema, rows_per_table, conn_params=conn_params, chunk_size=chunk_size, engine=engine, workers=workers,
+            plans=schema_cache.planos(nome_schema, schema, engine), seed=seed
+        )
+        arquivos = file_export.export_archive(schema, chunks, destino, formato, empacotamento)
+    except Exception as e:
+        if not salvar_em:
+            shutil.rmtree(diretorio, ignore_errors=True)
+        logger.error(f"Erro ao exportar dados: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    logger.info(f"Dados exportados ({formato}, {empacotamento}) para schema {nome_schema}: {destino}")
+    if salvar_em:
+        return {
+            "message": "Dados exportados com sucesso!",
+            "arquivo": destino,
+            "tabelas": {tabela: a._asdict() for tabela, a in arquivos.items()},
+        }
+    return FileResponse(
+        destino, media_type=file_export.MEDIA_TYPES[empacotamento], filename=nome_arquivo,
+        background=BackgroundTask(shutil.rmtree, diretorio, ignore_errors=True)
+    )
+
+@router.get("/gerar-dados/cache/estatisticas")
+def estatisticas_cache_resultados():
+    """
+    Estatísticas do cache de scripts gerados com seed (acertos em memória e em disco, bytes ocupados, taxa de acerto).
+    """
+    return cache_resultados.estatisticas()
+
+@router.get("/gerar-dados/{nome_schema}/checks")
+def verificar_checks(nome_schema: str, tabelas_col=Depends(get_tabelas_collection)):
+    """
+    Lista os CHECK constraints do schema que a geração não garante (trechos ignorados ou sem valor possível).
+    As gerações recusam o schema com 422 enquanto a lista não estiver vazia, a menos que ignorar_checks=true.
+    """
+    schema = _buscar_schema(nome_schema, tabelas_col)
+    return {"nome_schema": nome_schema, "checks": check_constraints.check_report(schema)}
+
 @router.get("/gerar-dados/{nome_schema}")
-def get_dados_gerados(
+async def get_dados_gerados(
     nome_schema: str,
-    dados_sint_col=Depends(get_dados_sinteticos_collection)
+    versao: Optional[str] = Query(None, description="Versão (script_id); padrão: a mais recente"),
+    dados_sint_col=Depends(get_async_dados_sinteticos_collection)
 ):
     """
-    Retorna os dados sintéticos gerados e persistidos para o schema informado.
+    Retorna os dados sintéticos gerados e persistidos para o schema informado, com o script inteiro no campo sql.
+    Para scripts grandes prefira GET /gerar-dados/{nome_schema}/metadados e /script, que não o carregam em memória.
     """
-    doc = crud_dados_sinteticos.get_sql(nome_schema, dados_sint_col)
+    doc = await crud_dados_sinteticos_async.get_sql(nome_schema, dados_sint_col, versao)
     if not doc:
-        raise HTTPException(status_code=404, detail="Nenhum dado sintético encontrado para este schema.")
+        raise HTTPException(status_code=404, detail=DADOS_NAO_ENCONTRADOS)
     doc.pop("_id", None)
-    return doc 
\ No newline at end of file
+    return doc
+
+async def _buscar_metadados_script(nome_schema: str, collection, versao: Optional[str] = None) -> Dict[str, Any]:
+    metadados = await crud_dados_sinteticos_async.get_metadados(nome_schema, collection, versao)
+    if not metadados:
+        raise HTTPException(status_code=404, detail=DADOS_NAO_ENCONTRADOS)
+    if metadados.get("armazenamento") != crud_dados_sinteticos.ARMAZENAMENTO_BLOCOS:
+        # Script legado (campo sql) ainda não convertido pela migração: o tamanho exige ler o conteúdo
+        doc = await crud_dados_sinteticos_async.get_sql(nome_schema, collection, versao)
+        metadados = {**metadados, "bytes": len(doc.get("sql", "").encode('utf-8'))}
+    return metadados
+
+@router.get("/gerar-dados/{nome_schema}/metadados")
+async def get_metadados_script(
+    nome_schema: str,
+    versao: Optional[str] = Query(None, description="Versão (script_id); padrão: a mais recente"),
+    dados_sint_col=Depends(get_async_dados_sinteticos_collection)
+):
+    """
+    Retorna os metadados do script persistido (bytes, linhas por tabela, sha256, blocos), sem o conteúdo.
+    """
+    metadados = await _buscar_metadados_script(nome_schema, dados_sint_col, versao)
+    metadados.pop("_id", None)
+    return metadados
+
+@router.get("/gerar-dados/{nome_schema}/versoes")
+async def listar_versoes(
+    nome_schema: str,
+    dados_sint_col=Depends(get_async_dados_sinteticos_collection)
+):
+    """
+    Lista as versões persistidas do script do schema, da mais recente para a mais antiga (apenas metadados).
+    """
+    return await crud_dados_sinteticos_async.listar_versoes(nome_schema, dados_sint_col)
+
+@router.put("/gerar-dados/{nome_schema}/versoes/{versao}/fixada")
+def fixar_versao(
+    nome_schema: str,
+    versao: str,
+    fixada: bool = Query(True, description="true protege a versão da política de retenção; false a libera"),
+    dados_sint_col=Depends(get_dados_sinteticos_collection)
+):
+    """
+    Fixa (ou libera) uma versão: versões fixadas não são descartadas pela retenção.
+    """
+    if not crud_dados_sinteticos.fixar_versao(nome_schema, versao, fixada, dados_sint_col):
+        raise HTTPException(status_code=404, detail=VERSAO_NAO_ENCONTRADA)
+    return {"versao": versao, "fixada": fixada}
+
+@router.delete("/gerar-dados/{nome_schema}/versoes/{versao}")
+def remover_versao(
+    nome_schema: str,
+    versao: str,
+    dados_sint_col=Depends(get_dados_sinteticos_collection)
+):
+    """
+    Remove uma versão persistida e seus blocos.
+    """
+    if not crud_dados_sinteticos.remover_versao(nome_schema, versao, dados_sint_col):
+        raise HTTPException(status_code=404, detail=VERSAO_NAO_ENCONTRADA)
+    logger.info(f"Versão {versao} do script do schema {nome_schema} removida")
+    return {"message": "Versão removida", "versao": versao}
+
+@router.post("/gerar-dados/{nome_schema}/versoes/{versao}/replay")
+def replay_versao(
+    nome_schema: str,
+    versao: str,
+    conector_nome: str = Query(..., description="Nome do conector de destino"),
+    tabelas_col=Depends(get_tabelas_collection),
+    conectores_col=Depends(get_conectores_collection),
+    dados_sint_col=Depends(get_dados_sinteticos_collection)
+):
+    """
+    Carrega uma versão persistida no conector sem gerar os dados de novo: o script é lido bloco a bloco do MongoDB
+    e enviado via COPY (versões no formato copy) ou em lotes de INSERTs, em uma única transação.
+    """
+    metadados = crud_dados_sinteticos.get_metadados(nome_schema, dados_sint_col, versao)
+    if not metadados:
+        raise HTTPException(status_code=404, detail=VERSAO_NAO_ENCONTRADA)
+    conector = _buscar_conector(conector_nome, conectores_col)
+    conn_params = _pool_do_conector(conector_nome, conector)
+    versao_schema_atual = crud_schemas.get_versao_schema(nome_schema, tabelas_col)
+    try:
+        data_generation.load_sql_script(
+            conn_params, crud_dados_sinteticos.iter_script(metadados, dados_sint_col), metadados.get("formato_sql") or 'insert'
+        )
+    except Exception as e:
+        logger.error(f"Erro ao reexecutar versão {versao} do schema {nome_schema}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    logger.info(f"Versão {versao} do schema {nome_schema} carregada no conector {conector_nome}")
+    return {
+        "message": "Versão carregada com sucesso!",
+        "versao": versao,
+        "linhas": metadados.get("linhas", {}),
+        "schema_alterado": metadados.get("versao_schema") is not None and metadados.get("versao_schema") != versao_schema_atual,
+    }
+
+def _faixa_solicitada(range_header: Optional[str], tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um cabeçalho Range de faixa única (bytes=a-b, bytes=a- ou bytes=-n).
+    None indica o script inteiro (sem Range, unidade desconhecida ou múltiplas faixas).
+    """
+    if not range_header:
+        return None
+    unidade, _, faixa = range_header.partition('=')
+    if unidade.strip() != 'bytes' or ',' in faixa:
+        return None
+    inicio_txt, _, fim_txt = faixa.strip().partition('-')
+    try:
+        if not inicio_txt:
+            sufixo = int(fim_txt)
+            inicio, fim = (max(tamanho - sufixo, 0) if sufixo else tamanho), tamanho - 1
+        else:
+            inicio = int(inicio_txt)
+            fim = min(int(fim_txt), tamanho - 1) if fim_txt else tamanho - 1
+    except ValueError:
+        return None
+    if inicio > fim or inicio >= tamanho:
+        raise HTTPException(status_code=416, detail="Faixa de bytes inválida", headers={"Content-Range": f"bytes */{tamanho}"})
+    return inicio, fim
+
+@router.get("/gerar-dados/{nome_schema}/script")
+async def baixar_script(
+    nome_schema: str,
+    request: Request,
+    versao: Optional[str] = Query(None, description="Versão (script_id); padrão: a mais recente"),
+    gzip: bool = Query(False, description="Baixa o arquivo .sql.gz com os blocos compactados como estão gravados (ignorado com Range)"),
+    dados_sint_col=Depends(get_async_dados_sinteticos_collection)
+):
+    """
+    Download em streaming do script persistido, lido bloco a bloco do MongoDB.
+    Aceita o cabeçalho Range (bytes=inicio-fim) para retomar downloads ou ler só um trecho; o ETag é o sha256.
+    """
+    metadados = await _buscar_metadados_script(nome_schema, dados_sint_col, versao)
+    tamanho = metadados["bytes"]
+    headers = {"Accept-Ranges": "bytes", "Content-Disposition": f'attachment; filename="{nome_schema}.sql"'}
+    if metadados.get("sha256"):
+        headers["ETag"] = f'"{metadados["sha256"]}"'
+    faixa = _faixa_solicitada(request.headers.get("range"), tamanho)
+    if faixa:
+        inicio, fim = faixa
+        headers.update({"Content-Range": f"bytes {inicio}-{fim}/{tamanho}", "Content-Length": str(fim - inicio + 1)})
+        return StreamingResponse(
+            crud_dados_sinteticos_async.iter_script(metadados, dados_sint_col, inicio, fim),
+            status_code=206, media_type="text/plain; charset=utf-8", headers=headers
+        )
+    if gzip and metadados.get("armazenamento") == crud_dados_sinteticos.ARMAZENAMENTO_BLOCOS:
+        # Arquivo .gz com vários membros (um por bloco): válido para gunzip/zcat, mas não como Content-Encoding,
+        # que muitos clientes HTTP decodificam só até o fim do primeiro membro
+        headers = {
+            "Content-Disposition": f'attachment; filename="{nome_schema}.sql.gz"',
+            "Content-Length": str(metadados["bytes_comprimidos"]),
+            **({"ETag": headers["ETag"]} if "ETag" in headers else {})
+        }
+        return StreamingResponse(
+            crud_dados_sinteticos_async.iter_script_gzip(metadados, dados_sint_col),
+            media_type="application/gzip", headers=headers
+        )
+    headers["Content-Length"] = str(tamanho)
+    return StreamingResponse(
+        crud_dados_sinteticos_async.iter_script(metadados, dados_sint_col),
+        media_type="text/plain; charset=utf-8", headers=headers
+    )
+
+@router.post("/gerar-dados/{nome_schema}/jobs", status_code=202)
+def criar_job_geracao(
+    nome_schema: str,
+    conector_nome: str = Query(..., description="Nome do conector de destino"),
+    rows_per_table: int = Query(10, description="Linhas por tabela"),
+    modo: str = Query('executar', description="executar (carga no banco) ou sql (persiste o script)"),
+    metodo_carga: str = Query('copy', description="copy ou insert (usado quando modo=executar)"),
+    chunk_size: int = Query(data_generation.DEFAULT_CHUNK_SIZE, ge=1, description="Linhas por lote de geração"),
+    engine: str = Query('faker', description="faker (célula a célula) ou numpy (coluna a coluna, vetorizado)"),
+    workers: int = Query(1, ge=1, le=64, description="Processos usados na geração (tabelas e lotes independentes em paralelo)"),
+    reservar_ids: bool = Query(False, description="Reserva os intervalos de IDs das PKs via setval nas sequências (gerações concorrentes não colidem)"),
+    seed: Optional[int] = Query(None, ge=0, description="Semente da geração: mesma seed, parâmetros e PKs iniciais geram os mesmos dados"),
+    linhas_por_insert: int = Query(1, ge=1, le=10_000, description="Linhas por comando INSERT no script persistido (modo sql) e no metodo_carga insert; 1 gera um INSERT por linha"),
+    conexoes_carga: int = Query(1, ge=1, le=32, description="Conexões usadas na carga (modo executar): acima de 1 cada lote é carregado em paralelo, em sua própria transação"),
+    recriar_indices: bool = Query(False, description="Remove índices avulsos e desativa triggers nas tabelas grandes durante a carga, recriando-os ao final"),
+    ignorar_checks: bool = Query(False, description="Gera mesmo com CHECK constraints que a geração não garante (ver GET /gerar-dados/{nome_schema}/checks)"),
+    tabelas_col=Depends(get_tabelas_collection),
+    conectores_col=Depends(get_conectores_collection),
+    dados_sint_col=Depends(get_dados_sinteticos_collection),
+    jobs_col=Depends(get_jobs_collection)
+):
+    """
+    Agenda a geração de dados em segundo plano e retorna imediatamente o identificador do job.
+    Acompanhe com GET /jobs/{job_id} e obtenha o resultado em GET /jobs/{job_id}/resultado.
+    """
+    if modo not in ('executar', 'sql'):
+        raise HTTPException(status_code=400, detail="modo deve ser 'executar' ou 'sql'")
+    if metodo_carga not in ('copy', 'insert'):
+        raise HTTPException(status_code=400, detail="metodo_carga deve ser 'copy' ou 'insert'")
+    _validar_engine(engine)
+    schema = _buscar_schema(nome_schema, tabelas_col)
+    _validar_checks(schema, ignorar_checks)
+    conector = _buscar_conector(conector_nome, conectores_col)
+    conn_params = _pool_do_conector(conector_nome, conector)
+    parametros = {
+        "rows_per_table": rows_per_table, "modo": modo, "metodo_carga": metodo_carga, "chunk_size": chunk_size,
+        "engine": engine, "workers": workers, "reservar_ids": reservar_ids, "seed": seed,
+        "linhas_por_insert": linhas_por_insert, "conexoes_carga": conexoes_carga, "recriar_indices": recriar_indices,
+        "versao_schema": crud_schemas.get_versao_schema(nome_schema, tabelas_col)
+    }
+    job_id = job_service.criar_job(nome_schema, conector_nome, parametros, jobs_col)
+    job_service.submeter_job(job_id, schema, conn_params, parametros, jobs_col, dados_sint_col)
+    logger.info(f"Job {job_id} agendado para schema {nome_schema} usando conector {conector_nome}")
+    return {"job_id": job_id, "status": job_service.STATUS_PENDENTE}
+
+def _buscar_job(job_id: str, collection) -> Dict[str, Any]:
+    job = crud_jobs.get_job(job_id, collection)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@router.get("/jobs/{job_id}")
+async def consultar_job(job_id: str, jobs_col=Depends(get_async_jobs_collection)):
+    """
+    Retorna status e progresso (linhas geradas/inseridas por tabela) de um job de geração.
+    """
+    job = await crud_jobs_async.get_job(job_id, jobs_col)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@router.post("/jobs/{job_id}/cancelar")
+def cancelar_job(job_id: str, jobs_col=Depends(get_jobs_collection)):
+    """
+    Solicita o cancelamento de um job pendente ou em execução.
+    """
+    job = _buscar_job(job_id, jobs_col)
+    if not job_service.solicitar_cancelamento(job_id, jobs_col):
+        raise HTTPException(status_code=409, detail=f"Job já finalizado com status '{job['status']}'")
+    logger.info(f"Cancelamento solicitado para job {job_id}")
+    return {"message": "Cancelamento solicitado", "job_id": job_id}
+
+@router.get("/jobs/{job_id}/resultado")
+def resultado_job(
+    job_id: str,
+    jobs_col=Depends(get_jobs_collection),
+    dados_sint_col=Depends(get_dados_sinteticos_collection)
+):
+    """
+    Retorna o resultado de um job finalizado; no modo sql inclui os metadados da versão do script gravada pelo job
+    (conteúdo em GET /gerar-dados/{nome_schema}/script?versao=...).
+    """
+    job = _buscar_job(job_id, jobs_col)
+    if job['status'] not in job_service.STATUS_FINAIS:
+        raise HTTPException(status_code=409, detail=f"Job ainda não finalizado (status '{job['status']}')")
+    resposta = {
+        "job_id": job_id,
+        "status": job['status'],
+        "progresso": job.get('progresso', {}),
+        "erro": job.get('erro'),
+        "resultado": job.get('resultado'),
+    }
+    if job['status'] == job_service.STATUS_CONCLUIDO and job['parametros']['modo'] == 'sql':
+        script = crud_dados_sinteticos.get_metadados(job['nome_schema'], dados_sint_col, versao=job['resultado']['versao'])
+        if script:
+            script.pop("_id", None)
+        resposta["script"] = script
+    return resposta
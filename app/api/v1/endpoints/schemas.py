@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Body, Form, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, UploadFile, File, Body, Form, Depends, Query
+from pymongo.errors import DuplicateKeyError
+from typing import List, Dict, Any, Optional
 from app.models.domain.schemas import Column
 from app.models.responses import MessageResponse
-from app.db.mongo import tabelas_collection
 from app.db.crud import schemas as crud
+from app.db.crud_async import schemas as crud_async
+from app.db import mongo, mongo_async
 from app.services.schema_service import validar_schema_json
+from app.services.schema_cache import schema_cache
+from app.utils.listagem import responder_listagem, FORMATOS_LISTAGEM, CAMPOS_LISTAGEM
 import json
 import logging
 
@@ -15,7 +19,10 @@ SCHEMA_NAO_ENCONTRADO = "Schema não encontrado"
 
 
 def get_collection():
-    return tabelas_collection
+    return mongo.tabelas_collection()
+
+def get_async_collection(client=Depends(mongo_async.get_async_client)):
+    return mongo_async.tabelas_collection(client)
 
 def _parse_upload_file(file: UploadFile) -> dict:
     try:
@@ -28,7 +35,10 @@ def _validar_e_inserir_schema(conteudo: dict, nome_schema: str, collection):
     conteudo["nome_schema"] = nome_schema
     if not validar_schema_json(conteudo):
         raise HTTPException(status_code=400, detail="JSON inválido")
-    crud.insert_schema(conteudo, collection)
+    try:
+        crud.insert_schema(conteudo, collection)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail=f"Já existe um schema com o nome '{nome_schema}'")
 
 @router.post("/schemas/upload", response_model=MessageResponse)
 def cadastrar_schema_upload(
@@ -58,6 +68,7 @@ def atualizar_schema(
     if not validar_schema_json(conteudo):
         raise HTTPException(status_code=400, detail="JSON inválido")
     atualizado = crud.update_schema(nome_schema, conteudo, collection)
+    schema_cache.invalidar(nome_schema)
     if not atualizado:
         raise HTTPException(status_code=404, detail=SCHEMA_NAO_ENCONTRADO)
     logger.info(f"Schema '{nome_schema}' atualizado com sucesso.")
@@ -69,6 +80,7 @@ def remover_schema(nome_schema: str, collection=Depends(get_collection)):
     Remove um schema pelo nome.
     """
     removido = crud.delete_schema(nome_schema, collection)
+    schema_cache.invalidar(nome_schema)
     if not removido:
         raise HTTPException(status_code=404, detail=SCHEMA_NAO_ENCONTRADO)
     logger.info(f"Schema '{nome_schema}' removido com sucesso.")
@@ -84,25 +96,45 @@ def atualizar_tabela_schema(
     """
     Atualiza as colunas de uma tabela específica dentro de um schema.
     """
-    atualizado = crud.patch_tabela(nome_schema, tabela, [c.dict() for c in colunas], collection)
+    atualizado = crud.patch_tabela(nome_schema, tabela, [c.model_dump() for c in colunas], collection)
+    schema_cache.invalidar(nome_schema)
     if not atualizado:
         raise HTTPException(status_code=404, detail="Tabela ou schema não encontrado")
     logger.info(f"Tabela '{tabela}' do schema '{nome_schema}' atualizada.")
     return {"message": "Tabela atualizada com sucesso"}
 
 @router.get("/schemas/", response_model=List[Dict[str, Any]])
-def listar_schemas(collection=Depends(get_collection)):
+async def listar_schemas(
+    limite: Optional[int] = Query(None, ge=1, le=1000, description="Máximo de schemas por página (sem limite: todos)"),
+    apos: Optional[str] = Query(None, description="Cursor: nome_schema do último item da página anterior"),
+    campos: str = Query('completo', description="completo (documento inteiro) ou resumo (nome_schema e total_tabelas)"),
+    formato: str = Query('json', description="json (lista) ou ndjson (um schema por linha, em streaming)"),
+    collection=Depends(get_async_collection)
+):
+    """
+    Lista os schemas cadastrados em ordem de nome, com paginação por cursor.
+    Quando a página está cheia, o cursor da próxima vem no cabeçalho X-Proximo-Cursor (em JSON).
+    """
+    if campos not in CAMPOS_LISTAGEM:
+        raise HTTPException(status_code=400, detail="campos deve ser 'completo' ou 'resumo'")
+    if formato not in FORMATOS_LISTAGEM:
+        raise HTTPException(status_code=400, detail="formato deve ser 'json' ou 'ndjson'")
+    itens = crud_async.iter_schemas(collection, apos=apos, limite=limite, resumo=campos == 'resumo')
+    return await responder_listagem(itens, formato, "nome_schema", limite)
+
+@router.get("/schemas/cache/estatisticas", response_model=Dict[str, Any])
+def estatisticas_cache_schemas():
     """
-    Lista todos os schemas cadastrados.
+    Retorna os contadores do cache de schemas em memória (hits, misses, invalidações).
     """
-    return crud.get_schemas(collection)
+    return schema_cache.estatisticas()
 
 @router.get("/schemas/{nome_schema}", response_model=Dict[str, Any])
-def obter_schema(nome_schema: str, collection=Depends(get_collection)):
+async def obter_schema(nome_schema: str, collection=Depends(get_async_collection)):
     """
     Obtém um schema específico pelo nome.
     """
-    schema = crud.get_schema_por_nome(nome_schema, collection)
+    schema = await schema_cache.obter_async(nome_schema, collection)
     if not schema:
         raise HTTPException(status_code=404, detail=SCHEMA_NAO_ENCONTRADO)
     return schema
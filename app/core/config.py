@@ -11,4 +11,42 @@ if not MONGO_URL:
 DB_NAME = os.getenv("DB_NAME", "dicionario_dados")
 COLLECTION_SCHEMAS = os.getenv("MONGO_COLLECTION_SCHEMAS", "schemas")
 COLLECTION_CONECTORES = os.getenv("MONGO_COLLECTION_CONECTORES", "conectores")
-COLLECTION_DADOS_SINTETICOS = os.getenv("MONGO_COLLECTION_DADOS_SINTETICOS", "dados_sinteticos")
\ No newline at end of file
+COLLECTION_DADOS_SINTETICOS = os.getenv("MONGO_COLLECTION_DADOS_SINTETICOS", "dados_sinteticos")
+COLLECTION_DADOS_SINTETICOS_BLOCOS = os.getenv("MONGO_COLLECTION_DADOS_SINTETICOS_BLOCOS", "dados_sinteticos_blocos")
+# Tamanho (antes da compressão) de cada bloco dos scripts SQL persistidos
+SQL_BLOCO_BYTES = int(os.getenv("SQL_BLOCO_BYTES", str(1024 * 1024)))
+# Retenção das versões de scripts persistidos por schema (0 dias: sem limite por idade)
+SQL_VERSOES_MAX = int(os.getenv("SQL_VERSOES_MAX", "5"))
+SQL_VERSOES_RETENCAO_DIAS = int(os.getenv("SQL_VERSOES_RETENCAO_DIAS", "0"))
+COLLECTION_JOBS = os.getenv("MONGO_COLLECTION_JOBS", "jobs_geracao")
+COLLECTION_MIGRACOES = os.getenv("MONGO_COLLECTION_MIGRACOES", "migracoes")
+# Cria os índices únicos (e aplica migrações pendentes) em segundo plano na inicialização
+MONGO_CRIAR_INDICES = os.getenv("MONGO_CRIAR_INDICES", "true").lower() in ("1", "true", "sim")
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+# Segundos que o encerramento da aplicação espera os jobs em execução registrarem a interrupção
+JOBS_ENCERRAMENTO_TIMEOUT = float(os.getenv("JOBS_ENCERRAMENTO_TIMEOUT", "10"))
+
+# Pools de conexões PostgreSQL por conector
+POOL_MIN_CONEXOES = int(os.getenv("POOL_MIN_CONEXOES", "1"))
+POOL_MAX_CONEXOES = int(os.getenv("POOL_MAX_CONEXOES", "10"))
+POOL_TEMPO_OCIOSO = float(os.getenv("POOL_TEMPO_OCIOSO", "300"))
+POOL_INTERVALO_HEALTHCHECK = float(os.getenv("POOL_INTERVALO_HEALTHCHECK", "30"))
+POOL_TIMEOUT = float(os.getenv("POOL_TIMEOUT", "30"))
+# Carga paralela: conexões simultâneas por conector (limitadas também pelo máximo do pool) e tamanho a partir do
+# qual uma tabela tem índices e triggers removidos/recriados em volta da carga (quando pedido)
+CARGA_PARALELA_MAX_CONEXOES = int(os.getenv("CARGA_PARALELA_MAX_CONEXOES", "4"))
+CARGA_RECRIAR_INDICES_MIN_LINHAS = int(os.getenv("CARGA_RECRIAR_INDICES_MIN_LINHAS", "100000"))
+
+# Cache de schemas em memória (LRU)
+SCHEMA_CACHE_MAX_ITENS = int(os.getenv("SCHEMA_CACHE_MAX_ITENS", "64"))
+
+# Cache dos scripts gerados com seed no modo sql: memória (LRU limitado em bytes) e, opcionalmente, disco
+CACHE_RESULTADOS_MAX_BYTES = int(os.getenv("CACHE_RESULTADOS_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_RESULTADOS_DIR = os.getenv("CACHE_RESULTADOS_DIR", "")
+CACHE_RESULTADOS_DISCO_MAX_BYTES = int(os.getenv("CACHE_RESULTADOS_DISCO_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Exportação para arquivos (CSV, NDJSON, Parquet): diretório local onde os pacotes podem ser gravados (vazio: apenas
+# download), escritores simultâneos e lotes aguardando gravação por tabela
+EXPORTACAO_DIR = os.getenv("EXPORTACAO_DIR", "")
+EXPORTACAO_MAX_ESCRITORES = int(os.getenv("EXPORTACAO_MAX_ESCRITORES", "4"))
+EXPORTACAO_LOTES_NA_FILA = int(os.getenv("EXPORTACAO_LOTES_NA_FILA", "2"))
\ No newline at end of file
@@ -1,23 +1,44 @@
 import os
 import logging
 import logging.handlers
+import threading
 from pathlib import Path
 
-log_dir = Path("/app/logs")
-log_dir.mkdir(exist_ok=True, mode=0o777)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.handlers.RotatingFileHandler(
-            filename=log_dir / "app.log",
-            maxBytes=5 * 1024 * 1024,
-            backupCount=3,
-            encoding='utf-8'
-        )
-    ]
-)
+log_dir = Path(os.getenv("LOG_DIR", "/app/logs"))
 
 logger = logging.getLogger("webapi-dicionario")
+
+_configurado = False
+_lock = threading.Lock()
+
+def configurar_logging():
+    """
+    Configura os handlers (console e arquivo rotativo) uma única vez, no startup da aplicação.
+    Importar este módulo não cria diretórios nem arquivos; sem permissão para o diretório de logs, usa só o console.
+    """
+    global _configurado
+    with _lock:
+        if _configurado:
+            return
+        handlers = [logging.StreamHandler()]
+        erro_arquivo = None
+        try:
+            log_dir.mkdir(exist_ok=True, mode=0o777)
+            handlers.append(
+                logging.handlers.RotatingFileHandler(
+                    filename=log_dir / "app.log",
+                    maxBytes=5 * 1024 * 1024,
+                    backupCount=3,
+                    encoding='utf-8'
+                )
+            )
+        except OSError as e:
+            erro_arquivo = e
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            handlers=handlers
+        )
+        _configurado = True
+    if erro_arquivo:
+        logger.warning(f"Log em arquivo desativado ({log_dir}): {erro_arquivo}")
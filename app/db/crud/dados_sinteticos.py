@@ -1,18 +1,237 @@
-from datetime import datetime
-import psycopg2
+"""
+Scripts SQL gerados, persistidos em blocos compactados e versionados por schema.
+
+Cada geração persistida vira uma versão (identificada pelo script_id) com os parâmetros que a definem — seed,
+rows_per_table, versão do schema e formato —; gravar de novo a mesma chave com seed definida e o mesmo conteúdo
+(sha256) substitui a versão anterior, que é redundante. A retenção mantém as SQL_VERSOES_MAX versões mais recentes de cada schema e
+descarta as mais antigas que SQL_VERSOES_RETENCAO_DIAS (0 desliga o limite por idade); versões fixadas nunca são
+descartadas. As leituras sem versão explícita usam a mais recente.
+
+O documento de cada versão guarda só os metadados do script (bytes, linhas por tabela, sha256, ...); o conteúdo
+fica na coleção de blocos, em pedaços de SQL_BLOCO_BYTES (medidos antes da compressão), cada um um membro gzip
+independente. Assim o script não esbarra no limite de 16 MB do BSON, é gravado à medida que é gerado e pode ser lido
+por faixa de bytes descompactando apenas os blocos envolvidos; a concatenação dos blocos já é um arquivo .gz válido.
+Documentos antigos, com o script inteiro no campo `sql`, continuam sendo lidos.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+import gzip
+import hashlib
+import uuid
+
+from pymongo import DESCENDING
+
+from app.core.config import COLLECTION_DADOS_SINTETICOS_BLOCOS, SQL_BLOCO_BYTES, SQL_VERSOES_MAX, SQL_VERSOES_RETENCAO_DIAS
+
+ARMAZENAMENTO_BLOCOS = "blocos_gzip"
+CAMPOS_CHAVE_VERSAO = ("seed", "rows_per_table", "versao_schema", "formato_sql", "linhas_por_insert")
+ORDEM_RECENTES = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def blocos_collection(collection):
+    return collection.database[COLLECTION_DADOS_SINTETICOS_BLOCOS]
+
+
+class GravadorScript:
+    """
+    Grava um script em blocos à medida que ele é produzido; a versão só é publicada em finalizar(),
+    então leitores continuam vendo a versão anterior até a gravação terminar.
+    """
+    def __init__(self, schema_name, collection, tamanho_bloco: Optional[int] = None):
+        self.schema_name = schema_name
+        self.collection = collection
+        self.blocos = blocos_collection(collection)
+        self.tamanho_bloco = tamanho_bloco or SQL_BLOCO_BYTES
+        self.script_id = uuid.uuid4().hex
+        self.linhas: Dict[str, int] = {}
+        self._buffer = bytearray()
+        self._sha256 = hashlib.sha256()
+        self._total_blocos = 0
+        self._bytes = 0
+        self._bytes_comprimidos = 0
+
+    def contar_linhas(self, tabela: str, linhas: int):
+        self.linhas[tabela] = self.linhas.get(tabela, 0) + linhas
+
+    def escrever(self, texto: str):
+        dados = texto.encode('utf-8')
+        self._sha256.update(dados)
+        self._bytes += len(dados)
+        self._buffer += dados
+        while len(self._buffer) >= self.tamanho_bloco:
+            self._gravar_bloco(bytes(self._buffer[:self.tamanho_bloco]))
+            del self._buffer[:self.tamanho_bloco]
+
+    def _gravar_bloco(self, dados: bytes):
+        # mtime=0: o mesmo conteúdo gera sempre os mesmos bytes compactados
+        comprimido = gzip.compress(dados, compresslevel=6, mtime=0)
+        self.blocos.insert_one({"script_id": self.script_id, "n": self._total_blocos, "tamanho": len(dados), "dados": comprimido})
+        self._total_blocos += 1
+        self._bytes_comprimidos += len(comprimido)
+
+    def finalizar(self, **extra) -> Dict:
+        """
+        Grava o último bloco e publica a nova versão, aplicando em seguida a política de retenção.
+        `extra` traz os parâmetros da geração (seed, rows_per_table, versao_schema, formato_sql, ...).
+        """
+        if self._buffer:
+            self._gravar_bloco(bytes(self._buffer))
+            self._buffer.clear()
+        metadados = {
+            "nome_schema": self.schema_name,
+            "script_id": self.script_id,
+            "armazenamento": ARMAZENAMENTO_BLOCOS,
+            "bytes": self._bytes,
+            "bytes_comprimidos": self._bytes_comprimidos,
+            "blocos": self._total_blocos,
+            "tamanho_bloco": self.tamanho_bloco,
+            "sha256": self._sha256.hexdigest(),
+            "linhas": dict(self.linhas),
+            "fixada": False,
+            "created_at": datetime.utcnow(),
+            **{campo: None for campo in CAMPOS_CHAVE_VERSAO},
+            **extra
+        }
+        self.collection.insert_one(dict(metadados))
+        substituidas = []
+        if metadados["seed"] is not None:
+            # Mesma chave e mesma seed geram o mesmo conteúdo, exceto se as PKs iniciais mudaram (o sha256 confirma)
+            substituidas = self.collection.find({
+                "nome_schema": self.schema_name, "script_id": {"$ne": self.script_id}, "fixada": {"$ne": True},
+                "sha256": metadados["sha256"], **{campo: metadados[campo] for campo in CAMPOS_CHAVE_VERSAO}
+            })
+        _remover_versoes(self.collection, list(substituidas) + selecionar_expiradas(self.schema_name, self.collection))
+        return metadados
+
+    def descartar(self):
+        self.blocos.delete_many({"script_id": self.script_id})
+
+
+def gravar_script(schema_name, partes: Iterable[str], collection, linhas: Optional[Dict[str, int]] = None, **extra) -> Dict:
+    """
+    Persiste o script a partir de um iterável de trechos. `linhas` (tabela -> linhas) é lido só depois de consumir
+    `partes`, então pode ser preenchido durante a geração.
+    """
+    gravador = GravadorScript(schema_name, collection)
+    try:
+        for parte in partes:
+            gravador.escrever(parte)
+    except BaseException:
+        gravador.descartar()
+        raise
+    for tabela, total in (linhas or {}).items():
+        gravador.contar_linhas(tabela, total)
+    return gravador.finalizar(**extra)
+
 
 def upsert_sql(schema_name, sql, collection, **extra):
-    doc = {
-        "nome_schema": schema_name,
-        "sql": sql,
-        "created_at": datetime.utcnow(),
-        **extra
-    }
-    collection.update_one(
-        {"nome_schema": schema_name},
-        {"$set": doc},
-        upsert=True
-    )
-
-def get_sql(schema_name, collection):
-    return collection.find_one({"nome_schema": schema_name}) 
\ No newline at end of file
+    return gravar_script(schema_name, [sql], collection, **extra)
+
+
+def filtro_versao(schema_name, versao: Optional[str] = None) -> Dict:
+    filtro = {"nome_schema": schema_name}
+    if versao:
+        filtro["script_id"] = versao
+    return filtro
+
+
+def get_metadados(schema_name, collection, versao: Optional[str] = None) -> Optional[Dict]:
+    """
+    Metadados da versão informada (script_id) ou, sem versão, da mais recente do schema. O _id é mantido: é por ele
+    que iter_script lê o conteúdo de um documento legado (campo sql).
+    """
+    return collection.find_one(filtro_versao(schema_name, versao), {"sql": 0}, sort=ORDEM_RECENTES)
+
+
+def listar_versoes(schema_name, collection) -> List[Dict]:
+    return list(collection.find({"nome_schema": schema_name}, {"_id": 0, "sql": 0}).sort(ORDEM_RECENTES))
+
+
+def fixar_versao(schema_name, versao: str, fixada: bool, collection) -> bool:
+    result = collection.update_one(filtro_versao(schema_name, versao), {"$set": {"fixada": fixada}})
+    return result.matched_count > 0
+
+
+def _remover_versoes(collection, docs: List[Dict]):
+    for doc in docs:
+        collection.delete_one({"_id": doc["_id"]})
+        if doc.get("script_id"):
+            blocos_collection(collection).delete_many({"script_id": doc["script_id"]})
+
+
+def remover_versao(schema_name, versao: str, collection) -> bool:
+    doc = collection.find_one(filtro_versao(schema_name, versao), {"_id": 1, "script_id": 1})
+    if not doc:
+        return False
+    _remover_versoes(collection, [doc])
+    return True
+
+
+def selecionar_expiradas(
+    schema_name, collection, max_versoes: Optional[int] = None, retencao_dias: Optional[int] = None
+) -> List[Dict]:
+    """
+    Versões não fixadas do schema fora da política de retenção: além das `max_versoes` mais recentes
+    ou criadas há mais de `retencao_dias` dias (0 desliga o limite por idade). A mais recente nunca expira.
+    """
+    max_versoes = SQL_VERSOES_MAX if max_versoes is None else max_versoes
+    retencao_dias = SQL_VERSOES_RETENCAO_DIAS if retencao_dias is None else retencao_dias
+    limite_idade = datetime.utcnow() - timedelta(days=retencao_dias) if retencao_dias > 0 else None
+    versoes = collection.find({"nome_schema": schema_name}, {"_id": 1, "script_id": 1, "fixada": 1, "created_at": 1}).sort(ORDEM_RECENTES)
+    expiradas = []
+    for posicao, doc in enumerate(versoes):
+        if posicao == 0 or doc.get("fixada"):
+            continue
+        muito_antiga = limite_idade is not None and doc.get("created_at") and doc["created_at"] < limite_idade
+        if posicao >= max(max_versoes, 1) or muito_antiga:
+            expiradas.append(doc)
+    return expiradas
+
+
+def aplicar_retencao(schema_name, collection, **politica) -> int:
+    expiradas = selecionar_expiradas(schema_name, collection, **politica)
+    _remover_versoes(collection, expiradas)
+    return len(expiradas)
+
+
+def faixa_blocos(metadados: Dict, inicio: int, fim: int):
+    return inicio // metadados["tamanho_bloco"], fim // metadados["tamanho_bloco"]
+
+
+def recortar_bloco(metadados: Dict, bloco: Dict, inicio: int, fim: int) -> bytes:
+    base = bloco["n"] * metadados["tamanho_bloco"]
+    return gzip.decompress(bloco["dados"])[max(inicio - base, 0):fim - base + 1]
+
+
+def iter_script(metadados: Dict, collection, inicio: int = 0, fim: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Bytes do script (descompactados) de `inicio` a `fim`, inclusive, lendo apenas os blocos dessa faixa.
+    """
+    if metadados.get("armazenamento") != ARMAZENAMENTO_BLOCOS:
+        doc = collection.find_one({"_id": metadados["_id"]}, {"sql": 1})
+        dados = (doc or {}).get("sql", "").encode('utf-8')
+        yield dados[inicio:None if fim is None else fim + 1]
+        return
+    fim = metadados["bytes"] - 1 if fim is None else fim
+    primeiro, ultimo = faixa_blocos(metadados, inicio, fim)
+    cursor = blocos_collection(collection).find(
+        {"script_id": metadados["script_id"], "n": {"$gte": primeiro, "$lte": ultimo}}
+    ).sort("n", 1)
+    for bloco in cursor:
+        yield recortar_bloco(metadados, bloco, inicio, fim)
+
+
+def iter_script_gzip(metadados: Dict, collection) -> Iterator[bytes]:
+    """
+    O script inteiro compactado (gzip), repassando os blocos como estão gravados, sem recompressão.
+    """
+    cursor = blocos_collection(collection).find({"script_id": metadados["script_id"]}).sort("n", 1)
+    for bloco in cursor:
+        yield bloco["dados"]
+
+
+def get_sql(schema_name, collection, versao: Optional[str] = None):
+    doc = collection.find_one(filtro_versao(schema_name, versao), sort=ORDEM_RECENTES)
+    if doc and doc.get("armazenamento") == ARMAZENAMENTO_BLOCOS:
+        doc["sql"] = b"".join(iter_script(doc, collection)).decode('utf-8')
+    return doc
\ No newline at end of file
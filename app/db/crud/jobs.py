@@ -0,0 +1,31 @@
+from pymongo.collection import Collection
+from typing import Dict, Optional
+
+def insert_job(job: Dict, collection: Collection) -> str:
+    collection.insert_one(job)
+    return job["job_id"]
+
+def get_job(job_id: str, collection: Collection) -> Optional[Dict]:
+    job = collection.find_one({"job_id": job_id})
+    if job:
+        job.pop("_id", None)
+    return job
+
+def update_job(job_id: str, campos: Dict, collection: Collection) -> bool:
+    result = collection.update_one({"job_id": job_id}, {"$set": campos})
+    return result.matched_count > 0
+
+def incrementar_progresso(job_id: str, tabela: str, campo: str, quantidade: int, collection: Collection):
+    collection.update_one({"job_id": job_id}, {"$inc": {f"progresso.{tabela}.{campo}": quantidade}})
+
+def solicitar_cancelamento(job_id: str, collection: Collection) -> bool:
+    # Só jobs ainda não finalizados podem ser cancelados
+    result = collection.update_one(
+        {"job_id": job_id, "status": {"$in": ["pendente", "executando"]}},
+        {"$set": {"cancelamento_solicitado": True}}
+    )
+    return result.matched_count > 0
+
+def cancelamento_solicitado(job_id: str, collection: Collection) -> bool:
+    job = collection.find_one({"job_id": job_id}, {"cancelamento_solicitado": 1})
+    return bool(job and job.get("cancelamento_solicitado"))
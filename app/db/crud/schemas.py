@@ -1,24 +1,43 @@
 from pymongo.collection import Collection
 from typing import Dict, List, Optional
 
+# Versão do documento, incrementada a cada alteração; permite validar caches em todas as réplicas
+CAMPO_VERSAO = "_versao"
+# Campos do documento que não são tabelas
+CAMPOS_METADADOS = ("_id", "nome_schema", CAMPO_VERSAO)
+
+def _remover_metadados(schema: Dict) -> Dict:
+    schema.pop("_id", None)
+    schema.pop(CAMPO_VERSAO, None)
+    return schema
+
 def insert_schema(schema_doc: Dict, collection: Collection) -> str:
+    schema_doc[CAMPO_VERSAO] = 1
     result = collection.insert_one(schema_doc)
     return str(result.inserted_id)
 
 def get_schemas(collection: Collection) -> List[Dict]:
     schemas = list(collection.find({}))
     for schema in schemas:
-        schema.pop("_id", None)
+        _remover_metadados(schema)
     return schemas
 
 def get_schema_por_nome(nome_schema: str, collection: Collection) -> Optional[Dict]:
     schema = collection.find_one({"nome_schema": nome_schema})
     if schema:
-        schema.pop("_id", None)
+        _remover_metadados(schema)
     return schema
 
+def get_versao_schema(nome_schema: str, collection: Collection) -> Optional[int]:
+    # Lê apenas o campo de versão; documentos anteriores ao versionamento valem 0
+    schema = collection.find_one({"nome_schema": nome_schema}, {CAMPO_VERSAO: 1, "_id": 0})
+    if schema is None:
+        return None
+    return schema.get(CAMPO_VERSAO, 0)
+
 def update_schema(nome_schema: str, novos_dados: Dict, collection: Collection) -> bool:
-    result = collection.update_one({"nome_schema": nome_schema}, {"$set": novos_dados})
+    novos_dados = {k: v for k, v in novos_dados.items() if k != CAMPO_VERSAO}
+    result = collection.update_one({"nome_schema": nome_schema}, {"$set": novos_dados, "$inc": {CAMPO_VERSAO: 1}})
     return result.modified_count > 0
 
 def delete_schema(nome_schema: str, collection: Collection) -> bool:
@@ -27,6 +46,6 @@ def delete_schema(nome_schema: str, collection: Collection) -> bool:
 
 def patch_tabela(nome_schema: str, tabela: str, colunas: List[Dict], collection: Collection) -> bool:
     filtro = {"nome_schema": nome_schema}
-    update = {"$set": {f"tabelas.{tabela}": colunas}}
+    update = {"$set": {f"tabelas.{tabela}": colunas}, "$inc": {CAMPO_VERSAO: 1}}
     result = collection.update_one(filtro, update)
     return result.modified_count > 0
@@ -0,0 +1,35 @@
+from pymongo.asynchronous.collection import AsyncCollection
+from typing import AsyncIterator, Dict, List, Optional
+
+# A senha nunca sai do MongoDB nas listagens
+PROJECAO_COMPLETA = {"_id": 0, "senha": 0}
+PROJECAO_RESUMO = {"_id": 0, "nome": 1, "host": 1, "porta": 1, "banco": 1}
+
+async def insert_conector(conector: Dict, collection: AsyncCollection) -> str:
+    result = await collection.insert_one(conector)
+    return str(result.inserted_id)
+
+async def get_conectores(collection: AsyncCollection) -> List[Dict]:
+    return await collection.find({}).to_list()
+
+async def iter_conectores(collection: AsyncCollection, apos: Optional[str] = None, limite: Optional[int] = None, resumo: bool = False) -> AsyncIterator[Dict]:
+    """
+    Percorre os conectores em ordem de nome, a partir do cursor `apos` (exclusivo), sem materializar a lista.
+    """
+    filtro = {"nome": {"$gt": apos}} if apos is not None else {}
+    cursor = collection.find(filtro, PROJECAO_RESUMO if resumo else PROJECAO_COMPLETA).sort("nome", 1)
+    if limite:
+        cursor = cursor.limit(limite)
+    async for conector in cursor:
+        yield conector
+
+async def get_conector_por_nome(nome: str, collection: AsyncCollection) -> Optional[Dict]:
+    return await collection.find_one({"nome": nome})
+
+async def update_conector(nome: str, novos_dados: Dict, collection: AsyncCollection) -> bool:
+    result = await collection.update_one({"nome": nome}, {"$set": novos_dados})
+    return result.modified_count > 0
+
+async def delete_conector(nome: str, collection: AsyncCollection) -> bool:
+    result = await collection.delete_one({"nome": nome})
+    return result.deleted_count > 0
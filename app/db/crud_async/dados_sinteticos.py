@@ -0,0 +1,44 @@
+"""
+Leitura assíncrona dos scripts persistidos em blocos (ver app.db.crud.dados_sinteticos, que faz a gravação).
+"""
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.db.crud.dados_sinteticos import (
+    ARMAZENAMENTO_BLOCOS, ORDEM_RECENTES, blocos_collection, faixa_blocos, filtro_versao, recortar_bloco
+)
+
+
+async def get_metadados(schema_name, collection, versao: Optional[str] = None) -> Optional[Dict]:
+    return await collection.find_one(filtro_versao(schema_name, versao), {"sql": 0}, sort=ORDEM_RECENTES)
+
+
+async def listar_versoes(schema_name, collection) -> List[Dict]:
+    return await collection.find({"nome_schema": schema_name}, {"_id": 0, "sql": 0}).sort(ORDEM_RECENTES).to_list()
+
+
+async def iter_script(metadados: Dict, collection, inicio: int = 0, fim: Optional[int] = None) -> AsyncIterator[bytes]:
+    if metadados.get("armazenamento") != ARMAZENAMENTO_BLOCOS:
+        doc = await collection.find_one({"_id": metadados["_id"]}, {"sql": 1})
+        dados = (doc or {}).get("sql", "").encode('utf-8')
+        yield dados[inicio:None if fim is None else fim + 1]
+        return
+    fim = metadados["bytes"] - 1 if fim is None else fim
+    primeiro, ultimo = faixa_blocos(metadados, inicio, fim)
+    cursor = blocos_collection(collection).find(
+        {"script_id": metadados["script_id"], "n": {"$gte": primeiro, "$lte": ultimo}}
+    ).sort("n", 1)
+    async for bloco in cursor:
+        yield recortar_bloco(metadados, bloco, inicio, fim)
+
+
+async def iter_script_gzip(metadados: Dict, collection) -> AsyncIterator[bytes]:
+    cursor = blocos_collection(collection).find({"script_id": metadados["script_id"]}).sort("n", 1)
+    async for bloco in cursor:
+        yield bloco["dados"]
+
+
+async def get_sql(schema_name, collection, versao: Optional[str] = None):
+    doc = await collection.find_one(filtro_versao(schema_name, versao), sort=ORDEM_RECENTES)
+    if doc and doc.get("armazenamento") == ARMAZENAMENTO_BLOCOS:
+        doc["sql"] = b"".join([parte async for parte in iter_script(doc, collection)]).decode('utf-8')
+    return doc
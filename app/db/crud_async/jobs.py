@@ -0,0 +1,31 @@
+from pymongo.asynchronous.collection import AsyncCollection
+from typing import Dict, Optional
+
+async def insert_job(job: Dict, collection: AsyncCollection) -> str:
+    await collection.insert_one(job)
+    return job["job_id"]
+
+async def get_job(job_id: str, collection: AsyncCollection) -> Optional[Dict]:
+    job = await collection.find_one({"job_id": job_id})
+    if job:
+        job.pop("_id", None)
+    return job
+
+async def update_job(job_id: str, campos: Dict, collection: AsyncCollection) -> bool:
+    result = await collection.update_one({"job_id": job_id}, {"$set": campos})
+    return result.matched_count > 0
+
+async def incrementar_progresso(job_id: str, tabela: str, campo: str, quantidade: int, collection: AsyncCollection):
+    await collection.update_one({"job_id": job_id}, {"$inc": {f"progresso.{tabela}.{campo}": quantidade}})
+
+async def solicitar_cancelamento(job_id: str, collection: AsyncCollection) -> bool:
+    # Só jobs ainda não finalizados podem ser cancelados
+    result = await collection.update_one(
+        {"job_id": job_id, "status": {"$in": ["pendente", "executando"]}},
+        {"$set": {"cancelamento_solicitado": True}}
+    )
+    return result.matched_count > 0
+
+async def cancelamento_solicitado(job_id: str, collection: AsyncCollection) -> bool:
+    job = await collection.find_one({"job_id": job_id}, {"cancelamento_solicitado": 1})
+    return bool(job and job.get("cancelamento_solicitado"))
@@ -0,0 +1,72 @@
+from pymongo.asynchronous.collection import AsyncCollection
+from typing import AsyncIterator, Dict, List, Optional
+from app.db.crud.schemas import CAMPO_VERSAO, CAMPOS_METADADOS, _remover_metadados
+
+async def insert_schema(schema_doc: Dict, collection: AsyncCollection) -> str:
+    schema_doc[CAMPO_VERSAO] = 1
+    result = await collection.insert_one(schema_doc)
+    return str(result.inserted_id)
+
+async def get_schemas(collection: AsyncCollection) -> List[Dict]:
+    schemas = await collection.find({}).to_list()
+    for schema in schemas:
+        _remover_metadados(schema)
+    return schemas
+
+def _pipeline_resumo(filtro: Dict, limite: Optional[int]) -> List[Dict]:
+    # Conta as tabelas no próprio MongoDB: apenas nome e contagem trafegam, não as colunas
+    pipeline = [{"$match": filtro}, {"$sort": {"nome_schema": 1}}]
+    if limite:
+        pipeline.append({"$limit": limite})
+    pipeline.append({"$project": {
+        "_id": 0,
+        "nome_schema": 1,
+        "total_tabelas": {"$size": {"$filter": {
+            "input": {"$objectToArray": "$$ROOT"},
+            "as": "campo",
+            "cond": {"$and": [{"$ne": ["$$campo.k", campo]} for campo in CAMPOS_METADADOS]}
+        }}}
+    }})
+    return pipeline
+
+async def iter_schemas(collection: AsyncCollection, apos: Optional[str] = None, limite: Optional[int] = None, resumo: bool = False) -> AsyncIterator[Dict]:
+    """
+    Percorre os schemas em ordem de nome_schema, a partir do cursor `apos` (exclusivo), sem materializar a lista.
+    Com resumo, devolve apenas nome_schema e total_tabelas.
+    """
+    filtro = {"nome_schema": {"$gt": apos}} if apos is not None else {}
+    if resumo:
+        cursor = await collection.aggregate(_pipeline_resumo(filtro, limite))
+    else:
+        cursor = collection.find(filtro).sort("nome_schema", 1)
+        if limite:
+            cursor = cursor.limit(limite)
+    async for schema in cursor:
+        yield _remover_metadados(schema)
+
+async def get_schema_por_nome(nome_schema: str, collection: AsyncCollection) -> Optional[Dict]:
+    schema = await collection.find_one({"nome_schema": nome_schema})
+    if schema:
+        _remover_metadados(schema)
+    return schema
+
+async def get_versao_schema(nome_schema: str, collection: AsyncCollection) -> Optional[int]:
+    schema = await collection.find_one({"nome_schema": nome_schema}, {CAMPO_VERSAO: 1, "_id": 0})
+    if schema is None:
+        return None
+    return schema.get(CAMPO_VERSAO, 0)
+
+async def update_schema(nome_schema: str, novos_dados: Dict, collection: AsyncCollection) -> bool:
+    novos_dados = {k: v for k, v in novos_dados.items() if k != CAMPO_VERSAO}
+    result = await collection.update_one({"nome_schema": nome_schema}, {"$set": novos_dados, "$inc": {CAMPO_VERSAO: 1}})
+    return result.modified_count > 0
+
+async def delete_schema(nome_schema: str, collection: AsyncCollection) -> bool:
+    result = await collection.delete_one({"nome_schema": nome_schema})
+    return result.deleted_count > 0
+
+async def patch_tabela(nome_schema: str, tabela: str, colunas: List[Dict], collection: AsyncCollection) -> bool:
+    filtro = {"nome_schema": nome_schema}
+    update = {"$set": {f"tabelas.{tabela}": colunas}, "$inc": {CAMPO_VERSAO: 1}}
+    result = await collection.update_one(filtro, update)
+    return result.modified_count > 0
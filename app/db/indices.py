@@ -0,0 +1,205 @@
+"""
+Índices do MongoDB e migrações aplicadas na inicialização.
+
+Todas as buscas do CRUD filtram por uma chave de negócio (nome do conector, nome_schema, job_id); sem índice cada
+uma delas é um collection scan, e a unicidade dos nomes dependia de um "consulta e depois insere" sujeito a corrida.
+INDICES declara um índice (em geral único) por chave; garantir_indices() os cria de forma idempotente (create_index não faz
+nada se o índice já existe) e aplicar_migracoes() executa uma única vez, registrando a versão na coleção de
+migrações, os ajustes de dados necessários para que os índices únicos possam ser criados.
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.core.config import (
+    COLLECTION_SCHEMAS, COLLECTION_CONECTORES, COLLECTION_DADOS_SINTETICOS, COLLECTION_DADOS_SINTETICOS_BLOCOS,
+    COLLECTION_JOBS, COLLECTION_MIGRACOES
+)
+from app.core.logging import logger
+from app.db.crud import dados_sinteticos as crud_dados_sinteticos
+
+
+class Indice(NamedTuple):
+    colecao: str
+    campos: Tuple[str, ...]
+    nome: str
+    unico: bool = True
+    esparso: bool = False
+
+
+INDICES: List[Indice] = [
+    Indice(COLLECTION_CONECTORES, ("nome",), "uniq_conectores_nome"),
+    Indice(COLLECTION_SCHEMAS, ("nome_schema",), "uniq_schemas_nome_schema"),
+    # Várias versões de script por schema, lidas da mais recente para a mais antiga
+    Indice(COLLECTION_DADOS_SINTETICOS, ("nome_schema", "created_at"), "idx_dados_sinteticos_nome_schema_created_at", unico=False),
+    Indice(COLLECTION_DADOS_SINTETICOS, ("script_id",), "uniq_dados_sinteticos_script_id", esparso=True),
+    Indice(COLLECTION_DADOS_SINTETICOS_BLOCOS, ("script_id", "n"), "uniq_dados_sinteticos_blocos_script_n"),
+    Indice(COLLECTION_JOBS, ("job_id",), "uniq_jobs_job_id"),
+]
+
+# Consultas executadas a cada requisição; o harness (tests/test_indices.py e benchmarks/bench_indices.py)
+# verifica que todas usam IXSCAN
+CONSULTAS_QUENTES: List[tuple] = [
+    (COLLECTION_CONECTORES, {"nome": "x"}),
+    (COLLECTION_SCHEMAS, {"nome_schema": "x"}),
+    (COLLECTION_SCHEMAS, {"nome_schema": {"$gt": "x"}}),
+    (COLLECTION_DADOS_SINTETICOS, {"nome_schema": "x"}),
+    (COLLECTION_DADOS_SINTETICOS_BLOCOS, {"script_id": "x"}),
+    (COLLECTION_JOBS, {"job_id": "x"}),
+]
+
+
+class MigracaoFalhou(Exception):
+    pass
+
+
+def duplicados(collection, campo: str, filtro: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Valores de `campo` que aparecem em mais de um documento (impedem a criação do índice único).
+    """
+    pipeline = [
+        {"$match": filtro or {}},
+        {"$group": {"_id": f"${campo}", "total": {"$sum": 1}}},
+        {"$match": {"total": {"$gt": 1}}},
+    ]
+    return [d["_id"] for d in collection.aggregate(pipeline)]
+
+
+def garantir_indices(db) -> Dict[str, str]:
+    """
+    Cria os índices de INDICES que ainda não existem. Devolve o estado de cada um ('ok' ou a mensagem de erro);
+    um índice que não pode ser criado (ex.: valores duplicados) não impede a criação dos demais.
+    """
+    estado = {}
+    for indice in INDICES:
+        try:
+            db[indice.colecao].create_index(
+                [(campo, ASCENDING) for campo in indice.campos], name=indice.nome, unique=indice.unico, sparse=indice.esparso
+            )
+            estado[indice.nome] = "ok"
+        except (DuplicateKeyError, OperationFailure) as e:
+            logger.error(f"Não foi possível criar o índice {indice.nome}: {e}")
+            estado[indice.nome] = str(e)
+    return estado
+
+
+def _descartar_sql_duplicado(db):
+    # dados_sinteticos é um cache do último SQL gerado por schema: mantém só o documento mais recente
+    # (só documentos anteriores ao versionamento, que não têm o campo `fixada`)
+    collection = db[COLLECTION_DADOS_SINTETICOS]
+    anteriores = {"fixada": {"$exists": False}}
+    for nome_schema in duplicados(collection, "nome_schema", anteriores):
+        docs = collection.find({"nome_schema": nome_schema, **anteriores}, {"_id": 1}).sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+        ids = [d["_id"] for d in docs][1:]
+        collection.delete_many({"_id": {"$in": ids}})
+        logger.warning(f"{len(ids)} documento(s) duplicado(s) de SQL gerado removido(s) para o schema '{nome_schema}'")
+
+
+def _verificar_nomes_unicos(db):
+    # Conectores e schemas duplicados não são removidos automaticamente: exigem decisão de quem opera a API
+    for colecao, campo in ((COLLECTION_CONECTORES, "nome"), (COLLECTION_SCHEMAS, "nome_schema")):
+        repetidos = duplicados(db[colecao], campo)
+        if repetidos:
+            raise MigracaoFalhou(f"Valores duplicados de '{campo}' em '{colecao}': {repetidos}; remova-os e reinicie a API")
+
+
+def _migracao_nomes_unicos(db):
+    _descartar_sql_duplicado(db)
+    _verificar_nomes_unicos(db)
+
+
+def _remover_indice_unico_por_schema(db):
+    # Com o versionamento, dados_sinteticos guarda várias versões por schema
+    try:
+        db[COLLECTION_DADOS_SINTETICOS].drop_index("uniq_dados_sinteticos_nome_schema")
+    except OperationFailure:
+        pass
+
+
+def _converter_sql_legado(db):
+    # Scripts gravados inteiros no campo `sql` passam para o armazenamento em blocos (com bytes, linhas e sha256)
+    # A versão convertida é gravada ao lado da legada antes de removê-la: o índice único por schema não pode existir
+    _remover_indice_unico_por_schema(db)
+    collection = db[COLLECTION_DADOS_SINTETICOS]
+    for doc in collection.find({"sql": {"$exists": True}}):
+        extra = {k: v for k, v in doc.items() if k not in ("_id", "nome_schema", "sql")}
+        crud_dados_sinteticos.upsert_sql(doc["nome_schema"], doc["sql"], collection, **extra)
+        collection.delete_one({"_id": doc["_id"]})
+        logger.info(f"Script SQL do schema '{doc['nome_schema']}' convertido para blocos")
+
+
+class Migracao(NamedTuple):
+    versao: int
+    descricao: str
+    aplicar: Callable[[Any], None]
+
+
+MIGRACOES: List[Migracao] = [
+    Migracao(1, "remove SQL gerado duplicado e verifica nomes únicos", _migracao_nomes_unicos),
+    Migracao(2, "converte scripts SQL legados para blocos compactados", _converter_sql_legado),
+    Migracao(3, "permite várias versões de script por schema", _remover_indice_unico_por_schema),
+]
+
+
+def versao_atual(db) -> int:
+    doc = db[COLLECTION_MIGRACOES].find_one({"_id": "indices"})
+    return doc["versao"] if doc else 0
+
+
+def aplicar_migracoes(db) -> int:
+    """
+    Executa, em ordem, as migrações com versão maior que a registrada e devolve a versão final.
+    Para na primeira que falhar (MigracaoFalhou), mantendo registrada a última aplicada com sucesso.
+    """
+    versao = versao_atual(db)
+    for migracao in MIGRACOES:
+        if migracao.versao <= versao:
+            continue
+        migracao.aplicar(db)
+        versao = migracao.versao
+        db[COLLECTION_MIGRACOES].update_one(
+            {"_id": "indices"},
+            {"$set": {"versao": versao, "descricao": migracao.descricao, "aplicada_em": datetime.utcnow()}},
+            upsert=True
+        )
+        logger.info(f"Migração {versao} aplicada: {migracao.descricao}")
+    return versao
+
+
+def inicializar(db) -> Optional[Dict[str, str]]:
+    """
+    Aplica as migrações pendentes e garante os índices. Erros são registrados no log sem derrubar a aplicação;
+    se uma migração falhar, os índices que não dependem dela ainda são criados.
+    """
+    try:
+        try:
+            aplicar_migracoes(db)
+        except MigracaoFalhou as e:
+            logger.error(f"Migração do MongoDB pendente: {e}")
+        return garantir_indices(db)
+    except Exception as e:
+        logger.error(f"Falha ao inicializar índices do MongoDB: {e}")
+        return None
+
+
+def estagios_plano(collection, filtro: Dict[str, Any], sort: Optional[list] = None) -> List[str]:
+    """
+    Estágios do plano vencedor de uma consulta (ex.: ['FETCH', 'IXSCAN']), via explain().
+    """
+    cursor = collection.find(filtro)
+    if sort:
+        cursor = cursor.sort(sort)
+    plano = cursor.explain()["queryPlanner"]["winningPlan"]
+    # Servidores com o mecanismo de execução SBE aninham o plano clássico em queryPlan
+    plano = plano.get("queryPlan", plano)
+    estagios = []
+    pendentes = [plano]
+    while pendentes:
+        estagio = pendentes.pop()
+        estagios.append(estagio.get("stage"))
+        if "inputStage" in estagio:
+            pendentes.append(estagio["inputStage"])
+        pendentes.extend(estagio.get("inputStages", []))
+    return estagios
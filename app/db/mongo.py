@@ -1,19 +1,50 @@
+"""
+Acesso síncrono ao MongoDB. O cliente é criado sob demanda na primeira utilização e reaproveitado;
+importar o módulo não abre conexões nem bloqueia (a disponibilidade do banco é verificada em /hc).
+"""
+import threading
+from typing import Optional
+
 from pymongo import MongoClient
-from app.core.config import MONGO_URL, DB_NAME, COLLECTION_SCHEMAS, COLLECTION_CONECTORES, COLLECTION_DADOS_SINTETICOS
+from app.core.config import MONGO_URL, DB_NAME, COLLECTION_SCHEMAS, COLLECTION_CONECTORES, COLLECTION_DADOS_SINTETICOS, COLLECTION_JOBS
 from app.core.logging import logger
 
-try:
-    client = MongoClient(MONGO_URL)
-    # Testa conexão
-    client.admin.command('ping')
-    logger.info("✅ MongoDB connection established successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to connect to MongoDB: {e}")
-    raise
+_client: Optional[MongoClient] = None
+_lock = threading.Lock()
+
+
+def get_client() -> MongoClient:
+    global _client
+    with _lock:
+        if _client is None:
+            _client = MongoClient(MONGO_URL)
+            logger.info("✅ MongoDB client created")
+        return _client
+
+
+def fechar_client():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def tabelas_collection():
+    return get_db()[COLLECTION_SCHEMAS]
+
+
+def conectores_collection():
+    return get_db()[COLLECTION_CONECTORES]
+
 
-db = client[DB_NAME]
+def dados_sinteticos_collection():
+    return get_db()[COLLECTION_DADOS_SINTETICOS]
 
-tabelas_collection = db[COLLECTION_SCHEMAS]
-conectores_collection = db[COLLECTION_CONECTORES]
 
-dados_sinteticos_collection = db[COLLECTION_DADOS_SINTETICOS]
\ No newline at end of file
+def jobs_collection():
+    return get_db()[COLLECTION_JOBS]
\ No newline at end of file
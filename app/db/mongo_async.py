@@ -0,0 +1,39 @@
+"""
+Camada assíncrona de acesso ao MongoDB (PyMongo Async API).
+
+O AsyncMongoClient fica preso ao event loop em que é usado pela primeira vez; por isso é criado no lifespan da
+aplicação (app.state.mongo_async), dentro do loop que atende as requisições, e injetado nos endpoints via Depends.
+Criar o cliente não abre conexões: a primeira operação é que conecta.
+"""
+from fastapi import Request
+from pymongo import AsyncMongoClient
+
+from app.core.config import MONGO_URL, DB_NAME, COLLECTION_SCHEMAS, COLLECTION_CONECTORES, COLLECTION_DADOS_SINTETICOS, COLLECTION_JOBS
+
+
+def criar_async_client() -> AsyncMongoClient:
+    return AsyncMongoClient(MONGO_URL)
+
+
+def get_async_client(request: Request) -> AsyncMongoClient:
+    return request.app.state.mongo_async
+
+
+def get_async_db(client: AsyncMongoClient):
+    return client[DB_NAME]
+
+
+def tabelas_collection(client: AsyncMongoClient):
+    return get_async_db(client)[COLLECTION_SCHEMAS]
+
+
+def conectores_collection(client: AsyncMongoClient):
+    return get_async_db(client)[COLLECTION_CONECTORES]
+
+
+def dados_sinteticos_collection(client: AsyncMongoClient):
+    return get_async_db(client)[COLLECTION_DADOS_SINTETICOS]
+
+
+def jobs_collection(client: AsyncMongoClient):
+    return get_async_db(client)[COLLECTION_JOBS]
@@ -0,0 +1,300 @@
+"""
+Pools de conexões PostgreSQL por conector cadastrado.
+
+Cada conector ganha um pool próprio (mínimo/máximo de conexões), criado sob demanda a partir do documento do
+conector; as conexões são abertas na primeira utilização e devolvidas ao pool após cada uso. Conexões ociosas
+há mais de POOL_TEMPO_OCIOSO segundos são descartadas (preservando o mínimo) e as que ficaram paradas por mais
+de POOL_INTERVALO_HEALTHCHECK segundos passam por um SELECT 1 antes de serem entregues. A abertura de conexões, o
+health check e o rollback na devolução acontecem fora do lock do pool, com a vaga reservada: um host lento não
+bloqueia os demais empréstimos nem as devoluções.
+O pool de um conector é invalidado quando ele é atualizado ou removido.
+"""
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+from app.core.config import (
+    POOL_MIN_CONEXOES, POOL_MAX_CONEXOES, POOL_TEMPO_OCIOSO, POOL_INTERVALO_HEALTHCHECK, POOL_TIMEOUT
+)
+from app.core.logging import logger
+
+CONNECT_TIMEOUT = 5
+
+
+class PoolEsgotado(Exception):
+    pass
+
+
+class PoolConexoes:
+    """
+    Pool de conexões psycopg2 seguro entre threads, com despejo de conexões ociosas e health check na retirada.
+    """
+    def __init__(
+        self,
+        conn_params: dict,
+        minconn: int = POOL_MIN_CONEXOES,
+        maxconn: int = POOL_MAX_CONEXOES,
+        tempo_ocioso: float = POOL_TEMPO_OCIOSO,
+        intervalo_healthcheck: float = POOL_INTERVALO_HEALTHCHECK,
+        timeout: float = POOL_TIMEOUT
+    ):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Tamanho de pool inválido: requer 0 <= minconn <= maxconn e maxconn >= 1")
+        self.conn_params = dict(conn_params)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.tempo_ocioso = tempo_ocioso
+        self.intervalo_healthcheck = intervalo_healthcheck
+        self.timeout = timeout
+        self._ociosas = deque()  # (conexão, instante da devolução), mais recentes à direita
+        self._em_uso = set()
+        self._pendentes = 0  # vagas reservadas por obter() enquanto conecta ou faz o health check, fora do lock
+        self._cond = threading.Condition()
+        self._fechado = False
+        self._stats = {"criadas": 0, "emprestimos": 0, "reutilizadas": 0, "descartadas": 0, "falhas_healthcheck": 0, "esperas": 0}
+
+    def _nova_conexao(self):
+        return psycopg2.connect(connect_timeout=CONNECT_TIMEOUT, **self.conn_params)
+
+    def _descartar(self, conn):
+        self._stats["descartadas"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _despejar_ociosas(self, agora: float):
+        # As mais antigas ficam à esquerda; o mínimo configurado é sempre preservado
+        while len(self._ociosas) + len(self._em_uso) + self._pendentes > self.minconn and self._ociosas:
+            conn, devolvida_em = self._ociosas[0]
+            if agora - devolvida_em < self.tempo_ocioso:
+                break
+            self._ociosas.popleft()
+            self._descartar(conn)
+
+    @staticmethod
+    def _saudavel(conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _emprestar(self, conn, reutilizada: bool):
+        self._em_uso.add(conn)
+        self._stats["emprestimos"] += 1
+        self._stats["reutilizadas" if reutilizada else "criadas"] += 1
+
+    def _reservar(self, prazo: float):
+        """
+        Chamado com o lock. Devolve (conexão, False) quando uma ociosa pode ser entregue direto; senão reserva uma vaga
+        em _pendentes e devolve (ociosa a verificar, True) ou (None, True) para abrir uma nova conexão.
+        """
+        while True:
+            if self._fechado:
+                raise PoolEsgotado("Pool de conexões fechado")
+            agora = time.monotonic()
+            self._despejar_ociosas(agora)
+            while self._ociosas:
+                conn, devolvida_em = self._ociosas.pop()
+                if conn.closed:
+                    self._descartar(conn)
+                    continue
+                if agora - devolvida_em < self.intervalo_healthcheck:
+                    self._emprestar(conn, reutilizada=True)
+                    return conn, False
+                self._pendentes += 1
+                return conn, True
+            if len(self._em_uso) + self._pendentes < self.maxconn:
+                self._pendentes += 1
+                return None, True
+            restante = prazo - agora
+            if restante <= 0:
+                raise PoolEsgotado(f"Nenhuma conexão disponível após {self.timeout}s (máximo {self.maxconn})")
+            self._stats["esperas"] += 1
+            self._cond.wait(restante)
+
+    def obter(self):
+        """
+        Retira uma conexão do pool, aguardando até `timeout` segundos quando todas estão em uso.
+        """
+        prazo = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                conn, pendente = self._reservar(prazo)
+            if not pendente:
+                return conn
+            # Conexão nova ou health check fora do lock, com a vaga já reservada
+            reutilizada = conn is not None
+            try:
+                saudavel = self._saudavel(conn) if reutilizada else True
+                if not reutilizada:
+                    conn = self._nova_conexao()
+            except BaseException:
+                with self._cond:
+                    self._pendentes -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._pendentes -= 1
+                if saudavel and not self._fechado:
+                    self._emprestar(conn, reutilizada)
+                    return conn
+                if not saudavel:
+                    self._stats["falhas_healthcheck"] += 1
+                self._stats["descartadas"] += 1
+                self._cond.notify()
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def devolver(self, conn, descartar: bool = False):
+        """
+        Devolve a conexão ao pool; transações abertas são desfeitas e conexões quebradas são descartadas.
+        """
+        # Rollback fora do lock: a conexão continua contada como em uso até voltar para as ociosas
+        if not descartar and not conn.closed and not self._fechado:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                descartar = True
+        with self._cond:
+            self._em_uso.discard(conn)
+            descartar = descartar or conn.closed or self._fechado
+            if descartar:
+                self._stats["descartadas"] += 1
+            else:
+                self._ociosas.append((conn, time.monotonic()))
+            self._cond.notify()
+        if descartar:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def conexao(self) -> Iterator[Any]:
+        conn = self.obter()
+        try:
+            yield conn
+        except psycopg2.OperationalError:
+            # Conexão possivelmente quebrada: não volta para o pool
+            self.devolver(conn, descartar=True)
+            raise
+        except BaseException:
+            self.devolver(conn)
+            raise
+        else:
+            self.devolver(conn)
+
+    def fechar(self):
+        """
+        Fecha as conexões ociosas; as que estão em uso são fechadas quando devolvidas.
+        """
+        with self._cond:
+            self._fechado = True
+            while self._ociosas:
+                conn, _ = self._ociosas.popleft()
+                self._descartar(conn)
+            self._cond.notify_all()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "em_uso": len(self._em_uso),
+                "ociosas": len(self._ociosas),
+                **self._stats,
+            }
+
+
+_pools: Dict[str, PoolConexoes] = {}
+_pools_lock = threading.Lock()
+
+
+def parametros_conexao(host: str, porta: int, banco: str, usuario: str, senha: str) -> dict:
+    """
+    Monta os parâmetros do psycopg2 a partir dos campos de um conector (senha já descriptografada).
+    """
+    return {'host': host, 'port': porta, 'dbname': banco, 'user': usuario, 'password': senha}
+
+
+def obter_pool(nome_conector: str, conn_params: dict) -> PoolConexoes:
+    """
+    Devolve o pool do conector, criando-o na primeira utilização. Se os parâmetros de conexão mudaram
+    (ex.: conector atualizado por outra réplica), o pool antigo é fechado e substituído.
+    """
+    with _pools_lock:
+        pool = _pools.get(nome_conector)
+        if pool is not None and pool.conn_params == conn_params:
+            return pool
+        novo = PoolConexoes(conn_params)
+        _pools[nome_conector] = novo
+    if pool is not None:
+        logger.info(f"Parâmetros do conector '{nome_conector}' mudaram; pool de conexões recriado")
+        pool.fechar()
+    return novo
+
+
+def registrar_pool(nome_conector: str, pool: PoolConexoes):
+    """
+    Registra um pool já criado (ex.: o do teste de conexão) para o conector, fechando o anterior.
+    """
+    with _pools_lock:
+        anterior = _pools.get(nome_conector)
+        _pools[nome_conector] = pool
+    if anterior is not None and anterior is not pool:
+        anterior.fechar()
+
+
+def invalidar_pool(nome_conector: str) -> bool:
+    """
+    Fecha e remove o pool do conector, se existir.
+    """
+    with _pools_lock:
+        pool = _pools.pop(nome_conector, None)
+    if pool is None:
+        return False
+    pool.fechar()
+    logger.info(f"Pool de conexões do conector '{nome_conector}' invalidado")
+    return True
+
+
+def estatisticas_pools() -> Dict[str, Dict[str, Any]]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {nome: pool.estatisticas() for nome, pool in pools.items()}
+
+
+def fechar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.fechar()
+
+
+@contextmanager
+def conexao(conn_source) -> Iterator[Any]:
+    """
+    Abre uma conexão a partir de um PoolConexoes (emprestada do pool) ou de um dict de parâmetros (conexão avulsa).
+    """
+    if isinstance(conn_source, PoolConexoes):
+        with conn_source.conexao() as conn:
+            yield conn
+        return
+    conn = psycopg2.connect(**conn_source)
+    try:
+        yield conn
+    finally:
+        conn.close()
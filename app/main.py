@@ -1,15 +1,37 @@
+from contextlib import asynccontextmanager
+import threading
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import RedirectResponse
 from app.api.v1.endpoints import connectors, schemas, generate_data
-from app.db.mongo import client
-from app.core.logging import logger
+from app.services import job_service
+from app.db import mongo, postgres_pool, mongo_async, indices
+from app.core.config import MONGO_CRIAR_INDICES
+from app.core.logging import logger, configurar_logging
 
 DICIONARIO_PREFIX = "/dicionariodados"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nada é conectado no startup: os clientes MongoDB só conectam na primeira operação; pools PostgreSQL e a cifra
+    # são criados no primeiro uso
+    configurar_logging()
+    if MONGO_CRIAR_INDICES:
+        # Em segundo plano: um MongoDB indisponível não atrasa a subida da API
+        threading.Thread(target=lambda: indices.inicializar(mongo.get_db()), name="mongo-indices", daemon=True).start()
+    # O cliente assíncrono pertence ao event loop que atende as requisições
+    app.state.mongo_async = mongo_async.criar_async_client()
+    yield
+    # Os jobs registram a interrupção enquanto os clientes ainda estão abertos
+    job_service.encerrar()
+    postgres_pool.fechar_pools()
+    mongo.fechar_client()
+    await app.state.mongo_async.close()
+
 app = FastAPI(
     title="API Dicionário de Dados 🚀",
     description="✨Gerenciamento de conectores, schemas e geração de dados.✨",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 @app.get("/", include_in_schema=False)
@@ -23,7 +45,7 @@ def health():
     """
     try:
         
-        client.admin.command('ping')
+        mongo.get_client().admin.command('ping')
         return {
             "status": "healthy",
             "database": "connected",
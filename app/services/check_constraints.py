@@ -0,0 +1,1126 @@
+"""
+Interpretação dos CHECK constraints das colunas e geração de valores que os satisfazem.
+
+A expressão, no formato de pg_get_constraintdef (ex.: ((status)::text = ANY ((ARRAY['A'::character varying])::text[])),
+(idade >= 18) AND (idade <= 120), ((email)::text ~* '^[a-z]+@'::text)), é lida por um parser recursivo e
+normalizada em forma disjuntiva: cada ramo (conjunção de comparações, IN/ANY, BETWEEN, LIKE, ~, IS NULL, length(),
+round() e case) vira um domínio de valores para o tipo da coluna, com um gerador e uma validação. Fragmentos sem a
+coluna à esquerda (ARRAY[...], IN (...), > 5) continuam aceitos, valendo para a própria coluna.
+
+A compilação acontece uma vez por expressão e tipo (lru_cache; os planos que a usam ficam no cache de schemas). Cada
+ramo é testado com um gerador fixo ao compilar: trechos ignorados (funções desconhecidas, comparações com outras
+colunas, regex com backreference) e ramos sem nenhum valor possível aparecem em `problems`, e check_report os lista
+por coluna antes da geração, em vez de a carga falhar no banco.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from itertools import product
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import math
+import random
+import re
+import string
+
+from app.services import data_generation as dg
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_constants
+    import sre_parse
+
+CHECK_CACHE_SIZE = 4096
+# Ramos da forma disjuntiva (OR de ANDs) aceitos antes de desistir da expressão
+CHECK_MAX_BRANCHES = 64
+# Tentativas de gerar um valor válido: ao compilar (com gerador fixo) e a cada valor; esgotadas em tempo de geração,
+# vale o exemplo encontrado ao compilar
+CHECK_PROBE_ATTEMPTS = 200
+CHECK_SAMPLE_ATTEMPTS = 20
+
+_INT_TYPES = {'integer', 'bigint', 'smallint', 'int', 'int2', 'int4', 'int8'}
+_NUM_TYPES = {'numeric', 'decimal', 'real', 'double precision', 'float4', 'float8'}
+_TEXT_TYPES = {dg.CHARACTER_VARYING, 'character', 'text', 'varchar', 'char', 'bpchar', 'name'}
+_DATE_TYPES = {'date'}
+_TS_TYPES = {dg.TIMESTAMP_WO_TZ, 'timestamp', 'timestamp with time zone', 'timestamptz'}
+_BOOL_TYPES = {'boolean', 'bool'}
+_INT_LIMITS = {'smallint': 2 ** 15 - 1, 'int2': 2 ** 15 - 1, 'bigint': 2 ** 63 - 1, 'int8': 2 ** 63 - 1}
+
+_CMP_OPS = {'=', '<>', '!=', '<', '<=', '>', '>='}
+_INVERSE = {'=': '<>', '<>': '=', '<': '>=', '>=': '<', '>': '<=', '<=': '>'}
+_FLIP = {'=': '=', '<>': '<>', '<': '>', '>': '<', '<=': '>=', '>=': '<='}
+_REGEX_OPS = {'~': (False, False), '~*': (True, False), '!~': (False, True), '!~*': (True, True)}
+_LIKE_OPS = {'~~': (False, False), '~~*': (True, False), '!~~': (False, True), '!~~*': (True, True)}
+_LENGTH_FUNCS = {'length', 'char_length', 'character_length'}
+_TRIM_FUNCS = {'trim', 'btrim', 'ltrim', 'rtrim'}
+_TYPE_WORDS = {'varying', 'precision', 'without', 'with', 'time', 'zone'}
+_POSIX_CLASSES = {
+    'alpha': 'a-zA-Z', 'digit': '0-9', 'alnum': 'a-zA-Z0-9', 'upper': 'A-Z', 'lower': 'a-z', 'space': r'\s',
+    'xdigit': '0-9A-Fa-f', 'punct': r'!-/:-@\[-`{-~', 'word': r'\w',
+}
+# Caracteres candidatos para classes negadas ([^...], \D, \W, ...)
+_POOL = string.ascii_letters + string.digits + ' _-.@'
+
+_TOKEN = re.compile(r"""\s*(?:
+      (?P<str>[Ee]?'(?:[^']|'')*')
+    | (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<qid>"(?:[^"]|"")+")
+    | (?P<id>[A-Za-z_][A-Za-z0-9_$]*)
+    | (?P<op>::|>=|<=|<>|!=|!~~\*|!~~|~~\*|~~|!~\*|!~|~\*|\|\||[-+*/%=<>~(),\[\]])
+    )""", re.X)
+
+
+class CheckSyntaxError(ValueError):
+    pass
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class CompiledCheck(NamedTuple):
+    sample: Optional[Callable[[random.Random], Any]]
+    problems: Tuple[str, ...]
+    # Atalhos para o motor vetorizado: escolha entre valores fixos ou inteiros em um intervalo fechado
+    choices: Optional[List[Any]] = None
+    int_range: Optional[Tuple[int, int]] = None
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if not match or match.end() == pos:
+            raise CheckSyntaxError(f"caractere inesperado na posição {pos}: {expression[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Parser recursivo descendente das expressões de CHECK. Devolve tuplas: predicados ('and', 'or', 'not', 'cmp',
+    'in', 'quant', 'like', 'regex', 'isnull', 'truth') e operandos ('col', 'lit', 'func', 'cast', 'array', 'neg',
+    'now', 'binop'). ('col', None) é a própria coluna, implícita nos fragmentos.
+    """
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def keyword(self, offset: int = 0) -> Optional[str]:
+        kind, value = self.peek(offset)
+        return value.upper() if kind == 'id' else None
+
+    def take(self):
+        token = self.peek()
+        if token[0] is None:
+            raise CheckSyntaxError("fim inesperado da expressão")
+        self.pos += 1
+        return token
+
+    def accept_op(self, op: str) -> bool:
+        if self.peek() == ('op', op):
+            self.pos += 1
+            return True
+        return False
+
+    def accept_kw(self, *words: str) -> bool:
+        if self.keyword() in words:
+            self.pos += 1
+            return True
+        return False
+
+    def expect_op(self, op: str):
+        if not self.accept_op(op):
+            raise CheckSyntaxError(f"esperado '{op}', encontrado {self.peek()[1]!r}")
+
+    def parse(self):
+        if self.keyword() == 'CHECK':
+            self.pos += 1
+        if self._starts_predicate_operator():
+            node = self.predicate_tail(('col', None))
+        else:
+            node = self.parse_or()
+        if self.keyword() == 'NOT' and self.keyword(1) == 'VALID':
+            self.pos += 2
+        if self.peek()[0] is not None:
+            raise CheckSyntaxError(f"trecho não reconhecido: {self.peek()[1]!r}")
+        if node[0] == 'truth' and node[1][0] == 'array':
+            return ('in', ('col', None), node[1][1])
+        return node
+
+    def _starts_predicate_operator(self) -> bool:
+        kind, value = self.peek()
+        if kind == 'op':
+            return value in _CMP_OPS or value in _REGEX_OPS or value in _LIKE_OPS
+        return self.keyword() in ('IN', 'BETWEEN', 'LIKE', 'ILIKE') or (
+            self.keyword() == 'NOT' and self.keyword(1) in ('IN', 'BETWEEN', 'LIKE', 'ILIKE')
+        )
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept_kw('OR'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept_kw('AND'):
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.accept_kw('NOT'):
+            return ('not', self.parse_not())
+        return self.predicate_tail(self.parse_additive())
+
+    def predicate_tail(self, left):
+        kind, value = self.peek()
+        if kind == 'op' and value in _CMP_OPS:
+            self.pos += 1
+            op = '<>' if value == '!=' else value
+            if self.keyword() in ('ANY', 'SOME', 'ALL'):
+                quant = 'all' if self.take()[1].upper() == 'ALL' else 'any'
+                self.expect_op('(')
+                right = self.parse_operand_expr()
+                self.expect_op(')')
+                return ('quant', op, quant, left, right)
+            return ('cmp', op, left, self.parse_additive())
+        if kind == 'op' and value in _REGEX_OPS:
+            self.pos += 1
+            ci, negated = _REGEX_OPS[value]
+            node = ('regex', left, self.parse_additive(), ci)
+            return ('not', node) if negated else node
+        if kind == 'op' and value in _LIKE_OPS:
+            self.pos += 1
+            ci, negated = _LIKE_OPS[value]
+            node = ('like', left, self.parse_additive(), ci)
+            return ('not', node) if negated else node
+        if self.keyword() == 'IS':
+            self.pos += 1
+            negated = self.accept_kw('NOT')
+            word = self.keyword()
+            if word == 'NULL':
+                self.pos += 1
+                node = ('isnull', left)
+            elif word in ('TRUE', 'FALSE'):
+                self.pos += 1
+                node = ('cmp', '=', left, ('lit', word == 'TRUE'))
+            else:
+                raise CheckSyntaxError(f"IS {word} não suportado")
+            return ('not', node) if negated else node
+        negated = False
+        if self.keyword() == 'NOT' and self.keyword(1) in ('IN', 'BETWEEN', 'LIKE', 'ILIKE'):
+            self.pos += 1
+            negated = True
+        word = self.keyword()
+        if word == 'IN':
+            self.pos += 1
+            self.expect_op('(')
+            items = [self.parse_additive()]
+            while self.accept_op(','):
+                items.append(self.parse_additive())
+            self.expect_op(')')
+            node = ('in', left, items)
+        elif word == 'BETWEEN':
+            self.pos += 1
+            symmetric = self.accept_kw('SYMMETRIC')
+            low = self.parse_additive()
+            if not self.accept_kw('AND'):
+                raise CheckSyntaxError("BETWEEN sem AND")
+            high = self.parse_additive()
+            node = ('and', ('cmp', '>=', left, low), ('cmp', '<=', left, high))
+            if symmetric:
+                node = ('or', node, ('and', ('cmp', '>=', left, high), ('cmp', '<=', left, low)))
+        elif word in ('LIKE', 'ILIKE'):
+            self.pos += 1
+            node = ('like', left, self.parse_additive(), word == 'ILIKE')
+        elif negated:
+            raise CheckSyntaxError("NOT inesperado")
+        else:
+            return left if left[0] in _PREDICATES else ('truth', left)
+        return ('not', node) if negated else node
+
+    def parse_operand_expr(self):
+        node = self.parse_or()
+        return node[1] if node[0] == 'truth' else node
+
+    def parse_additive(self):
+        node = self.parse_multiplicative()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('+', '-', '||'):
+            node = ('binop', self.take()[1], node, self.parse_multiplicative())
+        return node
+
+    def parse_multiplicative(self):
+        node = self.parse_unary()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('*', '/', '%'):
+            node = ('binop', self.take()[1], node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.accept_op('-'):
+            return ('neg', self.parse_unary())
+        if self.accept_op('+'):
+            return self.parse_unary()
+        node = self.parse_primary()
+        while True:
+            if self.accept_op('::'):
+                node = ('cast', node, self.parse_type())
+            elif self.accept_op('['):
+                index = self.parse_additive()
+                self.expect_op(']')
+                node = ('func', 'subscript', [node, index])
+            else:
+                return node
+
+    def parse_type(self) -> str:
+        kind, value = self.take()
+        if kind not in ('id', 'qid'):
+            raise CheckSyntaxError(f"tipo esperado após '::', encontrado {value!r}")
+        words = [value.lower()]
+        while self.peek()[0] == 'id' and self.peek()[1].lower() in _TYPE_WORDS:
+            words.append(self.take()[1].lower())
+        if self.accept_op('('):
+            while not self.accept_op(')'):
+                self.take()
+        name = ' '.join(words)
+        while self.peek() == ('op', '[') and self.peek(1) == ('op', ']'):
+            self.pos += 2
+            name += '[]'
+        return name
+
+    def parse_primary(self):
+        kind, value = self.take()
+        if kind == 'op' and value == '(':
+            node = self.parse_operand_expr()
+            self.expect_op(')')
+            return node
+        if kind == 'str':
+            return ('lit', _string_literal(value))
+        if kind == 'num':
+            return ('lit', int(value) if value.isdigit() else Decimal(value))
+        if kind == 'qid':
+            return ('col', value[1:-1].replace('""', '"'))
+        if kind != 'id':
+            raise CheckSyntaxError(f"operando esperado, encontrado {value!r}")
+        word = value.upper()
+        if word in ('TRUE', 'FALSE'):
+            return ('lit', word == 'TRUE')
+        if word == 'NULL':
+            return ('lit', None)
+        if word == 'ARRAY' and self.accept_op('['):
+            items = []
+            if not self.accept_op(']'):
+                items.append(self.parse_additive())
+                while self.accept_op(','):
+                    items.append(self.parse_additive())
+                self.expect_op(']')
+            return ('array', items)
+        if word == 'CURRENT_DATE':
+            return ('now', 'date')
+        if word in ('CURRENT_TIMESTAMP', 'LOCALTIMESTAMP'):
+            return ('now', 'timestamp')
+        if word in ('DATE', 'TIMESTAMP') and self.peek()[0] == 'str':
+            return ('cast', ('lit', _string_literal(self.take()[1])), word.lower())
+        if self.accept_op('('):
+            name = value.lower()
+            if name == 'trim':
+                self.accept_kw('BOTH', 'LEADING', 'TRAILING')
+                self.accept_kw('FROM')
+            args = []
+            if not self.accept_op(')'):
+                args.append(self.parse_operand_expr())
+                while self.accept_op(','):
+                    args.append(self.parse_operand_expr())
+                self.expect_op(')')
+            if name == 'now' and not args:
+                return ('now', 'timestamp')
+            return ('func', name, args)
+        return ('col', value)
+
+
+_PREDICATES = {'and', 'or', 'not', 'cmp', 'in', 'quant', 'like', 'regex', 'isnull', 'truth'}
+
+
+def _string_literal(token: str) -> str:
+    escaped = token[0] in 'Ee'
+    text = token[2:-1] if escaped else token[1:-1]
+    text = text.replace("''", "'")
+    if escaped:
+        text = re.sub(r"\\(.)", lambda m: {'n': '\n', 't': '\t', 'r': '\r'}.get(m.group(1), m.group(1)), text)
+    return text
+
+
+def parse_check(expression: str):
+    """
+    Converte a expressão de um CHECK na árvore do _Parser. Levanta CheckSyntaxError se não reconhecer a sintaxe.
+    """
+    return _Parser(_tokenize(expression)).parse()
+
+
+def _render(node) -> str:
+    # Reescreve um trecho da árvore em SQL, para as mensagens de problemas
+    kind = node[0]
+    if kind == 'col':
+        return node[1] or '<coluna>'
+    if kind == 'lit':
+        v = node[1]
+        if v is None:
+            return 'NULL'
+        if isinstance(v, bool):
+            return 'TRUE' if v else 'FALSE'
+        return "'" + v.replace("'", "''") + "'" if isinstance(v, str) else str(v)
+    if kind == 'func':
+        return f"{node[1]}({', '.join(_render(a) for a in node[2])})"
+    if kind == 'cast':
+        return f"{_render(node[1])}::{node[2]}"
+    if kind == 'array':
+        return f"ARRAY[{', '.join(_render(i) for i in node[1])}]"
+    if kind == 'neg':
+        return '-' + _render(node[1])
+    if kind == 'now':
+        return 'CURRENT_DATE' if node[1] == 'date' else 'now()'
+    if kind in ('binop', 'cmp'):
+        return f"{_render(node[2])} {node[1]} {_render(node[3])}"
+    if kind == 'in':
+        return f"{_render(node[1])} IN ({', '.join(_render(i) for i in node[2])})"
+    if kind == 'quant':
+        return f"{_render(node[3])} {node[1]} {node[2].upper()} ({_render(node[4])})"
+    if kind == 'like':
+        return f"{_render(node[1])} {'ILIKE' if node[3] else 'LIKE'} {_render(node[2])}"
+    if kind == 'regex':
+        return f"{_render(node[1])} {'~*' if node[3] else '~'} {_render(node[2])}"
+    if kind == 'isnull':
+        return f"{_render(node[1])} IS NULL"
+    if kind == 'truth':
+        return _render(node[1])
+    if kind == 'not':
+        return f"NOT ({_render(node[1])})"
+    return f"({_render(node[1])}) {kind.upper()} ({_render(node[2])})"
+
+
+def _identifiers(node, found: set):
+    if node[0] == 'col':
+        if node[1] is not None:
+            found.add(node[1])
+        return
+    for part in node[1:]:
+        if isinstance(part, tuple):
+            _identifiers(part, found)
+        elif isinstance(part, list):
+            for item in part:
+                if isinstance(item, tuple):
+                    _identifiers(item, found)
+
+
+def _dnf(node, negated: bool = False) -> List[List[Tuple[Any, bool]]]:
+    """
+    Forma disjuntiva: lista de ramos, cada um uma lista de (predicado atômico, negado).
+    """
+    kind = node[0]
+    if kind == 'not':
+        return _dnf(node[1], not negated)
+    if kind in ('and', 'or'):
+        left, right = _dnf(node[1], negated), _dnf(node[2], negated)
+        if (kind == 'or') != negated:
+            branches = left + right
+        else:
+            branches = [a + b for a, b in product(left, right)]
+        if len(branches) > CHECK_MAX_BRANCHES:
+            raise _Unsupported(f"expressão com mais de {CHECK_MAX_BRANCHES} alternativas")
+        return branches
+    if kind == 'cmp' and negated:
+        return [[(('cmp', _INVERSE[node[1]], node[2], node[3]), False)]]
+    if kind == 'quant':
+        _, op, quant, left, right = node
+        if op == '=' and quant == 'any':
+            return _dnf(('in', left, right), negated)
+        if op == '<>' and quant == 'all':
+            return _dnf(('not', ('in', left, right)), negated)
+        items = _constant(right)
+        if not isinstance(items, list) or not items:
+            raise _Unsupported(f"{_render(node)}: ANY/ALL exige uma lista de constantes")
+        parts = [('cmp', op, left, ('lit', item)) for item in items]
+        tree = parts[0]
+        for part in parts[1:]:
+            tree = ('or' if quant == 'any' else 'and', tree, part)
+        return _dnf(tree, negated)
+    if kind == 'truth' and node[1][0] == 'lit' and isinstance(node[1][1], bool):
+        return [[]] if node[1][1] != negated else []
+    return [[(node, negated)]]
+
+
+class _Now(NamedTuple):
+    # Data/hora de referência da geração (CURRENT_DATE, now()), resolvida no momento de gerar cada valor
+    kind: str
+    days: int = 0
+
+    def resolve(self):
+        now = dg.reference_now() + timedelta(days=self.days)
+        return now.date() if self.kind == 'date' else now
+
+
+class _NotConstant(Exception):
+    pass
+
+
+def _cast(value, type_name: str):
+    if isinstance(value, list):
+        return [_cast(v, type_name.replace('[]', '', 1)) for v in value]
+    base = type_name.split('[')[0]
+    if value is None:
+        return None
+    if isinstance(value, _Now):
+        return _Now('date' if base == 'date' else 'timestamp', value.days)
+    try:
+        if base in _INT_TYPES:
+            return int(Decimal(str(value)))
+        if base in _NUM_TYPES:
+            return Decimal(str(value))
+        if base in _DATE_TYPES:
+            return date.fromisoformat(str(value)[:10])
+        if base in _TS_TYPES:
+            return datetime.fromisoformat(str(value))
+        if base in _TEXT_TYPES:
+            return value if isinstance(value, str) else str(value)
+        if base in _BOOL_TYPES:
+            return _to_bool(value)
+    except (ValueError, InvalidOperation):
+        raise _Unsupported(f"constante {value!r} inválida para {type_name}")
+    return value
+
+
+def _constant(node):
+    kind = node[0]
+    if kind == 'lit':
+        return node[1]
+    if kind == 'cast':
+        return _cast(_constant(node[1]), node[2])
+    if kind == 'array':
+        return [_constant(item) for item in node[1]]
+    if kind == 'now':
+        return _Now(node[1])
+    if kind == 'neg':
+        value = _constant(node[1])
+        if isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+            return -value
+    if kind == 'binop' and node[1] in ('+', '-'):
+        a, b = _constant(node[2]), _constant(node[3])
+        sign = 1 if node[1] == '+' else -1
+        if isinstance(a, _Now) and isinstance(b, int):
+            return a._replace(days=a.days + sign * b)
+        if isinstance(a, (int, Decimal)) and isinstance(b, (int, Decimal)):
+            return a + sign * b
+    raise _NotConstant()
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('t', 'true', 'y', 'yes', 'on', '1'):
+        return True
+    if text in ('f', 'false', 'n', 'no', 'off', '0'):
+        return False
+    raise ValueError(f"booleano inválido: {value!r}")
+
+
+def _type_group(col_type: str) -> str:
+    t = (col_type or '').lower()
+    for group, types in (('int', _INT_TYPES), ('num', _NUM_TYPES), ('text', _TEXT_TYPES), ('date', _DATE_TYPES),
+                         ('ts', _TS_TYPES), ('bool', _BOOL_TYPES)):
+        if t in types:
+            return group
+    return 'other'
+
+
+def _coerce(value, group: str):
+    # Converte uma constante da expressão para o espaço de comparação do tipo da coluna
+    try:
+        return _coerce_value(value, group)
+    except (ValueError, TypeError, InvalidOperation):
+        raise _Unsupported(f"constante {value!r} incompatível com a coluna")
+
+
+def _coerce_value(value, group: str):
+    if isinstance(value, _Now):
+        if group not in ('date', 'ts'):
+            raise ValueError("data/hora comparada com coluna de outro tipo")
+        return value
+    if group in ('int', 'num'):
+        if isinstance(value, bool):
+            raise ValueError("booleano comparado com número")
+        return Decimal(str(value))
+    if group == 'date':
+        return value.date() if isinstance(value, datetime) else value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+    if group == 'ts':
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        return datetime.fromisoformat(str(value))
+    if group == 'text':
+        return value if isinstance(value, str) else str(value)
+    if group == 'bool':
+        return _to_bool(value)
+    return value
+
+
+def _output(value, group: str, raw):
+    # Valor na forma produzida pelo gerador (a mesma dos produtores por tipo de data_generation)
+    if group == 'int':
+        return int(value)
+    if group == 'num':
+        return float(value)
+    if group == 'date':
+        return value.strftime('%Y-%m-%d')
+    if group == 'ts':
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if group == 'bool':
+        return raw
+    return value
+
+
+def _pg_regex(pattern: str) -> str:
+    for name, chars in _POSIX_CLASSES.items():
+        pattern = pattern.replace(f'[:{name}:]', chars)
+    return pattern.replace(r'\m', r'\b').replace(r'\M', r'\b').replace(r'\y', r'\b')
+
+
+def _like_regex(pattern: str) -> str:
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\' and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        out.append('.*' if c == '%' else '.' if c == '_' else re.escape(c))
+        i += 1
+    return '^' + ''.join(out) + '$'
+
+
+def _class_chars(items) -> List[str]:
+    chars, negate = set(), False
+    for op, av in items:
+        if op == sre_constants.NEGATE:
+            negate = True
+        elif op == sre_constants.LITERAL:
+            chars.add(chr(av))
+        elif op == sre_constants.RANGE:
+            chars.update(chr(c) for c in range(av[0], min(av[1], av[0] + 1000) + 1))
+        elif op == sre_constants.CATEGORY:
+            chars.update(_category_chars(av))
+        else:
+            raise _Unsupported(f"classe de caracteres não suportada ({op})")
+    if negate:
+        return [c for c in _POOL if c not in chars]
+    return sorted(chars)
+
+
+def _category_chars(category) -> str:
+    if category == sre_constants.CATEGORY_DIGIT:
+        return string.digits
+    if category == sre_constants.CATEGORY_WORD:
+        return string.ascii_letters + string.digits + '_'
+    if category == sre_constants.CATEGORY_SPACE:
+        return ' '
+    if category == sre_constants.CATEGORY_NOT_DIGIT:
+        return string.ascii_letters
+    if category in (sre_constants.CATEGORY_NOT_WORD, sre_constants.CATEGORY_NOT_SPACE):
+        return '-.@' if category == sre_constants.CATEGORY_NOT_WORD else string.ascii_letters
+    raise _Unsupported(f"categoria não suportada ({category})")
+
+
+def _generate_regex(items, rng: random.Random, alphabet: str, out: List[str]):
+    # Gera um texto que casa com a expressão regular já analisada por sre_parse
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            out.append(chr(av))
+        elif op == sre_constants.NOT_LITERAL:
+            out.append(rng.choice([c for c in alphabet if ord(c) != av] or ['_']))
+        elif op == sre_constants.ANY:
+            out.append(rng.choice(alphabet))
+        elif op == sre_constants.IN:
+            chars = _class_chars(av)
+            if not chars:
+                raise _Unsupported("classe de caracteres vazia")
+            out.append(rng.choice(chars))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, 'POSSESSIVE_REPEAT', None)):
+            low, high, sub = av
+            high = low + 6 if high == sre_constants.MAXREPEAT else min(high, low + 6)
+            for _ in range(rng.randint(low, high)):
+                _generate_regex(sub, rng, alphabet, out)
+        elif op == sre_constants.SUBPATTERN:
+            _generate_regex(av[-1], rng, alphabet, out)
+        elif op == sre_constants.BRANCH:
+            _generate_regex(rng.choice(av[1]), rng, alphabet, out)
+        elif op == sre_constants.AT:
+            continue
+        else:
+            raise _Unsupported(f"recurso de expressão regular não suportado ({op})")
+
+
+class _Domain:
+    """
+    Valores aceitos por um ramo (conjunção) da expressão, no espaço de comparação do tipo da coluna.
+    """
+    def __init__(self, group: str):
+        self.group = group
+        self.lows: List[Tuple[Any, bool]] = []  # (limite, estrito)
+        self.highs: List[Tuple[Any, bool]] = []
+        self.allowed: Optional[Dict[Any, Any]] = None  # valor comparável -> valor como escrito
+        self.excluded = set()
+        self.len_lows: List[Tuple[int, bool]] = []
+        self.len_highs: List[Tuple[int, bool]] = []
+        self.len_excluded = set()
+        self.patterns: List[Tuple[Any, str, bool]] = []  # (regex compilada, fonte python, negada)
+        self.case: Optional[str] = None
+        self.scale: Optional[int] = None
+        self.null_only = False
+        self.not_null = False
+        self.problems: List[str] = []
+
+    def compare(self, op: str, value, raw=None):
+        if op == '=':
+            self.restrict_to({value: value if raw is None else raw})
+        elif op == '<>':
+            self.excluded.add(value)
+        elif op in ('>', '>='):
+            self.lows.append((value, op == '>'))
+        else:
+            self.highs.append((value, op == '<'))
+
+    def restrict_to(self, values: Dict[Any, Any]):
+        if self.allowed is None:
+            self.allowed = dict(values)
+        else:
+            self.allowed = {k: v for k, v in self.allowed.items() if k in values}
+
+    def compare_length(self, op: str, n):
+        n = int(n)
+        if op == '=':
+            self.len_lows.append((n, False))
+            self.len_highs.append((n, False))
+        elif op == '<>':
+            self.len_excluded.add(n)
+        elif op in ('>', '>='):
+            self.len_lows.append((n, op == '>'))
+        else:
+            self.len_highs.append((n, op == '<'))
+
+    def length_range(self, max_length: Optional[int]) -> Tuple[int, Optional[int]]:
+        low = max([n + 1 if strict else n for n, strict in self.len_lows], default=0)
+        highs = [n - 1 if strict else n for n, strict in self.len_highs]
+        if max_length:
+            highs.append(max_length)
+        return low, min(highs) if highs else None
+
+    def _resolve(self, value):
+        if not isinstance(value, _Now):
+            return value
+        value = value.resolve()
+        if self.group == 'date' and isinstance(value, datetime):
+            return value.date()
+        if self.group == 'ts' and not isinstance(value, datetime):
+            return datetime(value.year, value.month, value.day)
+        return value
+
+    def bounds(self):
+        low = high = None
+        for value, strict in self.lows:
+            value = self._resolve(value)
+            if low is None or value > low[0] or (value == low[0] and strict):
+                low = (value, strict)
+        for value, strict in self.highs:
+            value = self._resolve(value)
+            if high is None or value < high[0] or (value == high[0] and strict):
+                high = (value, strict)
+        return low, high
+
+    def accepts(self, value, max_length: Optional[int] = None) -> bool:
+        if value in self.excluded or (self.allowed is not None and value not in self.allowed):
+            return False
+        if self.group not in ('text', 'bool', 'other'):
+            low, high = self.bounds()
+            if low and (value < low[0] or (low[1] and value == low[0])):
+                return False
+            if high and (value > high[0] or (high[1] and value == high[0])):
+                return False
+            if self.scale is not None and self.group == 'num' and value != round(value, self.scale):
+                return False
+        if self.group == 'text':
+            len_low, len_high = self.length_range(max_length)
+            if len(value) < len_low or (len_high is not None and len(value) > len_high) or len(value) in self.len_excluded:
+                return False
+            if any(bool(regex.search(value)) == negated for regex, _, negated in self.patterns):
+                return False
+            if self.case == 'upper' and value != value.upper() or self.case == 'lower' and value != value.lower():
+                return False
+        return True
+
+
+def _target(node, column: Optional[str]):
+    """
+    Classifica um operando em relação à coluna: ('value',) a própria coluna (com casts), ('length',) seu
+    comprimento, ('upper'|'lower',), ('round', n), ('const', valor) ou ('other', descrição).
+    """
+    if node[0] == 'cast':
+        inner = _target(node[1], column)
+        if inner[0] == 'const':
+            return ('const', _cast(inner[1], node[2]))
+        return inner
+    if node[0] == 'col':
+        return ('value',) if node[1] is None or node[1] == column else ('other', f"depende de outra coluna ({node[1]})")
+    if node[0] == 'func':
+        name, args = node[1], node[2]
+        inner = [_target(a, column) for a in args]
+        if name in _TRIM_FUNCS and len(args) == 1 and inner[0][0] == 'value':
+            return ('value',)
+        if name in _LENGTH_FUNCS and len(args) == 1 and inner[0][0] == 'value':
+            return ('length',)
+        if name in ('upper', 'lower') and len(args) == 1 and inner[0][0] == 'value':
+            return (name,)
+        if name == 'round' and len(args) == 2 and inner[0][0] == 'value' and inner[1][0] == 'const':
+            return ('round', int(inner[1][1]))
+    try:
+        return ('const', _constant(node))
+    except _NotConstant:
+        return ('other', f"trecho não suportado: {_render(node)}")
+
+
+class _Branch(NamedTuple):
+    sample: Optional[Callable[[random.Random], Any]]
+    example: Any
+    choices: Optional[List[Any]]
+    int_range: Optional[Tuple[int, int]]
+
+
+_TYPE_DEFAULT = _Branch(None, None, None, None)
+
+
+def _apply_atom(domain: _Domain, atom, negated: bool, column: Optional[str], group: str):
+    kind = atom[0]
+    if kind == 'cmp':
+        _, op, left, right = atom
+        lt, rt = _target(left, column), _target(right, column)
+        if lt[0] == 'const' and rt[0] != 'const':
+            op, lt, rt = _FLIP[op], rt, lt
+        if op == '=' and {lt[0], rt[0]} in ({'value', 'upper'}, {'value', 'lower'}):
+            domain.case = rt[0] if lt[0] == 'value' else lt[0]
+            return
+        if op == '=' and {lt[0], rt[0]} == {'value', 'round'}:
+            domain.scale = (rt if rt[0] == 'round' else lt)[1]
+            return
+        if lt[0] == 'value' and rt[0] == 'const':
+            if rt[1] is None:
+                raise _Unsupported(f"{_render(atom)}: comparação com NULL nunca é verdadeira")
+            domain.compare(op, _coerce(rt[1], group), rt[1])
+            return
+        if lt[0] == 'length' and rt[0] == 'const' and group == 'text':
+            domain.compare_length(op, _coerce(rt[1], 'int'))
+            return
+        reason = next((t[1] for t in (lt, rt) if t[0] == 'other'), f"trecho não suportado: {_render(atom)}")
+        domain.problems.append(reason)
+        return
+    if kind == 'in':
+        target = _target(atom[1], column)
+        try:
+            items = _constant(atom[2]) if isinstance(atom[2], tuple) else [_constant(i) for i in atom[2]]
+        except _NotConstant:
+            items = None
+        if target[0] != 'value' or not isinstance(items, list):
+            domain.problems.append(target[1] if target[0] == 'other' else f"trecho não suportado: {_render(atom)}")
+            return
+        values = {_coerce(v, group): v for v in items if v is not None}
+        if negated:
+            domain.excluded.update(values)
+        else:
+            domain.restrict_to(values)
+        return
+    if kind in ('like', 'regex'):
+        target = _target(atom[1], column)
+        try:
+            pattern = _constant(atom[2])
+        except _NotConstant:
+            pattern = None
+        if target[0] != 'value' or not isinstance(pattern, str) or group != 'text':
+            domain.problems.append(target[1] if target[0] == 'other' else f"trecho não suportado: {_render(atom)}")
+            return
+        source = _like_regex(pattern) if kind == 'like' else _pg_regex(pattern)
+        flags = (re.IGNORECASE if atom[3] else 0) | (re.DOTALL if kind == 'like' else 0)
+        try:
+            domain.patterns.append((re.compile(source, flags), source, negated))
+        except re.error as e:
+            raise _Unsupported(f"expressão regular não suportada ({pattern}): {e}")
+        return
+    if kind == 'isnull':
+        target = _target(atom[1], column)
+        if target[0] != 'value':
+            domain.problems.append(target[1] if target[0] == 'other' else f"trecho não suportado: {_render(atom)}")
+        elif negated:
+            domain.not_null = True
+        else:
+            domain.null_only = True
+        return
+    if kind == 'truth':
+        target = _target(atom[1], column)
+        if target[0] == 'value' and group == 'bool':
+            domain.restrict_to({not negated: not negated})
+            return
+        domain.problems.append(target[1] if target[0] == 'other' else f"trecho não suportado: {_render(atom)}")
+        return
+    domain.problems.append(f"trecho não suportado: {_render(atom)}")
+
+
+def _text_params(col: dict) -> Tuple[Optional[int], int]:
+    # Comprimento máximo da coluna e comprimento padrão gerado, como em data_generation._compile_type_producer
+    t = (col.get('type') or '').lower()
+    default = {dg.CHARACTER_VARYING: 20, 'varchar': 20, 'character': 1, 'char': 1, 'bpchar': 1}.get(t, 10)
+    try:
+        length = int(col.get('length') or 0)
+    except (TypeError, ValueError):
+        length = 0
+    max_length = length if length and t != 'text' else None
+    return max_length, max(1, length or default)
+
+
+def _int_limits(col_type: str) -> Tuple[int, int]:
+    limit = _INT_LIMITS.get((col_type or '').lower(), 2 ** 31 - 1)
+    return -limit - 1, limit
+
+
+def _window(low: Optional[int], high: Optional[int], default: Tuple[int, int], width: int) -> Tuple[int, int]:
+    # Intervalo de geração: o padrão do tipo restrito pelos limites; sem interseção, `width` a partir do limite
+    lo = default[0] if low is None else max(low, default[0])
+    hi = default[1] if high is None else min(high, default[1])
+    if lo <= hi:
+        return lo, hi
+    if high is not None and high < default[0]:
+        return (high - width if low is None else max(low, high - width)), high
+    return low, (low + width if high is None else min(high, low + width))
+
+
+def _int_bounds(domain: _Domain, scale: int, col_type: str):
+    # Limites inteiros em unidades de 10^-scale
+    low, high = domain.bounds()
+    factor = Decimal(10) ** scale
+    lo = hi = None
+    if low:
+        units = low[0] * factor
+        lo = int(units) + 1 if low[1] and units == units.to_integral_value() else math.ceil(units)
+    if high:
+        units = high[0] * factor
+        hi = int(units) - 1 if high[1] and units == units.to_integral_value() else math.floor(units)
+    if scale == 0:
+        type_lo, type_hi = _int_limits(col_type)
+        lo = type_lo if lo is None else max(lo, type_lo)
+        hi = type_hi if hi is None else min(hi, type_hi)
+    return lo, hi
+
+
+def _value_generator(domain: _Domain, col: dict, group: str) -> Callable[[random.Random], Any]:
+    """
+    Gerador de candidatos (no espaço de comparação) para o domínio; a validação fica com _Domain.accepts.
+    """
+    if group == 'int':
+        lo, hi = _int_window(domain, col)
+        return lambda rng: Decimal(rng.randint(lo, hi))
+    if group == 'num':
+        scale = domain.scale if domain.scale is not None else 2
+        lo, hi = _int_bounds(domain, scale, col.get('type'))
+        lo, hi = _window(lo, hi, (-(10 ** (5 + scale)) + 1, 10 ** (5 + scale) - 1), 100_000)
+        step = Decimal(1).scaleb(-scale)
+        return lambda rng: Decimal(rng.randint(lo, hi)) * step
+    if group in ('date', 'ts'):
+        return _temporal_generator(domain, group)
+    if group == 'bool':
+        return lambda rng: rng.random() < 0.5
+    if group == 'text':
+        return _text_generator(domain, col)
+    raise _Unsupported(f"restrição não suportada para o tipo {col.get('type')}")
+
+
+def _int_window(domain: _Domain, col: dict) -> Tuple[int, int]:
+    lo, hi = _int_bounds(domain, 0, col.get('type'))
+    if lo > hi:
+        raise _Unsupported("intervalo vazio")
+    return _window(lo, hi, (1, 10000), 1000)
+
+
+def _temporal_generator(domain: _Domain, group: str) -> Callable[[random.Random], Any]:
+    def generate(rng):
+        # Padrões de data_generation: datas de 1970 até agora, timestamps do início da década até agora
+        now = dg.reference_now()
+        low, high = domain.bounds()
+        if group == 'date':
+            step = timedelta(days=1)
+            default = (date(1970, 1, 1), now.date())
+            to_num = date.toordinal
+            from_num = date.fromordinal
+        else:
+            step = timedelta(seconds=1)
+            default = (datetime(now.year - now.year % 10, 1, 1), now.replace(microsecond=0))
+            base = datetime(1970, 1, 1)
+            to_num = lambda v: int((v - base).total_seconds())
+            from_num = lambda n: base + timedelta(seconds=n)
+        lo = to_num(low[0] + step if low[1] else low[0]) if low else None
+        hi = to_num(high[0] - step if high[1] else high[0]) if high else None
+        lo, hi = _window(lo, hi, (to_num(default[0]), to_num(default[1])), 3650 if group == 'date' else 86400 * 365)
+        return from_num(rng.randint(lo, hi))
+    return generate
+
+
+def _text_generator(domain: _Domain, col: dict) -> Callable[[random.Random], str]:
+    max_length, default_length = _text_params(col)
+    len_low, len_high = domain.length_range(max_length)
+    target = max(default_length, len_low)
+    if len_high is not None:
+        target = min(target, len_high)
+    alphabet = string.digits if 'cartao' in (col.get('column') or '') else string.ascii_letters
+    if domain.case == 'upper':
+        alphabet = string.ascii_uppercase if alphabet == string.ascii_letters else alphabet
+    elif domain.case == 'lower':
+        alphabet = string.ascii_lowercase if alphabet == string.ascii_letters else alphabet
+    source = next((src for _, src, negated in domain.patterns if not negated), None)
+    if source is None:
+        return lambda rng: ''.join(rng.choice(alphabet) for _ in range(target))
+    items = sre_parse.parse(source)
+    anchored_end = any(op == sre_constants.AT and av in (sre_constants.AT_END, sre_constants.AT_END_STRING) for op, av in items)
+
+    def generate(rng):
+        out: List[str] = []
+        _generate_regex(items, rng, alphabet, out)
+        text = ''.join(out)
+        # Sem âncora no fim, a busca do ~ aceita sufixos: completa até o comprimento mínimo
+        if not anchored_end and len(text) < len_low:
+            text += ''.join(rng.choice(alphabet) for _ in range(len_low - len(text)))
+        return text
+    return generate
+
+
+def _compile_branch(atoms, col: dict, column: Optional[str], group: str) -> Tuple[Optional[_Branch], List[str]]:
+    domain = _Domain(group)
+    for atom, negated in atoms:
+        _apply_atom(domain, atom, negated, column, group)
+    problems = list(domain.problems)
+    if domain.null_only:
+        if col.get('nullable', 'YES') == 'NO':
+            return None, problems
+        return _Branch(lambda rng: None, None, [None], None), problems
+    max_length = _text_params(col)[0] if group == 'text' else None
+    if domain.allowed is not None:
+        valid = [_output(k, group, raw) for k, raw in domain.allowed.items() if domain.accepts(k, max_length)]
+        if not valid:
+            return None, problems
+        return _Branch(lambda rng: rng.choice(valid), valid[0], valid, None), problems
+    if group == 'other':
+        if domain.lows or domain.highs or domain.excluded or domain.patterns:
+            raise _Unsupported(f"restrição não suportada para o tipo {col.get('type')}")
+        # Nada restringe o valor: o gerador do tipo já satisfaz o ramo
+        return _TYPE_DEFAULT, problems
+    try:
+        generate = _value_generator(domain, col, group)
+    except _Unsupported as e:
+        if str(e) == "intervalo vazio":
+            return None, problems
+        raise
+    probe = random.Random(0)
+    example = None
+    for _ in range(CHECK_PROBE_ATTEMPTS):
+        candidate = generate(probe)
+        if domain.accepts(candidate, max_length):
+            example = candidate
+            break
+    if example is None:
+        return None, problems
+    example_out = _output(example, group, example)
+
+    def sample(rng):
+        for _ in range(CHECK_SAMPLE_ATTEMPTS):
+            candidate = generate(rng)
+            if domain.accepts(candidate, max_length):
+                return _output(candidate, group, candidate)
+        return example_out
+    int_range = None
+    if group == 'int' and not domain.excluded:
+        int_range = _int_window(domain, col)
+    return _Branch(sample, example_out, None, int_range), problems
+
+
+@lru_cache(maxsize=CHECK_CACHE_SIZE)
+def _compile(expression: str, column: Optional[str], col_type: str, length, nullable: str) -> CompiledCheck:
+    col = {'column': column, 'type': col_type, 'length': length, 'nullable': nullable}
+    group = _type_group(col_type)
+    try:
+        tree = parse_check(expression)
+    except CheckSyntaxError as e:
+        return CompiledCheck(None, (f"expressão não reconhecida: {e}",))
+    names = set()
+    _identifiers(tree, names)
+    # Um CHECK de coluna que cita um único identificador se refere a ela, mesmo com outro nome (ex.: "col > 5")
+    target_column = column if column in names or len(names) != 1 else next(iter(names))
+    problems: List[str] = []
+    branches: List[_Branch] = []
+    try:
+        for atoms in _dnf(tree):
+            branch, branch_problems = _compile_branch(atoms, col, target_column, group)
+            problems.extend(p for p in branch_problems if p not in problems)
+            if branch is not None:
+                branches.append(branch)
+    except (_Unsupported, ValueError) as e:
+        return CompiledCheck(None, tuple(problems) + (str(e),))
+    if _TYPE_DEFAULT in branches:
+        return CompiledCheck(None, tuple(problems))
+    if not branches:
+        return CompiledCheck(None, tuple(problems) + (f"nenhum valor do tipo {col_type} satisfaz a expressão",))
+    if len(branches) == 1:
+        branch = branches[0]
+        return CompiledCheck(branch.sample, tuple(problems), branch.choices, branch.int_range)
+    if all(b.choices is not None for b in branches):
+        choices = list(dict.fromkeys(v for b in branches for v in b.choices))
+        return CompiledCheck(lambda rng: rng.choice(choices), tuple(problems), choices)
+    samplers = [b.sample for b in branches]
+    return CompiledCheck(lambda rng: rng.choice(samplers)(rng), tuple(problems))
+
+
+def compile_check(col: dict) -> CompiledCheck:
+    """
+    Compila o CHECK da coluna (uma vez por expressão, nome, tipo e tamanho). sample(rng) recebe um random.Random
+    (ex.: faker.random do lote) e é None quando nenhum valor da expressão pôde ser garantido: quem chama volta ao
+    gerador do tipo. problems lista o que foi ignorado ou não pôde ser satisfeito.
+    """
+    expression = (col.get('check_constraint') or {}).get('expression')
+    if not expression:
+        return CompiledCheck(None, ())
+    return _compile(expression, col.get('column'), col.get('type') or '', col.get('length'), col.get('nullable', 'YES'))
+
+
+def check_report(schema_metadata: Dict[str, Any], tables: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """
+    CHECK constraints do schema (ou só das tabelas indicadas) que a geração não garante: uma entrada por coluna com os
+    problemas encontrados. Colunas geradas como sequência ou FK não passam pelo CHECK e ficam de fora.
+    """
+    report = []
+    tables = None if tables is None else set(tables)
+    for table, meta in schema_metadata.items():
+        if table == 'nome_schema' or (tables is not None and table not in tables):
+            continue
+        for col in meta['columns']:
+            if not (col.get('check_constraint') or {}).get('expression'):
+                continue
+            if col.get('is_foreign_key') and col.get('references') or dg.is_sequence_column(col):
+                continue
+            problems = compile_check(col).problems
+            if problems:
+                report.append({
+                    "tabela": table, "coluna": col['column'], "expressao": col['check_constraint']['expression'],
+                    "problemas": list(problems),
+                })
+    return report
@@ -1,23 +1,26 @@
-import psycopg2
 from app.models.domain.connectors import ConnectorIn
+from app.db import postgres_pool
 import logging
 from typing import Any
 
-def testar_conexao_postgres(conector: ConnectorIn) -> bool:
-
+def testar_conexao_postgres(conector: ConnectorIn) -> postgres_pool.PoolConexoes:
+    """
+    Testa a conexão com o banco do conector em um pool avulso, que é devolvido com a conexão do teste ociosa.
+    O pool registrado de um conector de mesmo nome não é tocado: quem chama registra o pool avulso
+    (postgres_pool.registrar_pool) só depois de gravar o conector, ou o fecha.
+    """
     logger = logging.getLogger("connector_service")
+    conn_params = postgres_pool.parametros_conexao(
+        conector.host, conector.porta, conector.banco, conector.usuario, conector.senha
+    )
+    pool = postgres_pool.PoolConexoes(conn_params)
     try:
-        with psycopg2.connect(
-            host=conector.host,
-            port=conector.porta,
-            dbname=conector.banco,
-            user=conector.usuario,
-            password=conector.senha,
-            connect_timeout=5
-        ) as conn:
-            pass
+        with pool.conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
         logger.info(f"Conexão bem-sucedida com banco {conector.banco} em {conector.host}:{conector.porta}")
-        return True
+        return pool
     except Exception as e:
+        pool.fechar()
         logger.error(f"Erro ao conectar: {e}")
         raise ConnectionError(f"Erro ao conectar: {e}")
\ No newline at end of file
@@ -1,127 +1,142 @@
-import psycopg2
 from faker import Faker
-from typing import Dict, Any, List, Optional
+from psycopg2.extras import execute_values
+from typing import Dict, Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import groupby
+import codecs
+import hashlib
+import io
+import logging
 import random
-import re
+import threading
 
 fake = Faker('pt_BR')
+logger = logging.getLogger("data_generation")
 
-# Mapear tipos SQL para funções do Faker
+# Gerações com seed usam esta data como "agora" nos intervalos de datas e timestamps,
+# para que o resultado não dependa do dia em que os dados foram gerados
+SEED_REFERENCE_DATETIME = datetime(2025, 1, 1)
+
+# Faker reaproveitado por thread (construí-lo custa ~20 ms) e data de referência do lote em geração
+_local = threading.local()
+
+def derive_seed(seed: Optional[int], *key) -> Optional[int]:
+    """
+    Deriva de seed a semente do fluxo identificado por key (ex.: tabela e início do lote).
+    Cada fluxo depende só da própria chave, não da ordem, da thread ou do processo em que os lotes são gerados.
+    Sem seed devolve None, isto é, um fluxo aleatório.
+    """
+    if seed is None:
+        return None
+    digest = hashlib.sha256(':'.join(str(k) for k in (seed,) + key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def chunk_faker(seed: Optional[int]) -> Faker:
+    """
+    Faker da thread atual re-semeado com seed: cada lote gera a partir do próprio fluxo, sem estado global compartilhado.
+    """
+    faker = getattr(_local, 'faker', None)
+    if faker is None:
+        faker = _local.faker = Faker('pt_BR')
+    faker.seed_instance(seed)
+    return faker
+
+def reference_now() -> datetime:
+    """
+    "Agora" dos geradores de datas: SEED_REFERENCE_DATETIME durante um lote gerado com seed, senão o relógio.
+    """
+    return getattr(_local, 'reference', None) or datetime.now()
+
+@contextmanager
+def _seeded_reference(seed: Optional[int]):
+    previous = getattr(_local, 'reference', None)
+    _local.reference = SEED_REFERENCE_DATETIME if seed is not None else None
+    try:
+        yield
+    finally:
+        _local.reference = previous
+
+def _fake_date(faker: Faker) -> str:
+    return faker.date(end_datetime=reference_now())
+
+def _fake_timestamp(faker: Faker) -> str:
+    # Mesmo intervalo do date_time_this_decade(): do início da década até "agora"
+    end = reference_now()
+    start = datetime(end.year - end.year % 10, 1, 1)
+    return faker.date_time_between(start, end).strftime('%Y-%m-%d %H:%M:%S')
+
+# Mapear tipos SQL para funções do Faker (recebem o Faker do lote em geração)
 SQL_TYPE_TO_FAKE = {
-    'uuid': lambda: str(fake.uuid4()),
-    'integer': lambda: fake.random_int(min=1, max=10000),
-    'numeric': lambda: float(fake.pydecimal(left_digits=5, right_digits=2)),
-    'text': lambda: fake.text(max_nb_chars=20),
-    'character varying': lambda length=20: fake.text(max_nb_chars=length),
-    'character': lambda length=1: fake.random_letter(),
-    'timestamp without time zone': lambda: fake.date_time_this_decade().strftime('%Y-%m-%d %H:%M:%S'),
-    'date': lambda: fake.date(),
-    'boolean': lambda: fake.boolean(),
+    'uuid': lambda faker: str(faker.uuid4()),
+    'integer': lambda faker: faker.random_int(min=1, max=10000),
+    'numeric': lambda faker: float(faker.pydecimal(left_digits=5, right_digits=2)),
+    'text': lambda faker: faker.text(max_nb_chars=20),
+    'character varying': lambda faker, length=20: faker.text(max_nb_chars=length),
+    'character': lambda faker, length=1: faker.random_letter(),
+    'timestamp without time zone': _fake_timestamp,
+    'date': _fake_date,
+    'boolean': lambda faker: faker.boolean(),
 }
 
 CHARACTER_VARYING = 'character varying'
+DEFAULT_CHUNK_SIZE = 1000
+ENGINES = ('faker', 'numpy')
+COPY_READ_SIZE = 64 * 1024
+# Linhas por comando na carga via INSERT com VALUES de várias linhas (execute_values)
+INSERT_PAGE_SIZE = 1000
+# Tamanho aproximado dos lotes de INSERTs enviados ao servidor ao reexecutar um script persistido
+REPLAY_BATCH_BYTES = 1024 * 1024
+# Complemento de dados: chaves já existentes lidas por coluna referenciada (no máximo) e tamanho de cada leitura
+EXISTING_KEYS_LIMIT = 1_000_000
+EXISTING_KEYS_FETCH_SIZE = 10_000
 TIMESTAMP_WO_TZ = 'timestamp without time zone'
 
-def extract_check_values(expression: str):
-    # ARRAY['A', 'B', ...]
-    match = re.search(r"ARRAY\[(.*?)\]", expression)
-    if match:
-        items = match.group(1)
-        values = [item.split("::")[0].strip().strip("'") for item in items.split(",")]
-        return values
-    # IN ('A', 'B', ...)
-    match = re.search(r"IN\s*\((.*?)\)", expression)
-    if match:
-        items = match.group(1)
-        values = [item.strip().strip("'") for item in items.split(",")]
-        return values
-    return None
-
-def extract_numeric_constraint(expression: str):
-    # Exemplo: CHECK (coluna > 0)
-    match = re.search(r"> ?(-?\d+)", expression)
-    if match:
-        return int(match.group(1)) + 1  # Gera acima do valor mínimo
-    match = re.search(r"< ?(-?\d+)", expression)
-    if match:
-        return int(match.group(1)) - 1  # Gera abaixo do valor máximo
-    return None
+def _compile_check_constraint(col: dict) -> Optional[Callable[[Faker], Any]]:
+    # Compila a expressão do CHECK uma única vez (ver check_constraints) e devolve um gerador de valores já especializado
+    from app.services import check_constraints
+    sample = check_constraints.compile_check(col).sample
+    if sample is None:
+        return None
+    return lambda faker: sample(faker.random)
 
-def extract_boolean_constraint(expression: str):
-    # Exemplo: CHECK (coluna IN ('t','f'))
-    match = re.search(r"IN\s*\((.*?)\)", expression)
-    if match:
-        items = match.group(1)
-        values = [item.strip().strip("'") for item in items.split(",")]
-        if set(values) <= {'t', 'f'}:
-            return values
-    # Exemplo: CHECK (coluna = 't')
-    match = re.search(r"= '([tf])'", expression)
-    if match:
-        return [match.group(1)]
-    return None
-
-def extract_length_equals_constraint(expression: str):
-    # Exemplo: CHECK ((length((num_cartao)::text) = 16))
-    match = re.search(r"length\(.*?\) *= *(\d+)", expression)
-    if match:
-        return int(match.group(1))
-    # Corrigir regex para capturar corretamente
-    match = re.search(r"length\(.*?\)\s*=\s*(\d+)", expression)
-    if match:
-        return int(match.group(1))
-    return None
-
-def _fake_value_from_check_constraint(col: dict) -> Any:
-    expr = col['check_constraint']['expression']
-    allowed = extract_check_values(expr)
-    if allowed:
-        return random.choice(allowed)
-    bool_vals = extract_boolean_constraint(expr)
-    if bool_vals:
-        return random.choice(bool_vals)
-    min_val = extract_numeric_constraint(expr)
-    if min_val is not None and col['type'] in ('integer', 'numeric'):
-        return random.randint(min_val, min_val + 1000)
-    length_eq = extract_length_equals_constraint(expr)
-    if length_eq and col['type'] in (CHARACTER_VARYING, 'character'):
-        if 'cartao' in col['column']:
-            return fake.numerify('#' * length_eq)
-        return fake.bothify('?' * length_eq)
-    return None
+def _fixed_length_str(length: int) -> Callable[[Faker], str]:
+    return lambda faker: faker.pystr(min_chars=length, max_chars=length)
 
-def _fake_value_from_type(col: dict) -> Any:
+def _compile_type_producer(col: dict) -> Callable[[Faker], Any]:
     t = col['type']
     if t == CHARACTER_VARYING:
         length = col.get('length') or 20
-        length = max(1, int(length))
-        return fake.pystr(min_chars=length, max_chars=length)
+        return _fixed_length_str(max(1, int(length)))
     if t == 'character':
         length = col.get('length') or 1
-        length = max(1, int(length))
-        return fake.pystr(min_chars=length, max_chars=length)
-    if t in (CHARACTER_VARYING, 'character', 'text'):
+        return _fixed_length_str(max(1, int(length)))
+    if t == 'text':
         length = col.get('length') or 10
         try:
             length = int(length)
         except Exception:
             length = 10
-        return fake.pystr(min_chars=length, max_chars=length)
-    return SQL_TYPE_TO_FAKE.get(t, lambda: None)()
+        return _fixed_length_str(length)
+    return SQL_TYPE_TO_FAKE.get(t, lambda faker: None)
 
-def get_fake_value(col: dict) -> Any:
-    # 1. Tenta gerar valor a partir de check_constraint
+def compile_value_producer(col: dict) -> Callable[[Faker], Any]:
+    """
+    Compila os metadados de uma coluna em uma função que gera um valor fake a partir do Faker recebido
+    (o do lote em geração, já semeado). O CHECK constraint, se houver e for reconhecido, tem prioridade sobre o tipo.
+    """
     if col.get('check_constraint') and 'expression' in col['check_constraint']:
-        value = _fake_value_from_check_constraint(col)
-        if value is not None:
-            return value
-    # 2. Gera valor baseado no tipo
-    return _fake_value_from_type(col)
+        from_check = _compile_check_constraint(col)
+        if from_check is not None:
+            return from_check
+    return _compile_type_producer(col)
 
+def get_fake_value(col: dict, faker: Optional[Faker] = None) -> Any:
+    return compile_value_producer(col)(faker if faker is not None else fake)
 
-def topological_sort_tables(schema_metadata: Dict[str, Any]) -> List[str]:
-    # Ordena as tabelas respeitando dependências de FK
+
+def _dependency_graph(schema_metadata: Dict[str, Any]):
     graph = defaultdict(list)
     indegree = defaultdict(int)
     for table, meta in schema_metadata.items():
@@ -132,6 +147,11 @@ def topological_sort_tables(schema_metadata: Dict[str, Any]) -> List[str]:
             indegree[table] += 1
         if table not in indegree:
             indegree[table] = 0
+    return graph, indegree
+
+def topological_sort_tables(schema_metadata: Dict[str, Any]) -> List[str]:
+    # Ordena as tabelas respeitando dependências de FK
+    graph, indegree = _dependency_graph(schema_metadata)
     queue = deque([t for t in indegree if indegree[t] == 0])
     order = []
     while queue:
@@ -143,31 +163,140 @@ def topological_sort_tables(schema_metadata: Dict[str, Any]) -> List[str]:
                 queue.append(nei)
     return order
 
+def topological_levels(schema_metadata: Dict[str, Any]) -> List[List[str]]:
+    """
+    Agrupa as tabelas em níveis de dependência: as tabelas de um nível dependem apenas de níveis anteriores
+    e podem ser geradas em paralelo.
+    """
+    graph, indegree = _dependency_graph(schema_metadata)
+    level = [t for t in indegree if indegree[t] == 0]
+    levels = []
+    while level:
+        levels.append(level)
+        next_level = []
+        for t in level:
+            for nei in graph[t]:
+                indegree[nei] -= 1
+                if indegree[nei] == 0:
+                    next_level.append(nei)
+        level = next_level
+    return levels
+
+
+def _conexao(conn_source):
+    # conn_source é um dict de parâmetros do psycopg2 ou um postgres_pool.PoolConexoes.
+    # Import tardio: mantém o gerador utilizável sem a configuração da API (ex.: benchmarks)
+    from app.db.postgres_pool import conexao
+    return conexao(conn_source)
+
+
+def _query_max_pk(cur, schema, table, pk_col):
+    cur.execute(f'SELECT MAX({pk_col}) FROM {schema}.{table}')
+    max_val = cur.fetchone()[0]
+    return (max_val or 0)
+
+
+def _max_pks_query(nome_schema: str, pk_cols: List[Tuple[str, str]], sequences: Optional[Dict[int, str]] = None) -> str:
+    # Uma única consulta para todas as PKs; cada parte devolve (índice em pk_cols, maior valor já usado).
+    # Com sequences, o último valor entregue pela sequência da coluna também conta como usado.
+    partes = []
+    for idx, (table, pk_col) in enumerate(pk_cols):
+        maximo = f'COALESCE(MAX({pk_col}), 0)'
+        seq = (sequences or {}).get(idx)
+        if seq:
+            maximo = f'GREATEST({maximo}, (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM {seq}))'
+        partes.append(f'SELECT {idx}, {maximo} FROM {nome_schema}.{table}')
+    return '\nUNION ALL\n'.join(partes)
+
+
+def _table_rows(rows_per_table: Union[int, Dict[str, int]], table: str) -> int:
+    # rows_per_table é um total único para todas as tabelas ou um dict tabela -> linhas (tabelas ausentes: nenhuma)
+    if isinstance(rows_per_table, dict):
+        return rows_per_table.get(table, 0)
+    return rows_per_table
+
+
+def _reserve_pk_ranges(cur, nome_schema: str, pk_cols: List[Tuple[str, str]], rows_per_table) -> Dict[Tuple[str, str], int]:
+    # Sob um advisory lock por schema (liberado no commit), lê o maior valor usado por PK e avança a sequência
+    # dona da coluna com setval, reservando o intervalo (início, início + linhas da tabela] para esta geração.
+    cur.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', (f'webapi-dicionario:pk:{nome_schema}',))
+    valores = ', '.join(['(%s, %s, %s)'] * len(pk_cols))
+    params = [v for idx, (table, pk_col) in enumerate(pk_cols) for v in (idx, f'{nome_schema}.{table}', pk_col)]
+    cur.execute(f'SELECT v.idx, pg_get_serial_sequence(v.tabela, v.coluna) FROM (VALUES {valores}) AS v(idx, tabela, coluna)', params)
+    sequences = {idx: seq for idx, seq in cur.fetchall() if seq}
+    sem_sequencia = [f'{table}.{pk_col}' for idx, (table, pk_col) in enumerate(pk_cols) if idx not in sequences]
+    if sem_sequencia:
+        logger.warning(f"PKs sem sequência não podem ser reservadas (apenas MAX é usado): {', '.join(sem_sequencia)}")
+    cur.execute(_max_pks_query(nome_schema, pk_cols, sequences))
+    starts = {idx: max_val or 0 for idx, max_val in cur.fetchall()}
+    reservas = {idx: _table_rows(rows_per_table, pk_cols[idx][0]) for idx in sequences}
+    reservas = {idx: rows for idx, rows in reservas.items() if rows > 0}
+    if reservas:
+        valores = ', '.join(['(%s, %s)'] * len(reservas))
+        params = [v for idx, rows in reservas.items() for v in (sequences[idx], starts[idx] + rows)]
+        cur.execute(f'SELECT setval(v.seq::regclass, v.valor) FROM (VALUES {valores}) AS v(seq, valor)', params)
+    return {pk_cols[idx]: start for idx, start in starts.items()}
+
 
 def get_max_pk_value(conn_params, schema, table, pk_col):
     try:
-        with psycopg2.connect(**conn_params) as conn:
+        with _conexao(conn_params) as conn:
             with conn.cursor() as cur:
-                cur.execute(f'SELECT MAX({pk_col}) FROM {schema}.{table}')
-                max_val = cur.fetchone()[0]
-                return (max_val or 0)
+                return _query_max_pk(cur, schema, table, pk_col)
     except Exception:
         return 0
 
 
-def _get_pk_value(table, col, idx, pk_start_vals):
-    if col['type'] in ('integer', 'bigint'):
-        start_val = pk_start_vals.get((table, col['column']), 0)
-        return start_val + idx + 1
-    return get_fake_value(col)
+def count_table_rows(conn_params, schema_metadata: Dict[str, Any], tables: List[str]) -> Dict[str, int]:
+    """
+    Quantidade atual de linhas de cada tabela no banco de destino, em uma única consulta (UNION ALL).
+    """
+    if not tables:
+        return {}
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    query = '\nUNION ALL\n'.join(f'SELECT {idx}, COUNT(*) FROM {nome_schema}.{table}' for idx, table in enumerate(tables))
+    with _conexao(conn_params) as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                return {tables[idx]: total for idx, total in cur.fetchall()}
+        finally:
+            conn.rollback()
+
 
-def _get_fk_value(col, data):
-    ref_table = col['references']['table']
-    ref_col = col['references']['column']
-    ref_vals = [r[ref_col] for r in data.get(ref_table, [])]
-    return random.choice(ref_vals) if ref_vals else None
+def _key_value(v: Any) -> Any:
+    # Inteiros seguem como estão; os demais tipos (datas, Decimal, UUID) viram texto, aceito tanto no COPY quanto como literal
+    return v if isinstance(v, (int, str)) else str(v)
+
+
+def load_existing_keys(
+    conn_params, schema_metadata: Dict[str, Any], refs: Iterable[Tuple[str, Any]], limit: Optional[int] = EXISTING_KEYS_LIMIT
+) -> Dict[Tuple[str, Any], List[Any]]:
+    """
+    Lê do banco de destino as chaves já existentes de cada (tabela, coluna) referenciada por FKs, até limit por coluna
+    (None: todas). Uma tupla de colunas no lugar da coluna (PK composta) devolve tuplas de valores.
+    A leitura usa um cursor do lado do servidor, buscado em lotes de EXISTING_KEYS_FETCH_SIZE, sem uma consulta por chave.
+    """
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    keys = {}
+    with _conexao(conn_params) as conn:
+        try:
+            for idx, (table, column) in enumerate(refs):
+                columns = column if isinstance(column, tuple) else (column,)
+                not_null = ' AND '.join(f'{c} IS NOT NULL' for c in columns)
+                with conn.cursor(name=f'webapi_dicionario_chaves_{idx}') as cur:
+                    cur.itersize = EXISTING_KEYS_FETCH_SIZE
+                    cur.execute(f'SELECT {", ".join(columns)} FROM {nome_schema}.{table} WHERE {not_null} LIMIT %s', (limit,))
+                    if isinstance(column, tuple):
+                        keys[(table, column)] = [tuple(_key_value(v) for v in row) for row in cur]
+                    else:
+                        keys[(table, column)] = [_key_value(row[0]) for row in cur]
+        finally:
+            conn.rollback()
+    return keys
 
-def _get_not_null_fallback(col, idx):
+
+def _get_not_null_fallback(col, idx, faker):
     t = col['type']
     if t in (CHARACTER_VARYING, 'character', 'text'):
         length = col.get('length') or 10
@@ -175,13 +304,13 @@ def _get_not_null_fallback(col, idx):
             length = int(length)
         except Exception:
             length = 10
-        return fake.pystr(min_chars=length, max_chars=length)
+        return faker.pystr(min_chars=length, max_chars=length)
     elif t in ('integer', 'numeric', 'bigint'):
         return idx + 1
     elif t == 'date':
-        return fake.date()
+        return _fake_date(faker)
     elif t == TIMESTAMP_WO_TZ:
-        return fake.date_time_this_decade().strftime('%Y-%m-%d %H:%M:%S')
+        return _fake_timestamp(faker)
     elif t == 'boolean':
         return True
     return None
@@ -200,89 +329,574 @@ def _get_not_null_final_fallback(col, idx):
         return True
     return None
 
-def _generate_row(table, table_meta, idx, pk_start_vals, data):
-    row = {}
+class ColumnPlan(NamedTuple):
+    column: str
+    kind: str  # 'pk_seq', 'fk' ou 'value'
+    produce: Optional[Callable[[int, Faker], Any]]
+    ref: Optional[Tuple[str, str]] = None
+
+def _compile_value_column(col: dict) -> Callable[[int, Faker], Any]:
+    value_fn = compile_value_producer(col)
+    if col.get('nullable', 'YES') != 'NO':
+        return lambda idx, faker: value_fn(faker)
+
+    def produce(idx, faker):
+        value = value_fn(faker)
+        if value is None:
+            value = _get_not_null_fallback(col, idx, faker)
+        if value is None:
+            value = _get_not_null_final_fallback(col, idx)
+        return value
+    return produce
+
+def is_sequence_column(col: dict) -> bool:
+    """
+    Colunas inteiras geradas como sequência (maior valor no destino + índice da linha): as PKs e as colunas
+    is_unique sem CHECK, desde que não sejam FK (uma FK, mesmo na PK, recebe chaves da tabela referenciada).
+    """
+    if col['type'] not in ('integer', 'bigint') or (col.get('is_foreign_key') and col.get('references')):
+        return False
+    return bool(col.get('is_primary_key') or (col.get('is_unique') and not col.get('check_constraint')))
+
+def compile_table_plan(table_meta: Dict[str, Any]) -> List[ColumnPlan]:
+    """
+    Compila as colunas de uma tabela em um plano de geração: uma entrada por coluna com o tipo de valor
+    (sequência de PK, FK ou valor fake) e a função já especializada. Depende apenas do schema.
+    """
+    plan = []
     for col in table_meta['columns']:
-        value = None
-        if col['is_primary_key']:
-            value = _get_pk_value(table, col, idx, pk_start_vals)
-            row[col['column']] = value
-        elif col['is_foreign_key'] and col['references']:
-            value = _get_fk_value(col, data)
-            row[col['column']] = value
+        if is_sequence_column(col):
+            plan.append(ColumnPlan(col['column'], 'pk_seq', None))
+        elif col['is_primary_key'] and not (col['is_foreign_key'] and col.get('references')):
+            value_fn = compile_value_producer(col)
+            plan.append(ColumnPlan(col['column'], 'value', lambda idx, faker, fn=value_fn: fn(faker)))
+        elif col['is_foreign_key'] and col.get('references'):
+            ref = (col['references']['table'], col['references']['column'])
+            plan.append(ColumnPlan(col['column'], 'fk', None, ref))
         else:
-            value = get_fake_value(col)
-            if col.get('nullable', 'YES') == 'NO' and value is None:
-                value = _get_not_null_fallback(col, idx)
-            if col.get('nullable', 'YES') == 'NO' and value is None:
-                value = _get_not_null_final_fallback(col, idx)
-            row[col['column']] = value
-    return row
+            plan.append(ColumnPlan(col['column'], 'value', _compile_value_column(col)))
+    return plan
 
-def generate_fake_data(schema_metadata: Dict[str, Any], rows_per_table: int = 10, conn_params: Optional[dict] = None) -> Dict[str, List[Dict[str, Any]]]:
+def _fk_sampler(pool: Optional[List[Any]]) -> Callable[[int, Faker], Any]:
+    # Amostragem O(1) no pool de chaves da tabela/coluna referenciada (o pool cresce à medida que o pai é gerado)
+    if pool is None:
+        return lambda idx, faker: None
+    return lambda idx, faker: faker.random.choice(pool) if pool else None
+
+def bind_row_generator(table: str, plan: List[ColumnPlan], pk_start_vals, fk_pools) -> Callable[..., Dict[str, Any]]:
     """
-    Gera dados fake para cada tabela do schema, respeitando FKs e constraints básicas.
-    Se conn_params for fornecido, busca o maior valor atual das PKs inteiras para evitar duplicidade.
+    Liga o plano da tabela aos valores iniciais de PK e aos pools de FK da execução atual,
+    devolvendo uma função (idx, faker=fake) -> linha que só chama os geradores já compilados.
     """
-    data = {}
+    producers = []
+    for entry in plan:
+        if entry.kind == 'pk_seq':
+            start_val = pk_start_vals.get((table, entry.column), 0)
+            producers.append((entry.column, lambda idx, faker, s=start_val: s + idx + 1))
+        elif entry.kind == 'fk':
+            producers.append((entry.column, _fk_sampler(fk_pools.get(entry.ref))))
+        else:
+            producers.append((entry.column, entry.produce))
+
+    def generate_row(idx, faker: Faker = fake):
+        return {name: produce(idx, faker) for name, produce in producers}
+    return generate_row
+
+def table_fk_columns(plan: List[ColumnPlan]) -> List[Tuple[str, Tuple[str, str]]]:
+    return [(entry.column, entry.ref) for entry in plan if entry.kind == 'fk']
+
+def sample_fk_values(seed: Optional[int], table: str, start: int, end: int, fk_columns, fk_pools) -> Dict[str, List[Any]]:
+    """
+    Sorteia os valores de FK de um lote, coluna a coluna, em um fluxo próprio do lote (derivado de seed, tabela e início).
+    A geração sequencial e o processo principal da geração paralela usam esta mesma função, então ambas
+    produzem os mesmos valores para a mesma seed.
+    """
+    rng = random.Random(derive_seed(seed, table, start, 'fk'))
+    n = end - start
+    values = {}
+    for column, ref in fk_columns:
+        pool = fk_pools.get(ref)
+        values[column] = rng.choices(pool, k=n) if pool else [None] * n
+    return values
+
+def apply_fk_values(rows: List[Dict[str, Any]], fk_values: Dict[str, List[Any]]):
+    for column, values in fk_values.items():
+        for row, value in zip(rows, values):
+            row[column] = value
+
+def _referenced_columns(schema_metadata: Dict[str, Any]) -> Dict[str, set]:
+    # Colunas de cada tabela que são alvo de alguma FK (as únicas que precisam ficar em memória)
+    referenced = defaultdict(set)
+    for table, meta in schema_metadata.items():
+        if table == 'nome_schema':
+            continue
+        for col in meta['columns']:
+            if col.get('is_foreign_key') and col.get('references'):
+                referenced[col['references']['table']].add(col['references']['column'])
+    return referenced
+
+def _new_fk_pools(referenced: Dict[str, set], existing_keys: Optional[Dict[Tuple[str, str], List[Any]]] = None) -> Dict[Tuple[str, str], List[Any]]:
+    # Um pool de chaves por (tabela, coluna) referenciada, preenchido à medida que as linhas pai são geradas;
+    # existing_keys adianta as chaves que já estão no banco de destino (complemento de dados)
+    existing_keys = existing_keys or {}
+    return {(table, c): list(existing_keys.get((table, c), ())) for table, cols in referenced.items() for c in cols}
+
+def fk_refs_for(schema_metadata: Dict[str, Any], tables: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    (tabela, coluna) referenciados pelas FKs das tabelas informadas, sem repetição.
+    """
+    refs = []
+    for table in tables:
+        for col in schema_metadata[table]['columns']:
+            if col.get('is_foreign_key') and col.get('references'):
+                ref = (col['references']['table'], col['references']['column'])
+                if ref not in refs:
+                    refs.append(ref)
+    return refs
+
+def _feed_fk_pools(fk_pools, table, ref_cols, rows):
+    for c in ref_cols:
+        fk_pools[(table, c)].extend(r[c] for r in rows if r[c] is not None)
+
+def _get_pk_start_vals(schema_metadata, table_order, conn_params, rows_per_table=0, reservar_ids=False):
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    pk_cols = [
+        (table, col['column'])
+        for table in table_order if table != 'nome_schema'
+        for col in schema_metadata[table]['columns']
+        if is_sequence_column(col)
+    ]
+    pk_start_vals = {key: 0 for key in pk_cols}
+    if not pk_cols:
+        return pk_start_vals
+    if reservar_ids:
+        # Falhas na reserva são propagadas: sem ela não há garantia contra colisões entre gerações concorrentes
+        with _conexao(conn_params) as conn:
+            try:
+                with conn.cursor() as cur:
+                    pk_start_vals.update(_reserve_pk_ranges(cur, nome_schema, pk_cols, rows_per_table))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return pk_start_vals
+    # Uma única conexão e uma única consulta (UNION ALL) para todas as PKs
+    try:
+        with _conexao(conn_params) as conn:
+            with conn.cursor() as cur:
+                try:
+                    cur.execute(_max_pks_query(nome_schema, pk_cols))
+                    for idx, max_val in cur.fetchall():
+                        pk_start_vals[pk_cols[idx]] = max_val or 0
+                except Exception:
+                    # Uma tabela inexistente ou inacessível invalida a consulta única: consulta PK a PK,
+                    # e as que falharem começam do zero
+                    conn.rollback()
+                    for table, pk_col in pk_cols:
+                        try:
+                            pk_start_vals[(table, pk_col)] = _query_max_pk(cur, nome_schema, table, pk_col)
+                        except Exception:
+                            conn.rollback()
+            conn.rollback()
+    except Exception:
+        pass
+    return pk_start_vals
+
+def get_pk_start_vals(schema_metadata: Dict[str, Any], conn_params) -> Dict[Tuple[str, str], int]:
+    """
+    Maior valor atual de cada PK inteira do schema no banco de destino (as PKs geradas começam logo depois).
+    """
+    return _get_pk_start_vals(schema_metadata, topological_sort_tables(schema_metadata), conn_params)
+
+def compile_schema_plans(schema_metadata: Dict[str, Any], engine: str = 'faker') -> Dict[str, List[ColumnPlan]]:
+    """
+    Compila os planos de todas as tabelas do schema para o motor informado.
+    Os planos não dependem da execução (PKs iniciais, pools de FK) e podem ser reutilizados entre gerações.
+    """
+    if engine == 'numpy':
+        from app.services import vectorized_generation
+        compile_plan = vectorized_generation.compile_vector_table_plan
+    else:
+        compile_plan = compile_table_plan
+    return {table: compile_plan(meta) for table, meta in schema_metadata.items() if table != 'nome_schema'}
+
+def _bind_chunk_generator(engine: str, table: str, table_meta, pk_start_vals, fk_pools, plan=None, seed: Optional[int] = None) -> Callable[[int, int], List[Dict[str, Any]]]:
+    # Cada lote usa fluxos derivados de (seed, tabela, início do lote): o resultado não depende de quem gera o lote.
+    # Com fk_pools=None as FKs ficam None e são preenchidas por quem chama (processo principal da geração paralela).
+    if engine == 'numpy':
+        from app.services import vectorized_generation
+        plan = plan if plan is not None else vectorized_generation.compile_vector_table_plan(table_meta)
+        generate = vectorized_generation.bind_chunk_generator(table, plan, pk_start_vals, {}, seed=seed)
+    else:
+        plan = plan if plan is not None else compile_table_plan(table_meta)
+        generate_row = bind_row_generator(table, plan, pk_start_vals, {})
+
+        def generate(start, end):
+            faker = chunk_faker(derive_seed(seed, table, start))
+            with _seeded_reference(seed):
+                return [generate_row(idx, faker) for idx in range(start, end)]
+    fk_columns = table_fk_columns(plan)
+
+    def generate_chunk(start, end):
+        rows = generate(start, end)
+        if fk_pools is not None and fk_columns:
+            apply_fk_values(rows, sample_fk_values(seed, table, start, end, fk_columns, fk_pools))
+        return rows
+    return generate_chunk
+
+def iter_fake_data(
+    schema_metadata: Dict[str, Any],
+    rows_per_table: Union[int, Dict[str, int]] = 10,
+    conn_params: Optional[dict] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    engine: str = 'faker',
+    workers: int = 1,
+    reservar_ids: bool = False,
+    plans: Optional[Dict[str, List[ColumnPlan]]] = None,
+    seed: Optional[int] = None,
+    pk_start_vals: Optional[Dict[Tuple[str, str], int]] = None,
+    existing_keys: Optional[Dict[Tuple[str, str], List[Any]]] = None
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Gera dados fake de forma preguiçosa, tabela a tabela (em ordem topológica), em lotes de até chunk_size linhas.
+    Produz tuplas (tabela, linhas). Entre os lotes só ficam em memória os pools de chaves das colunas referenciadas por FKs.
+    Se conn_params for fornecido, busca o maior valor atual das PKs inteiras (em uma única consulta) para evitar duplicidade.
+    Com reservar_ids, o intervalo de IDs de cada PK com sequência é reservado via setval, de modo que gerações
+    concorrentes contra o mesmo banco não colidam.
+    engine='numpy' gera cada coluna do lote de uma vez (ver vectorized_generation); o padrão 'faker' gera célula a célula.
+    Com workers > 1 os lotes são gerados em um pool de processos, nível de dependência a nível (ver parallel_generation).
+    plans permite reaproveitar planos já compilados para o motor (ver compile_schema_plans); os processos do pool compilam os seus.
+    Com seed a geração é determinística: cada lote usa fluxos derivados de (seed, tabela, início do lote), então o
+    resultado é o mesmo com qualquer número de workers, para o mesmo engine, chunk_size e PKs iniciais.
+    pk_start_vals informa PKs iniciais já lidas (ver get_pk_start_vals), dispensando a consulta ao banco.
+    rows_per_table também aceita um dict tabela -> linhas (tabelas ausentes não recebem linhas), e existing_keys
+    (ver load_existing_keys) inclui nos pools de FK as chaves que já estão no banco: juntos, permitem completar
+    um banco existente gerando só as linhas que faltam.
+    Colunas is_unique e PKs compostas não se repetem (ver uniqueness): os lotes são corrigidos na ordem em que saem.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine deve ser um de {ENGINES}")
+    chunk_size = max(1, int(chunk_size))
     table_order = topological_sort_tables(schema_metadata)
-    pk_start_vals = {}
-    if conn_params:
-        nome_schema = schema_metadata.get('nome_schema', 'public')
-        for table in table_order:
-            if table == 'nome_schema':
-                continue
-            table_meta = schema_metadata[table]
-            for col in table_meta['columns']:
-                if col['is_primary_key'] and col['type'] in ('integer', 'bigint'):
-                    pk_start_vals[(table, col['column'])] = get_max_pk_value(conn_params, nome_schema, table, col['column'])
+    if pk_start_vals is None:
+        pk_start_vals = _get_pk_start_vals(schema_metadata, table_order, conn_params, rows_per_table, reservar_ids) if conn_params else {}
+    if workers > 1:
+        from app.services import parallel_generation
+        yield from parallel_generation.iter_parallel_chunks(
+            schema_metadata, rows_per_table, pk_start_vals, chunk_size, engine, workers, seed, existing_keys
+        )
+        return
+    from app.services import uniqueness
+    referenced = _referenced_columns(schema_metadata)
+    fk_pools = _new_fk_pools(referenced, existing_keys)
+    guards = uniqueness.build_unique_guards(schema_metadata, rows_per_table, seed, fk_pools, existing_keys)
     for table in table_order:
         if table == 'nome_schema':
             continue
-        table_meta = schema_metadata[table]
-        rows = []
-        for idx in range(rows_per_table):
-            row = _generate_row(table, table_meta, idx, pk_start_vals, data)
-            rows.append(row)
-        data[table] = rows
+        guard = guards.get(table)
+        generate_chunk = _bind_chunk_generator(
+            engine, table, schema_metadata[table], pk_start_vals, fk_pools, plan=(plans or {}).get(table), seed=seed
+        )
+        ref_cols = referenced.get(table)
+        total = _table_rows(rows_per_table, table)
+        for start in range(0, total, chunk_size):
+            end = min(start + chunk_size, total)
+            rows = generate_chunk(start, end)
+            if guard:
+                guard.apply(rows, start)
+            if ref_cols:
+                _feed_fk_pools(fk_pools, table, ref_cols, rows)
+            yield table, rows
+
+def generate_fake_data(
+    schema_metadata: Dict[str, Any], rows_per_table: int = 10, conn_params: Optional[dict] = None, seed: Optional[int] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Gera dados fake para cada tabela do schema, respeitando FKs e constraints básicas.
+    Se conn_params for fornecido, busca o maior valor atual das PKs inteiras para evitar duplicidade.
+    Com seed o resultado é reproduzível (ver iter_fake_data).
+    Materializa todo o resultado; para volumes grandes prefira iter_fake_data.
+    """
+    data = {}
+    for table, rows in iter_fake_data(schema_metadata, rows_per_table, conn_params=conn_params, seed=seed):
+        data.setdefault(table, []).extend(rows)
     return data
 
 
-def generate_insert_sql(schema_metadata: Dict[str, Any], fake_data: Dict[str, List[Dict[str, Any]]]) -> str:
+def _sql_literal(v: Any) -> str:
+    if v is None:
+        return 'NULL'
+    if isinstance(v, str):
+        return "'" + v.replace("'", "''") + "'"
+    return str(v)
+
+def _as_chunks(fake_data) -> Iterable[Tuple[str, List[Dict[str, Any]]]]:
+    # Aceita tanto o dict materializado quanto o iterador de lotes (tabela, linhas)
+    return fake_data.items() if isinstance(fake_data, dict) else fake_data
+
+def count_rows(chunks, counts: Dict[str, int]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Repassa os lotes adiante acumulando em `counts` as linhas geradas por tabela.
+    """
+    for table, rows in chunks:
+        counts[table] = counts.get(table, 0) + len(rows)
+        yield table, rows
+
+def _values_tuple(cols: List[str], row: Dict[str, Any]) -> str:
+    return '(' + ', '.join(_sql_literal(row[c]) for c in cols) + ')'
+
+def iter_insert_sql(schema_metadata: Dict[str, Any], fake_data, rows_per_statement: int = 1) -> Iterator[str]:
+    """
+    Gera os comandos INSERT SQL de forma incremental, um bloco de texto por lote de linhas.
+    Com rows_per_statement > 1 cada comando leva até rows_per_statement linhas em um VALUES de várias linhas
+    (uma linha do VALUES por linha do texto), sem repetir a lista de colunas a cada linha.
+    """
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    for table, rows in _as_chunks(fake_data):
+        if table == 'nome_schema' or not rows:
+            continue
+        cols = [col['column'] for col in schema_metadata[table]['columns']]
+        prefix = f"INSERT INTO {nome_schema}.{table} ({', '.join(cols)}) VALUES"
+        if rows_per_statement <= 1:
+            yield '\n'.join(prefix + ' ' + _values_tuple(cols, row) + ';' for row in rows)
+            continue
+        yield '\n'.join(
+            prefix + '\n' + ',\n'.join(_values_tuple(cols, row) for row in rows[i:i + rows_per_statement]) + ';'
+            for i in range(0, len(rows), rows_per_statement)
+        )
+
+def generate_insert_sql(schema_metadata: Dict[str, Any], fake_data: Dict[str, List[Dict[str, Any]]], rows_per_statement: int = 1) -> str:
     """
     Gera comandos INSERT SQL para os dados fake gerados.
     """
+    return '\n'.join(iter_insert_sql(schema_metadata, fake_data, rows_per_statement))
+
+
+def execute_inserts(conn_params: dict, sql: Union[str, Iterable[str]]):
+    """
+    Executa os comandos INSERT SQL na base de destino, em uma única transação.
+    Aceita o script completo ou um iterável de blocos (ex.: iter_insert_sql); cada bloco é enviado em uma só ida ao servidor.
+    conn_params pode ser um dict de parâmetros ou o pool do conector (postgres_pool.PoolConexoes).
+    """
+    blocos = [sql] if isinstance(sql, str) else sql
+    with _conexao(conn_params) as conn:
+        try:
+            with conn.cursor() as cur:
+                for bloco in blocos:
+                    if bloco.strip():
+                        cur.execute(bloco)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def insert_fake_data(
+    conn_params: dict,
+    schema_metadata: Dict[str, Any],
+    fake_data,
+    page_size: int = INSERT_PAGE_SIZE,
+    on_table_loaded: Optional[Callable[[str, int], None]] = None
+):
+    """
+    Carrega os dados fake com INSERTs de várias linhas (psycopg2.extras.execute_values): cada comando leva até
+    page_size linhas, com um único parse/plan no servidor, e os valores são escapados pelo próprio driver.
+    Aceita o dict materializado ou o iterador de lotes de iter_fake_data, em uma única transação.
+    on_table_loaded(tabela, linhas) é chamado a cada lote inserido (antes do commit).
+    conn_params pode ser um dict de parâmetros ou o pool do conector (postgres_pool.PoolConexoes).
+    """
     nome_schema = schema_metadata.get('nome_schema', 'public')
-    sqls = []
-    for table, rows in fake_data.items():
+    with _conexao(conn_params) as conn:
+        try:
+            with conn.cursor() as cur:
+                for table, rows in _as_chunks(fake_data):
+                    if table == 'nome_schema' or not rows:
+                        continue
+                    cols = [col['column'] for col in schema_metadata[table]['columns']]
+                    execute_values(
+                        cur, f"INSERT INTO {nome_schema}.{table} ({', '.join(cols)}) VALUES %s",
+                        [tuple(row[c] for c in cols) for row in rows], page_size=page_size
+                    )
+                    if on_table_loaded:
+                        on_table_loaded(table, len(rows))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _copy_text_value(v: Any) -> str:
+    # Formato texto do COPY: NULL vira \N e barras/tab/quebras de linha são escapadas
+    if v is None:
+        return '\\N'
+    if isinstance(v, bool):
+        return 't' if v else 'f'
+    if isinstance(v, str):
+        return (v.replace('\\', '\\\\')
+                 .replace('\t', '\\t')
+                 .replace('\n', '\\n')
+                 .replace('\r', '\\r'))
+    return str(v)
+
+
+def generate_copy_rows(cols: List[str], rows: List[Dict[str, Any]]) -> str:
+    """
+    Gera as linhas no formato texto do COPY (colunas separadas por tab) para as linhas informadas.
+    """
+    return ''.join('\t'.join(_copy_text_value(row[c]) for c in cols) + '\n' for row in rows)
+
+
+def iter_copy_sql(schema_metadata: Dict[str, Any], fake_data) -> Iterator[str]:
+    """
+    Gera um script no formato aceito pelo psql (COPY ... FROM stdin; linhas; \\.), um bloco de texto por lote.
+    Cada tabela vira um único bloco COPY.
+    """
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    non_empty = (chunk for chunk in _as_chunks(fake_data) if chunk[1])
+    for table, chunks in groupby(non_empty, key=lambda chunk: chunk[0]):
         if table == 'nome_schema':
             continue
         cols = [col['column'] for col in schema_metadata[table]['columns']]
-        for row in rows:
-            values = []
-            for c in cols:
-                v = row[c]
-                if v is None:
-                    values.append('NULL')
-                elif isinstance(v, str):
-                    values.append("'" + v.replace("'", "''") + "'")
-                else:
-                    values.append(str(v))
-            sql = f"INSERT INTO {nome_schema}.{table} ({', '.join(cols)}) VALUES ({', '.join(values)});"
-            sqls.append(sql)
-    return '\n'.join(sqls)
+        yield f"COPY {nome_schema}.{table} ({', '.join(cols)}) FROM stdin;\n"
+        for _, rows in chunks:
+            yield generate_copy_rows(cols, rows)
+        yield "\\.\n"
+
+
+class _ChunkReader(io.TextIOBase):
+    """
+    Arquivo somente leitura sobre um iterador de strings, consumido sob demanda pelo copy_expert.
+    """
+    def __init__(self, pieces: Iterator[str]):
+        self._pieces = iter(pieces)
+        self._buffer = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._pieces)
+            except StopIteration:
+                break
+        if size is None or size < 0:
+            out, self._buffer = self._buffer, ''
+        else:
+            out, self._buffer = self._buffer[:size], self._buffer[size:]
+        return out
+
+
+def copy_fake_data(
+    conn_params: dict,
+    schema_metadata: Dict[str, Any],
+    fake_data,
+    on_table_loaded: Optional[Callable[[str, int], None]] = None
+):
+    """
+    Carrega os dados fake na base de destino via COPY ... FROM STDIN.
+    Aceita o dict materializado ou o iterador de lotes de iter_fake_data; cada tabela vira um único COPY
+    alimentado lote a lote. As tabelas são carregadas na ordem recebida (topológica) dentro de uma única transação.
+    on_table_loaded(tabela, linhas) é chamado ao fim do COPY de cada tabela (antes do commit).
+    conn_params pode ser um dict de parâmetros ou o pool do conector (postgres_pool.PoolConexoes).
+    """
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    with _conexao(conn_params) as conn:
+        try:
+            with conn.cursor() as cur:
+                non_empty = (chunk for chunk in _as_chunks(fake_data) if chunk[1])
+                for table, chunks in groupby(non_empty, key=lambda chunk: chunk[0]):
+                    if table == 'nome_schema':
+                        continue
+                    cols = [col['column'] for col in schema_metadata[table]['columns']]
+                    reader = _ChunkReader(generate_copy_rows(cols, rows) for _, rows in chunks)
+                    cur.copy_expert(f"COPY {nome_schema}.{table} ({', '.join(cols)}) FROM STDIN", reader, size=COPY_READ_SIZE)
+                    if on_table_loaded:
+                        on_table_loaded(table, cur.rowcount)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def iter_script_lines(parts: Iterable[bytes]) -> Iterator[str]:
+    """
+    Converte um fluxo de bytes UTF-8 (ex.: os blocos de um script persistido) em linhas, mantendo o '\n' final.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    for part in parts:
+        lines = (pending + decoder.decode(part)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
 
 
-def execute_inserts(conn_params: dict, sql: str):
+def _copy_section(lines: Iterator[str]) -> Iterator[str]:
+    # Linhas de dados de uma seção COPY do script, até o terminador \. (consumido aqui)
+    for line in lines:
+        if line.rstrip('\r\n') == '\\.':
+            return
+        yield line
+    raise ValueError("Script COPY truncado: terminador \\. não encontrado")
+
+
+def _replay_copy(cur, lines: Iterator[str], on_table_loaded=None):
+    for line in lines:
+        command = line.strip()
+        if not command:
+            continue
+        if not (command.upper().startswith('COPY ') and command.upper().endswith('FROM STDIN;')):
+            raise ValueError(f"Comando inesperado em script COPY: {command[:80]}")
+        cur.copy_expert(command[:-1], _ChunkReader(_copy_section(lines)), size=COPY_READ_SIZE)
+        if on_table_loaded:
+            on_table_loaded(command.split()[1], cur.rowcount)
+
+
+def _replay_inserts(cur, lines: Iterator[str], batch_bytes: int):
+    # Os lotes só são cortados depois de uma linha que termina um comando (';' fora de literal). Um valor texto pode
+    # conter quebras de linha seguidas de qualquer coisa, inclusive "INSERT INTO "; a paridade das aspas simples diz
+    # se a linha terminou dentro de um literal (a aspa escapada '' não altera a paridade)
+    batch: List[str] = []
+    size = 0
+    in_literal = False
+    for line in lines:
+        batch.append(line)
+        size += len(line)
+        if line.count("'") % 2:
+            in_literal = not in_literal
+        if size >= batch_bytes and not in_literal and line.rstrip().endswith(';'):
+            cur.execute(''.join(batch))
+            batch, size = [], 0
+    if ''.join(batch).strip():
+        cur.execute(''.join(batch))
+
+
+def load_sql_script(
+    conn_params,
+    parts: Iterable[bytes],
+    sql_format: str = 'insert',
+    batch_bytes: Optional[int] = None,
+    on_table_loaded: Optional[Callable[[str, int], None]] = None
+):
     """
-    Executa os comandos INSERT SQL na base de destino.
+    Carrega na base de destino um script já gerado (ex.: uma versão persistida), sem gerar os dados de novo.
+    Scripts no formato copy vão pelo COPY ... FROM STDIN, uma seção por tabela; no formato insert os comandos
+    são enviados em lotes de ~batch_bytes (padrão REPLAY_BATCH_BYTES). O script é consumido em streaming, em uma única transação.
+    conn_params pode ser um dict de parâmetros ou o pool do conector (postgres_pool.PoolConexoes).
     """
-    conn = psycopg2.connect(**conn_params)
-    cur = conn.cursor()
-    for statement in sql.split(';'):
-        stmt = statement.strip()
-        if stmt:
-            cur.execute(stmt)
-    conn.commit()
-    cur.close()
-    conn.close() 
\ No newline at end of file
+    lines = iter_script_lines(parts)
+    with _conexao(conn_params) as conn:
+        try:
+            with conn.cursor() as cur:
+                if sql_format == 'copy':
+                    _replay_copy(cur, lines, on_table_loaded)
+                else:
+                    _replay_inserts(cur, lines, batch_bytes or REPLAY_BATCH_BYTES)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
@@ -0,0 +1,233 @@
+"""
+Exportação dos dados gerados para arquivos: CSV, NDJSON ou Parquet, um arquivo por tabela, empacotados em zip ou tar.
+
+Os lotes de data_generation.iter_fake_data são consumidos em streaming: cada tabela tem um escritor em uma thread
+própria, alimentado por uma fila limitada a EXPORTACAO_LOTES_NA_FILA lotes, de modo que a geração da próxima tabela
+segue enquanto as anteriores terminam de ser gravadas e no máximo alguns lotes ficam em memória. Os arquivos vão
+para um diretório temporário e só então são empacotados.
+
+O CSV segue o formato aceito pelo COPY/\\copy do PostgreSQL (cabeçalho, NULL como campo vazio sem aspas, booleanos
+t/f): \\copy schema.tabela FROM 'tabela.csv' WITH (FORMAT csv, HEADER). Parquet depende do pyarrow, que é opcional:
+sem ele, apenas csv e ndjson ficam disponíveis.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Any, Dict, List, NamedTuple
+import json
+import os
+import queue
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from app.core.config import EXPORTACAO_LOTES_NA_FILA, EXPORTACAO_MAX_ESCRITORES
+from app.services import data_generation as dg
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+
+PYARROW_DISPONIVEL = pa is not None
+
+FORMATOS_ARQUIVO = ('csv', 'ndjson', 'parquet')
+EMPACOTAMENTOS = ('zip', 'tar', 'tar.gz')
+MEDIA_TYPES = {'zip': 'application/zip', 'tar': 'application/x-tar', 'tar.gz': 'application/gzip'}
+_FIM = object()
+
+
+class ArquivoExportado(NamedTuple):
+    arquivo: str
+    linhas: int
+    bytes: int
+
+
+def _csv_value(v: Any) -> str:
+    # NULL é o campo vazio sem aspas; a string vazia vai entre aspas para não virar NULL no COPY
+    if v is None:
+        return ''
+    if isinstance(v, bool):
+        return 't' if v else 'f'
+    if isinstance(v, str):
+        if v == '' or any(c in v for c in ',"\n\r'):
+            return '"' + v.replace('"', '""') + '"'
+        return v
+    return str(v)
+
+
+class _CsvWriter:
+    def __init__(self, caminho: str, columns: List[dict]):
+        self.cols = [col['column'] for col in columns]
+        self._f = open(caminho, 'w', encoding='utf-8', newline='')
+        self._f.write(','.join(_csv_value(c) for c in self.cols) + '\n')
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self._f.write(''.join(','.join(_csv_value(row[c]) for c in self.cols) + '\n' for row in rows))
+
+    def close(self):
+        self._f.close()
+
+
+class _NdjsonWriter:
+    def __init__(self, caminho: str, columns: List[dict]):
+        self.cols = [col['column'] for col in columns]
+        self._f = open(caminho, 'w', encoding='utf-8')
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self._f.write(''.join(
+            json.dumps({c: row[c] for c in self.cols}, ensure_ascii=False, default=str) + '\n' for row in rows
+        ))
+
+    def close(self):
+        self._f.close()
+
+
+def _arrow_type(col: dict):
+    tipo = (col.get('type') or '').lower()
+    if tipo in ('integer', 'bigint', 'smallint'):
+        return pa.int64()
+    if tipo in ('numeric', 'real', 'double precision'):
+        return pa.float64()
+    if tipo == 'boolean':
+        return pa.bool_()
+    if tipo == 'date':
+        return pa.date32()
+    if tipo == dg.TIMESTAMP_WO_TZ:
+        return pa.timestamp('us')
+    return pa.string()
+
+
+def _arrow_array(values: List[Any], tipo):
+    try:
+        return pa.array(values, type=tipo)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Datas e timestamps chegam como texto (e fallbacks podem trazer texto em colunas numéricas): converte pelo cast
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string()).cast(tipo)
+
+
+class _ParquetWriter:
+    def __init__(self, caminho: str, columns: List[dict]):
+        self.cols = [col['column'] for col in columns]
+        self.schema = pa.schema([(col['column'], _arrow_type(col)) for col in columns])
+        self._writer = pq.ParquetWriter(caminho, self.schema)
+
+    def write(self, rows: List[Dict[str, Any]]):
+        arrays = [_arrow_array([row[c] for row in rows], field.type) for c, field in zip(self.cols, self.schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_ESCRITORES = {'csv': _CsvWriter, 'ndjson': _NdjsonWriter, 'parquet': _ParquetWriter}
+
+
+def validar_formato(formato: str):
+    if formato not in FORMATOS_ARQUIVO:
+        raise ValueError(f"formato deve ser um de {FORMATOS_ARQUIVO}")
+    if formato == 'parquet' and not PYARROW_DISPONIVEL:
+        raise ValueError("formato 'parquet' indisponível: pacote pyarrow não instalado")
+
+
+def _write_table(writer, fila: "queue.Queue") -> int:
+    # Sempre drena a fila até o fim, mesmo após um erro, para não bloquear quem produz os lotes
+    linhas = 0
+    erro = None
+    while True:
+        rows = fila.get()
+        if rows is _FIM:
+            break
+        if erro is None:
+            try:
+                writer.write(rows)
+                linhas += len(rows)
+            except Exception as e:
+                erro = e
+    try:
+        writer.close()
+    finally:
+        if erro is not None:
+            raise erro
+    return linhas
+
+
+def export_tables(
+    schema_metadata: Dict[str, Any],
+    fake_data,
+    diretorio: str,
+    formato: str = 'csv',
+    max_escritores: int = EXPORTACAO_MAX_ESCRITORES
+) -> Dict[str, ArquivoExportado]:
+    """
+    Grava cada tabela em diretorio/<tabela>.<formato>, consumindo os lotes em streaming.
+    Os lotes de uma mesma tabela devem ser consecutivos, como em iter_fake_data.
+    """
+    validar_formato(formato)
+    escritor = _ESCRITORES[formato]
+    tarefas = {}
+    non_empty = (chunk for chunk in dg._as_chunks(fake_data) if chunk[1])
+    with ThreadPoolExecutor(max_workers=max(1, max_escritores), thread_name_prefix="exportacao") as executor:
+        for table, chunks in groupby(non_empty, key=lambda chunk: chunk[0]):
+            if table == 'nome_schema':
+                continue
+            if table in tarefas:
+                raise ValueError(f"Lotes da tabela {table} não são consecutivos")
+            arquivo = f"{table}.{formato}"
+            fila = queue.Queue(maxsize=EXPORTACAO_LOTES_NA_FILA)
+            writer = escritor(os.path.join(diretorio, arquivo), schema_metadata[table]['columns'])
+            tarefas[table] = (arquivo, executor.submit(_write_table, writer, fila))
+            try:
+                for _, rows in chunks:
+                    fila.put(rows)
+            finally:
+                fila.put(_FIM)
+    return {
+        table: ArquivoExportado(arquivo, future.result(), os.path.getsize(os.path.join(diretorio, arquivo)))
+        for table, (arquivo, future) in tarefas.items()
+    }
+
+
+def package(diretorio: str, arquivos: List[str], destino: str, empacotamento: str = 'zip'):
+    """
+    Empacota os arquivos de diretorio em destino (zip, tar ou tar.gz).
+    """
+    if empacotamento == 'zip':
+        with zipfile.ZipFile(destino, 'w', allowZip64=True) as zf:
+            for arquivo in arquivos:
+                # Parquet já é comprimido por coluna: comprimir de novo só gasta CPU
+                compressao = zipfile.ZIP_STORED if arquivo.endswith('.parquet') else zipfile.ZIP_DEFLATED
+                zf.write(os.path.join(diretorio, arquivo), arquivo, compress_type=compressao)
+    elif empacotamento in ('tar', 'tar.gz'):
+        with tarfile.open(destino, 'w:gz' if empacotamento == 'tar.gz' else 'w') as tf:
+            for arquivo in arquivos:
+                tf.add(os.path.join(diretorio, arquivo), arquivo)
+    else:
+        raise ValueError(f"empacotamento deve ser um de {EMPACOTAMENTOS}")
+
+
+def export_archive(
+    schema_metadata: Dict[str, Any],
+    fake_data,
+    destino: str,
+    formato: str = 'csv',
+    empacotamento: str = 'zip',
+    max_escritores: int = EXPORTACAO_MAX_ESCRITORES
+) -> Dict[str, ArquivoExportado]:
+    """
+    Exporta as tabelas e grava o pacote em destino; os arquivos intermediários são removidos ao final.
+    """
+    if empacotamento not in EMPACOTAMENTOS:
+        raise ValueError(f"empacotamento deve ser um de {EMPACOTAMENTOS}")
+    trabalho = tempfile.mkdtemp(prefix="exportacao_", dir=os.path.dirname(os.path.abspath(destino)))
+    try:
+        arquivos = export_tables(schema_metadata, fake_data, trabalho, formato, max_escritores)
+        package(trabalho, [a.arquivo for a in arquivos.values()], destino, empacotamento)
+        return arquivos
+    finally:
+        shutil.rmtree(trabalho, ignore_errors=True)
+
+
+def nome_pacote(nome_schema: str, formato: str, empacotamento: str) -> str:
+    return f"{nome_schema}_{formato}.{empacotamento}"
@@ -0,0 +1,205 @@
+"""
+Execução assíncrona de gerações de dados: o job é registrado no MongoDB e processado por um executor em segundo plano,
+que publica o progresso por tabela (linhas geradas/inseridas) e atende pedidos de cancelamento entre os lotes.
+No encerramento da aplicação (encerrar), os jobs deste processo são interrompidos e marcados com erro antes de os
+clientes do MongoDB serem fechados, para nenhum ficar "executando" para sempre.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+import uuid
+
+from app.core.config import JOBS_MAX_WORKERS, JOBS_ENCERRAMENTO_TIMEOUT
+from app.core.logging import logger
+from app.db.crud import jobs as crud_jobs, dados_sinteticos as crud_dados_sinteticos
+from app.services import data_generation, parallel_loading
+from app.services.schema_cache import schema_cache
+
+STATUS_PENDENTE = 'pendente'
+STATUS_EXECUTANDO = 'executando'
+STATUS_CONCLUIDO = 'concluido'
+STATUS_ERRO = 'erro'
+STATUS_CANCELADO = 'cancelado'
+STATUS_FINAIS = (STATUS_CONCLUIDO, STATUS_ERRO, STATUS_CANCELADO)
+
+# Intervalo mínimo entre consultas ao MongoDB pelo flag de cancelamento (pedidos vindos de outras réplicas)
+INTERVALO_VERIFICACAO_CANCELAMENTO = 1.0
+ERRO_ENCERRAMENTO = "Job interrompido pelo encerramento da aplicação"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_cancelamentos: Dict[str, threading.Event] = {}
+# Jobs submetidos por este processo e ainda não finalizados: job_id -> (future, coleção de jobs)
+_futuros: Dict[str, Tuple[Future, Any]] = {}
+_interrompidos = set()
+
+
+class JobCancelado(Exception):
+    pass
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOBS_MAX_WORKERS, thread_name_prefix="job-geracao")
+        return _executor
+
+
+class _ControleCancelamento:
+    def __init__(self, job_id: str, collection):
+        self.job_id = job_id
+        self.collection = collection
+        self.evento = _cancelamentos.setdefault(job_id, threading.Event())
+        self._ultima_consulta = 0.0
+
+    def verificar(self):
+        agora = time.monotonic()
+        if not self.evento.is_set() and agora - self._ultima_consulta >= INTERVALO_VERIFICACAO_CANCELAMENTO:
+            self._ultima_consulta = agora
+            if crud_jobs.cancelamento_solicitado(self.job_id, self.collection):
+                self.evento.set()
+        if self.evento.is_set():
+            raise JobCancelado(f"Job {self.job_id} cancelado")
+
+
+def _acompanhar_lotes(job_id: str, chunks, collection, controle: _ControleCancelamento):
+    for table, rows in chunks:
+        controle.verificar()
+        crud_jobs.incrementar_progresso(job_id, table, 'linhas_geradas', len(rows), collection)
+        yield table, rows
+
+
+def criar_job(nome_schema: str, conector_nome: str, parametros: Dict[str, Any], collection) -> str:
+    """
+    Registra um novo job de geração com status pendente e devolve seu identificador.
+    """
+    job_id = uuid.uuid4().hex
+    crud_jobs.insert_job({
+        "job_id": job_id,
+        "nome_schema": nome_schema,
+        "conector_nome": conector_nome,
+        "parametros": parametros,
+        "status": STATUS_PENDENTE,
+        "progresso": {},
+        "cancelamento_solicitado": False,
+        "criado_em": datetime.utcnow(),
+    }, collection)
+    return job_id
+
+
+def submeter_job(job_id: str, schema: Dict[str, Any], conn_params: dict, parametros: Dict[str, Any], jobs_col, dados_sint_col):
+    """
+    Agenda a execução do job no executor em segundo plano e retorna imediatamente.
+    """
+    _cancelamentos.setdefault(job_id, threading.Event())
+    futuro = _get_executor().submit(executar_job, job_id, schema, conn_params, parametros, jobs_col, dados_sint_col)
+    _futuros[job_id] = (futuro, jobs_col)
+    futuro.add_done_callback(lambda _: _futuros.pop(job_id, None))
+
+
+def solicitar_cancelamento(job_id: str, collection) -> bool:
+    """
+    Marca o job para cancelamento; o executor interrompe no próximo lote (com rollback da carga).
+    """
+    if not crud_jobs.solicitar_cancelamento(job_id, collection):
+        return False
+    evento = _cancelamentos.get(job_id)
+    if evento:
+        evento.set()
+    return True
+
+
+def executar_job(job_id: str, schema: Dict[str, Any], conn_params: dict, parametros: Dict[str, Any], jobs_col, dados_sint_col):
+    """
+    Executa a geração (e a carga, no modo executar) de um job, atualizando status e progresso no MongoDB.
+    """
+    controle = _ControleCancelamento(job_id, jobs_col)
+    nome_schema = schema.get('nome_schema')
+    try:
+        controle.verificar()
+        crud_jobs.update_job(job_id, {"status": STATUS_EXECUTANDO, "iniciado_em": datetime.utcnow()}, jobs_col)
+        chunks = data_generation.iter_fake_data(
+            schema, parametros['rows_per_table'], conn_params=conn_params,
+            chunk_size=parametros['chunk_size'], engine=parametros['engine'], workers=parametros['workers'],
+            reservar_ids=parametros.get('reservar_ids', False),
+            plans=schema_cache.planos(nome_schema, schema, parametros['engine']), seed=parametros.get('seed')
+        )
+        chunks = _acompanhar_lotes(job_id, chunks, jobs_col, controle)
+        if parametros['modo'] == 'sql':
+            # Gravado em blocos à medida que é gerado: o script nunca fica inteiro em memória
+            linhas: Dict[str, int] = {}
+            linhas_por_insert = parametros.get('linhas_por_insert', 1)
+            partes = (
+                bloco + '\n'
+                for bloco in data_generation.iter_insert_sql(schema, data_generation.count_rows(chunks, linhas), linhas_por_insert)
+            )
+            metadados = crud_dados_sinteticos.gravar_script(
+                nome_schema, partes, dados_sint_col, linhas=linhas,
+                rows_per_table=parametros['rows_per_table'], formato_sql='insert',
+                versao_schema=parametros.get('versao_schema'), seed=parametros.get('seed'), linhas_por_insert=linhas_por_insert,
+                engine=parametros['engine'], chunk_size=parametros['chunk_size'], updated_at=datetime.utcnow()
+            )
+            resultado = {
+                "sql_persistido": True, "versao": metadados["script_id"], "bytes": metadados["bytes"], "sha256": metadados["sha256"]
+            }
+        else:
+            def tabela_carregada(table, linhas):
+                crud_jobs.incrementar_progresso(job_id, table, 'linhas_inseridas', linhas, jobs_col)
+            parallel_loading.carregar(
+                conn_params, schema, chunks, parametros['rows_per_table'], parametros.get('metodo_carga', 'copy'),
+                parametros.get('linhas_por_insert', 1), parametros.get('conexoes_carga', 1),
+                parametros.get('recriar_indices', False), on_table_loaded=tabela_carregada
+            )
+            resultado = {"sql_persistido": False}
+        crud_jobs.update_job(job_id, {
+            "status": STATUS_CONCLUIDO, "finalizado_em": datetime.utcnow(), "resultado": resultado
+        }, jobs_col)
+        logger.info(f"Job {job_id} concluído para schema {nome_schema}")
+    except JobCancelado:
+        if job_id in _interrompidos:
+            crud_jobs.update_job(job_id, {
+                "status": STATUS_ERRO, "finalizado_em": datetime.utcnow(), "erro": ERRO_ENCERRAMENTO
+            }, jobs_col)
+            logger.info(f"Job {job_id} interrompido pelo encerramento da aplicação")
+        else:
+            crud_jobs.update_job(job_id, {"status": STATUS_CANCELADO, "finalizado_em": datetime.utcnow()}, jobs_col)
+            logger.info(f"Job {job_id} cancelado")
+    except Exception as e:
+        logger.error(f"Erro no job {job_id}: {e}")
+        crud_jobs.update_job(job_id, {"status": STATUS_ERRO, "finalizado_em": datetime.utcnow(), "erro": str(e)}, jobs_col)
+    finally:
+        _cancelamentos.pop(job_id, None)
+
+
+def encerrar(timeout: float = JOBS_ENCERRAMENTO_TIMEOUT):
+    """
+    Interrompe os jobs deste processo no encerramento da aplicação (antes de fechar os clientes do MongoDB): os
+    pendentes não começam, os em execução param no próximo lote e registram o erro. Os que não pararem em `timeout`
+    segundos (ex.: presos em um COPY longo) são marcados com erro daqui.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is None:
+        return
+    futuros = dict(_futuros)
+    _interrompidos.update(futuros)
+    for job_id in futuros:
+        _cancelamentos.setdefault(job_id, threading.Event()).set()
+    executor.shutdown(wait=False, cancel_futures=True)
+    # Futuros cancelados pelo shutdown nunca contam como concluídos para wait(): ficam de fora da espera
+    _, pendentes = wait([futuro for futuro, _ in futuros.values() if not futuro.cancelled()], timeout=timeout)
+    for job_id, (futuro, jobs_col) in futuros.items():
+        if futuro.cancelled() or futuro in pendentes:
+            if futuro.cancelled():
+                _cancelamentos.pop(job_id, None)
+            try:
+                crud_jobs.update_job(job_id, {
+                    "status": STATUS_ERRO, "finalizado_em": datetime.utcnow(), "erro": ERRO_ENCERRAMENTO
+                }, jobs_col)
+            except Exception as e:
+                logger.error(f"Não foi possível marcar o job {job_id} como interrompido: {e}")
+    _interrompidos.difference_update(job_id for job_id, (futuro, _) in futuros.items() if futuro.done())
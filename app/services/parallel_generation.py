@@ -0,0 +1,93 @@
+"""
+Geração de dados fake em um pool de processos.
+
+As tabelas são agrupadas em níveis de dependência (data_generation.topological_levels). Dentro de um nível,
+tabelas independentes e lotes de uma mesma tabela são gerados em processos separados; um nível só começa
+depois que todos os lotes do nível anterior foram consumidos, pois seus pools de chaves alimentam as FKs.
+Os valores de FK de cada lote são sorteados no processo principal e enviados junto com a tarefa, de modo que
+apenas as chaves efetivamente usadas atravessam a fronteira entre processos. Como na geração sequencial, cada lote
+usa fluxos aleatórios derivados de (seed, tabela, início do lote): com seed, o resultado independe do número de processos.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import multiprocessing
+
+from app.services import data_generation as dg, uniqueness
+
+# Estado de cada processo do pool, definido uma única vez pelo initializer
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(schema_metadata: Dict[str, Any], pk_start_vals: Dict[Tuple[str, str], int], engine: str, seed: Optional[int] = None):
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(schema=schema_metadata, pk_start_vals=pk_start_vals, engine=engine, seed=seed, generators={})
+
+
+def _generate_chunk_task(table: str, start: int, end: int, fk_values: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    generators = _WORKER_STATE['generators']
+    generate_chunk = generators.get(table)
+    if generate_chunk is None:
+        generate_chunk = dg._bind_chunk_generator(
+            _WORKER_STATE['engine'], table, _WORKER_STATE['schema'][table], _WORKER_STATE['pk_start_vals'], None,
+            seed=_WORKER_STATE['seed']
+        )
+        generators[table] = generate_chunk
+    rows = generate_chunk(start, end)
+    dg.apply_fk_values(rows, fk_values)
+    return rows
+
+
+def iter_parallel_chunks(
+    schema_metadata: Dict[str, Any],
+    rows_per_table,
+    pk_start_vals: Dict[Tuple[str, str], int],
+    chunk_size: int,
+    engine: str,
+    workers: int,
+    seed: Optional[int] = None,
+    existing_keys: Optional[Dict[Tuple[str, str], List[Any]]] = None
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Produz os mesmos lotes (tabela, linhas) de data_generation.iter_fake_data, gerados por até `workers` processos.
+    No máximo 2 * workers lotes ficam em andamento ao mesmo tempo, mantendo a memória limitada.
+    """
+    referenced = dg._referenced_columns(schema_metadata)
+    fk_pools = dg._new_fk_pools(referenced, existing_keys)
+    guards = uniqueness.build_unique_guards(schema_metadata, rows_per_table, seed, fk_pools, existing_keys)
+    fk_columns = {
+        table: dg.table_fk_columns(dg.compile_table_plan(meta))
+        for table, meta in schema_metadata.items() if table != 'nome_schema'
+    }
+    max_in_flight = workers * 2
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(schema_metadata, pk_start_vals, engine, seed)
+    )
+
+    def consume(pending):
+        table, start, future = pending.popleft()
+        rows = future.result()
+        if table in guards:
+            guards[table].apply(rows, start)
+        if referenced.get(table):
+            dg._feed_fk_pools(fk_pools, table, referenced[table], rows)
+        return table, rows
+
+    try:
+        for level in dg.topological_levels(schema_metadata):
+            pending = deque()
+            for table in level:
+                total = dg._table_rows(rows_per_table, table)
+                for start in range(0, total, chunk_size):
+                    end = min(start + chunk_size, total)
+                    fk_values = dg.sample_fk_values(seed, table, start, end, fk_columns[table], fk_pools)
+                    pending.append((table, start, executor.submit(_generate_chunk_task, table, start, end, fk_values)))
+                    if len(pending) >= max_in_flight:
+                        yield consume(pending)
+            while pending:
+                yield consume(pending)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,221 @@
+"""
+Carga dos dados gerados na base de destino por várias conexões ao mesmo tempo.
+
+Cada lote (tabela, linhas) de data_generation.iter_fake_data vira um shard, carregado em sua própria conexão e
+transação (COPY ou INSERT de várias linhas). Os shards de uma tabela só começam depois que todos os shards das
+tabelas de que ela depende (depends_on) foram confirmados: as FKs são verificadas normalmente, contra linhas já
+commitadas. As conexões simultâneas de um conector são limitadas por CARGA_PARALELA_MAX_CONEXOES (e pelo máximo
+do pool), mesmo com várias cargas em andamento.
+Diferente da carga sequencial, a carga não é atômica: se um shard falhar, os já confirmados permanecem no banco.
+
+Opcionalmente, nas tabelas indicadas (as muito grandes) os índices que não sustentam constraints são removidos e os
+triggers de usuário desativados durante a carga; ao final, mesmo com erro, os índices são recriados em paralelo e
+os triggers reativados.
+
+carregar é o ponto de entrada único da carga no modo executar (endpoints e jobs): escolhe entre a carga paralela e
+a sequencial (COPY ou INSERTs, de uma ou várias linhas por comando).
+"""
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import threading
+import weakref
+
+from app.core.config import CARGA_PARALELA_MAX_CONEXOES, CARGA_RECRIAR_INDICES_MIN_LINHAS
+from app.core.logging import logger
+from app.db import postgres_pool
+from app.services import data_generation as dg
+
+METODOS_CARGA = ('copy', 'insert')
+
+# Índices da tabela que não sustentam nenhuma constraint (PK, UNIQUE, exclusão ou alvo de FK)
+SQL_INDICES_AVULSOS = """
+SELECT quote_ident(i.indexname), i.indexdef
+FROM pg_indexes i
+WHERE i.schemaname = %s AND i.tablename = %s
+  AND NOT EXISTS (
+    SELECT 1 FROM pg_constraint c
+    WHERE c.conindid = (quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))::regclass
+  )
+"""
+
+# Um semáforo por pool de conector, compartilhado por todas as cargas paralelas que o usam
+_limites: "weakref.WeakKeyDictionary[postgres_pool.PoolConexoes, threading.BoundedSemaphore]" = weakref.WeakKeyDictionary()
+_limites_lock = threading.Lock()
+
+
+def connector_limit(conn_source) -> threading.BoundedSemaphore:
+    """
+    Semáforo que limita as conexões simultâneas de carga paralela no conector.
+    Para um dict de parâmetros (sem pool) o limite vale apenas para a carga em questão.
+    """
+    if not isinstance(conn_source, postgres_pool.PoolConexoes):
+        return threading.BoundedSemaphore(CARGA_PARALELA_MAX_CONEXOES)
+    with _limites_lock:
+        limite = _limites.get(conn_source)
+        if limite is None:
+            limite = threading.BoundedSemaphore(max(1, min(CARGA_PARALELA_MAX_CONEXOES, conn_source.maxconn)))
+            _limites[conn_source] = limite
+        return limite
+
+
+def _execute(conn_source, commands: List[str]):
+    with dg._conexao(conn_source) as conn:
+        try:
+            with conn.cursor() as cur:
+                for command in commands:
+                    cur.execute(command)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def drop_indexes(conn_source, nome_schema: str, tables: Iterable[str]) -> List[str]:
+    """
+    Remove os índices avulsos e desativa os triggers de usuário das tabelas, em uma transação.
+    Devolve os CREATE INDEX necessários para recriar os índices removidos.
+    """
+    indexdefs = []
+    with dg._conexao(conn_source) as conn:
+        try:
+            with conn.cursor() as cur:
+                for table in tables:
+                    cur.execute(SQL_INDICES_AVULSOS, (nome_schema, table))
+                    for name, indexdef in cur.fetchall():
+                        cur.execute(f"DROP INDEX {nome_schema}.{name}")
+                        indexdefs.append(indexdef)
+                    cur.execute(f"ALTER TABLE {nome_schema}.{table} DISABLE TRIGGER USER")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return indexdefs
+
+
+def restore_indexes(conn_source, nome_schema: str, tables: Iterable[str], indexdefs: List[str], connections: int):
+    """
+    Recria os índices removidos por drop_indexes (um por conexão, em paralelo) e reativa os triggers de usuário.
+    """
+    limite = connector_limit(conn_source)
+
+    def create(indexdef):
+        with limite:
+            _execute(conn_source, [indexdef])
+
+    with ThreadPoolExecutor(max_workers=max(1, connections), thread_name_prefix="indices") as executor:
+        futures = [executor.submit(create, indexdef) for indexdef in indexdefs]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    _execute(conn_source, [f"ALTER TABLE {nome_schema}.{table} ENABLE TRIGGER USER" for table in tables])
+    if errors:
+        raise errors[0]
+
+
+def _load_shard(conn_source, schema_metadata, limite, method: str, page_size: int, table: str, rows, on_table_loaded):
+    with limite:
+        if method == 'copy':
+            dg.copy_fake_data(conn_source, schema_metadata, [(table, rows)], on_table_loaded)
+        else:
+            dg.insert_fake_data(conn_source, schema_metadata, [(table, rows)], page_size, on_table_loaded)
+
+
+def parallel_load(
+    conn_source,
+    schema_metadata: Dict[str, Any],
+    fake_data,
+    connections: int,
+    method: str = 'copy',
+    page_size: int = dg.INSERT_PAGE_SIZE,
+    rebuild_tables: Iterable[str] = (),
+    on_table_loaded: Optional[Callable[[str, int], None]] = None
+):
+    """
+    Carrega os lotes de iter_fake_data (em ordem topológica) por até `connections` conexões simultâneas.
+    method é 'copy' (COPY ... FROM STDIN) ou 'insert' (execute_values com page_size linhas por comando).
+    Nas tabelas de rebuild_tables, índices avulsos e triggers de usuário ficam desligados durante a carga.
+    on_table_loaded(tabela, linhas) é chamado a cada shard confirmado, a partir das threads de carga.
+    """
+    if method not in METODOS_CARGA:
+        raise ValueError(f"Método de carga inválido: {method}")
+    nome_schema = schema_metadata.get('nome_schema', 'public')
+    connections = max(1, connections)
+    limite = connector_limit(conn_source)
+    rebuild_tables = [t for t in rebuild_tables if t != 'nome_schema' and t in schema_metadata]
+    indexdefs = drop_indexes(conn_source, nome_schema, rebuild_tables) if rebuild_tables else []
+    # Shards ainda não aguardados por tabela; no máximo 2 * connections lotes ficam em memória
+    shards: Dict[str, List[Future]] = defaultdict(list)
+    in_flight = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="carga") as executor:
+            try:
+                for table, rows in dg._as_chunks(fake_data):
+                    if table == 'nome_schema' or not rows:
+                        continue
+                    for parent in schema_metadata[table].get('depends_on', []):
+                        for future in shards.pop(parent, []):
+                            future.result()
+                    while len(in_flight) >= connections * 2:
+                        in_flight.popleft().result()
+                    future = executor.submit(
+                        _load_shard, conn_source, schema_metadata, limite, method, page_size, table, rows, on_table_loaded
+                    )
+                    shards[table].append(future)
+                    in_flight.append(future)
+                for future in in_flight:
+                    future.result()
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+    finally:
+        if rebuild_tables:
+            logger.info(f"Recriando {len(indexdefs)} índices e reativando triggers em {nome_schema}: {', '.join(rebuild_tables)}")
+            restore_indexes(conn_source, nome_schema, rebuild_tables, indexdefs, connections)
+
+
+def large_tables(schema_metadata: Dict[str, Any], rows_per_table, min_rows: int = CARGA_RECRIAR_INDICES_MIN_LINHAS) -> List[str]:
+    """
+    Tabelas que recebem ao menos min_rows linhas: nelas vale recriar os índices depois da carga.
+    """
+    return [
+        table for table in schema_metadata
+        if table != 'nome_schema' and dg._table_rows(rows_per_table, table) >= min_rows
+    ]
+
+
+def _avisando_lotes(chunks, on_table_loaded: Callable[[str, int], None]):
+    for table, rows in chunks:
+        yield table, rows
+        on_table_loaded(table, len(rows))
+
+
+def carregar(
+    conn_params,
+    schema_metadata: Dict[str, Any],
+    chunks: Iterable,
+    rows_per_table,
+    metodo_carga: str = 'copy',
+    linhas_por_insert: int = 1,
+    conexoes_carga: int = 1,
+    recriar_indices: bool = False,
+    on_table_loaded: Optional[Callable[[str, int], None]] = None
+):
+    """
+    Carrega os lotes gerados no modo executar. Com conexoes_carga > 1 ou recriar_indices a carga é paralela
+    (parallel_load); senão acontece em uma transação, via COPY ou INSERTs. Um INSERT por linha mantém o
+    comportamento original. Com linhas_por_insert > 1 a carga vai pelo execute_values.
+    """
+    if conexoes_carga > 1 or recriar_indices:
+        parallel_load(
+            conn_params, schema_metadata, chunks, conexoes_carga, method=metodo_carga,
+            page_size=linhas_por_insert if linhas_por_insert > 1 else dg.INSERT_PAGE_SIZE, on_table_loaded=on_table_loaded,
+            rebuild_tables=large_tables(schema_metadata, rows_per_table) if recriar_indices else ()
+        )
+    elif metodo_carga == 'copy':
+        dg.copy_fake_data(conn_params, schema_metadata, chunks, on_table_loaded=on_table_loaded)
+    elif linhas_por_insert > 1:
+        dg.insert_fake_data(conn_params, schema_metadata, chunks, page_size=linhas_por_insert, on_table_loaded=on_table_loaded)
+    else:
+        if on_table_loaded:
+            chunks = _avisando_lotes(chunks, on_table_loaded)
+        dg.execute_inserts(conn_params, dg.iter_insert_sql(schema_metadata, chunks))
@@ -0,0 +1,180 @@
+"""
+Cache dos scripts gerados no modo sql, endereçado pelo conteúdo.
+
+Com seed a geração é determinística (ver data_generation.iter_fake_data): o script depende apenas do documento do
+schema, de rows_per_table, da seed, do engine, do chunk_size, do formato (e linhas por INSERT) e das PKs iniciais lidas do banco de destino.
+A chave é o sha256 desses parâmetros, e também serve de ETag: mudou qualquer um deles, muda a chave — não há
+invalidação. Sem seed o resultado é aleatório por definição e não passa por este cache.
+
+O primeiro nível fica em memória (LRU limitado pelo tamanho dos scripts, CACHE_RESULTADOS_MAX_BYTES). Com
+CACHE_RESULTADOS_DIR definido há um segundo nível em disco, compartilhado entre processos e reinícios, limitado a
+CACHE_RESULTADOS_DISCO_MAX_BYTES (os arquivos menos usados são removidos primeiro); um acerto no disco volta para a memória.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from app.core.config import CACHE_RESULTADOS_MAX_BYTES, CACHE_RESULTADOS_DIR, CACHE_RESULTADOS_DISCO_MAX_BYTES
+from app.core.logging import logger
+from app.db.crud.schemas import CAMPO_VERSAO
+
+# Incrementar quando a saída do gerador mudar para a mesma seed: as entradas antigas (inclusive em disco) deixam de valer
+VERSAO_GERADOR = 3
+EXTENSAO = ".json"
+
+
+class ResultadoCache(NamedTuple):
+    sql: str
+    linhas: Dict[str, int]
+    bytes: int
+
+
+def chave_resultado(
+    schema: Dict[str, Any],
+    rows_per_table: int,
+    seed: int,
+    pk_start_vals: Dict[Tuple[str, str], int],
+    formato_sql: str,
+    engine: str,
+    chunk_size: int,
+    linhas_por_insert: int = 1
+) -> str:
+    """
+    sha256 dos parâmetros que determinam o script gerado com seed.
+    """
+    documento = {k: v for k, v in schema.items() if k not in ("_id", CAMPO_VERSAO)}
+    partes = {
+        "versao_gerador": VERSAO_GERADOR,
+        "schema": documento,
+        "rows_per_table": rows_per_table,
+        "seed": seed,
+        "pks": sorted([table, column, valor] for (table, column), valor in pk_start_vals.items()),
+        "formato_sql": formato_sql,
+        "linhas_por_insert": linhas_por_insert,
+        "engine": engine,
+        "chunk_size": chunk_size,
+    }
+    return hashlib.sha256(json.dumps(partes, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class CacheResultados:
+    def __init__(self, max_bytes: int = CACHE_RESULTADOS_MAX_BYTES, diretorio: Optional[str] = CACHE_RESULTADOS_DIR or None,
+                 max_bytes_disco: int = CACHE_RESULTADOS_DISCO_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.diretorio = diretorio
+        self.max_bytes_disco = max_bytes_disco
+        self._itens: "OrderedDict[str, ResultadoCache]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "despejos": 0}
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave + EXTENSAO)
+
+    def _guardar_memoria(self, chave: str, resultado: ResultadoCache):
+        if resultado.bytes > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior.bytes
+            self._itens[chave] = resultado
+            self._bytes += resultado.bytes
+            while self._bytes > self.max_bytes:
+                _, despejado = self._itens.popitem(last=False)
+                self._bytes -= despejado.bytes
+                self._stats["despejos"] += 1
+
+    def _ler_disco(self, chave: str) -> Optional[ResultadoCache]:
+        if not self.diretorio:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                doc = json.load(f)
+            os.utime(caminho)  # o mtime marca o último uso para o despejo do disco
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Entrada inválida no cache de resultados em disco ({caminho}): {e}")
+            return None
+        return ResultadoCache(doc["sql"], doc["linhas"], len(doc["sql"].encode('utf-8')))
+
+    def _gravar_disco(self, chave: str, resultado: ResultadoCache):
+        if not self.diretorio or resultado.bytes > self.max_bytes_disco:
+            return
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            # Grava em arquivo temporário e renomeia: leitores (inclusive de outros processos) nunca veem meio arquivo
+            fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"sql": resultado.sql, "linhas": resultado.linhas}, f)
+            os.replace(temporario, self._caminho(chave))
+            self._limitar_disco()
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar no cache de resultados em disco: {e}")
+
+    def _limitar_disco(self):
+        arquivos = []
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.endswith(EXTENSAO):
+                    info = entrada.stat()
+                    arquivos.append((info.st_mtime, info.st_size, entrada.path))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+
+    def obter(self, chave: str) -> Optional[ResultadoCache]:
+        """
+        Devolve o script em cache para a chave, procurando na memória e depois no disco.
+        """
+        with self._lock:
+            resultado = self._itens.get(chave)
+            if resultado is not None:
+                self._itens.move_to_end(chave)
+                self._stats["hits_memoria"] += 1
+                return resultado
+        resultado = self._ler_disco(chave)
+        with self._lock:
+            self._stats["hits_disco" if resultado is not None else "misses"] += 1
+        if resultado is not None:
+            self._guardar_memoria(chave, resultado)
+        return resultado
+
+    def armazenar(self, chave: str, sql: str, linhas: Dict[str, int]) -> ResultadoCache:
+        resultado = ResultadoCache(sql, dict(linhas), len(sql.encode('utf-8')))
+        self._guardar_memoria(chave, resultado)
+        self._gravar_disco(chave, resultado)
+        return resultado
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._stats["hits_memoria"] + self._stats["hits_disco"]
+            total = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disco": self.diretorio,
+                "taxa_acerto": round(hits / total, 4) if total else 0.0,
+            }
+
+
+cache_resultados = CacheResultados()
@@ -0,0 +1,113 @@
+"""
+Cache em memória (LRU limitado) dos documentos de schema e dos seus planos de geração compilados.
+
+Cada entrada guarda o documento junto com a versão lida do MongoDB (campo crud.schemas.CAMPO_VERSAO, incrementado
+em toda alteração). A cada leitura só a versão é consultada — uma projeção de poucos bytes — e o documento completo
+é recarregado apenas quando ela mudou, o que mantém as réplicas coerentes sem depender de change streams.
+Alterações feitas por esta réplica (update_schema, patch_tabela, delete_schema) também invalidam a entrada na hora.
+
+Os documentos e planos devolvidos são compartilhados entre requisições e devem ser tratados como somente leitura.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+import threading
+
+from app.core.config import SCHEMA_CACHE_MAX_ITENS
+from app.db.crud import schemas as crud_schemas
+from app.db.crud_async import schemas as crud_schemas_async
+from app.services import data_generation
+
+
+class _EntradaCache(NamedTuple):
+    versao: int
+    schema: Dict[str, Any]
+    planos: Dict[str, Dict[str, List[data_generation.ColumnPlan]]]  # engine -> tabela -> plano
+
+
+class SchemaCache:
+    def __init__(self, max_itens: int = SCHEMA_CACHE_MAX_ITENS):
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[str, _EntradaCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidacoes": 0, "despejos": 0}
+
+    def _consultar(self, nome_schema: str, versao: Optional[int]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entrada = self._itens.get(nome_schema)
+            if entrada is not None and versao is not None and entrada.versao == versao:
+                self._itens.move_to_end(nome_schema)
+                self._stats["hits"] += 1
+                return entrada.schema
+            self._stats["misses"] += 1
+            return None
+
+    def _armazenar(self, nome_schema: str, versao: Optional[int], schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if schema is None or versao is None:
+            self.invalidar(nome_schema)
+            return schema
+        # A versão foi lida antes do documento: se ele mudou nesse meio tempo, a próxima leitura recarrega
+        with self._lock:
+            self._itens[nome_schema] = _EntradaCache(versao, schema, {})
+            self._itens.move_to_end(nome_schema)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self._stats["despejos"] += 1
+        return schema
+
+    def obter(self, nome_schema: str, collection) -> Optional[Dict[str, Any]]:
+        """
+        Devolve o schema pelo nome, lendo do MongoDB apenas quando a versão em cache está desatualizada.
+        """
+        versao = crud_schemas.get_versao_schema(nome_schema, collection)
+        schema = self._consultar(nome_schema, versao)
+        if schema is not None:
+            return schema
+        return self._armazenar(nome_schema, versao, crud_schemas.get_schema_por_nome(nome_schema, collection))
+
+    async def obter_async(self, nome_schema: str, collection) -> Optional[Dict[str, Any]]:
+        """
+        Equivalente de obter() para a camada assíncrona (collection de app.db.mongo_async).
+        """
+        versao = await crud_schemas_async.get_versao_schema(nome_schema, collection)
+        schema = self._consultar(nome_schema, versao)
+        if schema is not None:
+            return schema
+        return self._armazenar(nome_schema, versao, await crud_schemas_async.get_schema_por_nome(nome_schema, collection))
+
+    def planos(self, nome_schema: str, schema: Dict[str, Any], engine: str) -> Optional[Dict[str, List[data_generation.ColumnPlan]]]:
+        """
+        Devolve os planos de geração (tabela -> plano) do schema em cache, compilando-os na primeira chamada.
+        Retorna None se `schema` não for o documento atualmente em cache para esse nome.
+        """
+        with self._lock:
+            entrada = self._itens.get(nome_schema)
+            if entrada is None or entrada.schema is not schema:
+                return None
+            planos = entrada.planos.get(engine)
+        if planos is None:
+            planos = data_generation.compile_schema_plans(schema, engine)
+            with self._lock:
+                entrada.planos.setdefault(engine, planos)
+        return planos
+
+    def invalidar(self, nome_schema: str):
+        with self._lock:
+            if self._itens.pop(nome_schema, None) is not None:
+                self._stats["invalidacoes"] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "taxa_acerto": round(self._stats["hits"] / total, 4) if total else 0.0,
+            }
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,299 @@
+"""
+Unicidade das colunas is_unique e das PKs compostas durante a geração.
+
+Colunas inteiras de PK ou únicas (sem FK nem CHECK) já saem de uma sequência e não colidem por construção. As demais
+(texto, datas, valores de CHECK, FKs que fazem parte da PK, ...) passam por uma guarda por tabela aplicada a cada lote,
+no processo principal e na ordem dos lotes: o resultado com seed continua independente do número de workers.
+Um valor repetido é gerado de novo (FKs são sorteadas de novo no pool) em um fluxo derivado de (seed, tabela, linha);
+se as tentativas se esgotarem, colunas sem CHECK recebem um valor derivado do índice da linha. Quando não há valores
+distintos suficientes (ex.: CHECK com 3 opções para 10 linhas únicas), a geração falha com ValueError em vez de
+produzir um lote que o banco rejeitaria.
+
+Os valores vistos ficam em um set por coluna (ou grupo de colunas); em tabelas acima de UNIQUE_EXACT_LIMIT linhas,
+em um filtro de Bloom de memória limitada. O filtro não tem falsos negativos, então nunca deixa passar um repetido,
+mas um falso positivo (UNIQUE_BLOOM_ERROR) descarta um valor livre sem nova verificação: com muitos valores possíveis
+isso só faz um valor novo ser gerado, mas perto da saturação pode fazer a geração falhar sem necessidade. Por isso
+grupos de domínio conhecido e pequeno (FKs, limitadas às linhas da tabela referenciada, booleanos e CHECKs de
+opções fixas, com produto até UNIQUE_EXACT_LIMIT) usam sempre o set exato, que não passa do tamanho do domínio.
+
+No complemento de dados, os valores que já estão no banco (unique_refs_for e dg.load_existing_keys, inclusive as
+tuplas das PKs compostas) são carregados na guarda antes da geração.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import itertools
+import math
+import random
+import uuid
+
+from app.services import data_generation as dg
+
+UNIQUE_EXACT_LIMIT = 1_000_000
+UNIQUE_BLOOM_ERROR = 0.001
+UNIQUE_MAX_ATTEMPTS = 20
+_DIGITS36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+class ExactSeen:
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, key) -> bool:
+        """Registra key; devolve False se ela já tinha sido vista."""
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+
+class BloomSeen:
+    """
+    Filtro de Bloom dimensionado para `capacity` chaves com taxa de falsos positivos `error`.
+    """
+    def __init__(self, capacity: int, error: float = UNIQUE_BLOOM_ERROR):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key) -> bool:
+        """Registra key; devolve False se ela (provavelmente) já tinha sido vista."""
+        novo = False
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                novo = True
+        return novo
+
+
+def new_seen(expected_rows: int, domain: Optional[int] = None):
+    if expected_rows <= UNIQUE_EXACT_LIMIT or (domain is not None and domain <= UNIQUE_EXACT_LIMIT):
+        return ExactSeen()
+    return BloomSeen(expected_rows)
+
+
+def _base36(n: int) -> str:
+    out = ''
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS36[r] + out
+        if not n:
+            return out
+
+
+def _fallback_value(col: dict, value: Any, idx: int) -> Any:
+    # Valor derivado do índice da linha (único na tabela), no mesmo tipo da coluna
+    t = col['type']
+    if t in (dg.CHARACTER_VARYING, 'character', 'text'):
+        token = '~' + _base36(idx)
+        try:
+            length = int(col.get('length') or (1 if t == 'character' else 0))
+        except (TypeError, ValueError):
+            length = 0
+        if length and len(token) > length:
+            return None
+        prefix = value if isinstance(value, str) else ''
+        return (prefix[:length - len(token)] if length else prefix) + token
+    if t in ('integer', 'bigint', 'numeric'):
+        return idx + 1
+    if t == 'uuid':
+        return str(uuid.UUID(int=idx + 1))
+    try:
+        if t == 'date':
+            return (date(2000, 1, 1) + timedelta(days=idx)).strftime('%Y-%m-%d')
+        if t == dg.TIMESTAMP_WO_TZ:
+            return (datetime(2000, 1, 1) + timedelta(seconds=idx)).strftime('%Y-%m-%d %H:%M:%S')
+    except OverflowError:
+        return None
+    return None
+
+
+class _UniqueGroup:
+    """
+    Colunas que juntas devem ser únicas (uma coluna is_unique ou a PK composta).
+    """
+    def __init__(
+        self, table: str, columns: List[dict], expected_rows: int, seed: Optional[int], fk_pools, domain: Optional[int] = None
+    ):
+        self.table = table
+        self.names = [col['column'] for col in columns]
+        self.seen = new_seen(expected_rows, domain)
+        self.seed = seed
+        self.regenerate: List[Tuple[str, Callable[[int, int], Any], Optional[dict]]] = []
+        # FKs do grupo: no último recurso, as combinações dos pools são percorridas em busca de uma chave não usada
+        self.fk_scan: List[Tuple[str, List[Any]]] = []
+        self._scan = None
+        self._scan_sizes = None
+        for col in columns:
+            if col.get('is_foreign_key') and col.get('references'):
+                pool = fk_pools.get((col['references']['table'], col['references']['column']))
+                self.regenerate.append((col['column'], self._fk_resampler(col['column'], pool), None))
+                if pool is not None:
+                    self.fk_scan.append((col['column'], pool))
+            else:
+                fallback_ok = col if not col.get('check_constraint') else None
+                self.regenerate.append((col['column'], self._value_regenerator(col), fallback_ok))
+
+    def _fk_resampler(self, column: str, pool) -> Callable[[int, int], Any]:
+        def resample(idx, attempt):
+            if not pool:
+                return None
+            return random.Random(dg.derive_seed(self.seed, self.table, idx, column, attempt)).choice(pool)
+        return resample
+
+    def _value_regenerator(self, col: dict) -> Callable[[int, int], Any]:
+        produce = dg._compile_value_column(col)
+
+        def regenerate(idx, attempt):
+            faker = dg.chunk_faker(dg.derive_seed(self.seed, self.table, idx, col['column'], attempt))
+            with dg._seeded_reference(self.seed):
+                return produce(idx, faker)
+        return regenerate
+
+    def _key(self, row):
+        # Mesma normalização das chaves lidas do banco (datas, Decimal e UUID como texto)
+        if len(self.names) == 1:
+            value = row[self.names[0]]
+            return None if value is None else dg._key_value(value)
+        key = tuple(row[c] for c in self.names)
+        return None if any(v is None for v in key) else tuple(dg._key_value(v) for v in key)
+
+    def _scan_candidates(self):
+        # Um único percurso do produto dos pools por grupo: uma combinação recusada continua vista para sempre, então
+        # cada uma é testada no máximo uma vez. Se um pool cresceu (FK para a própria tabela), o percurso recomeça.
+        sizes = [len(pool) for _, pool in self.fk_scan]
+        if self._scan is None or sizes != self._scan_sizes:
+            self._scan = itertools.product(*(list(pool) for _, pool in self.fk_scan))
+            self._scan_sizes = sizes
+        return self._scan
+
+    def preload(self, values):
+        for value in values:
+            self.seen.add(value)
+
+    def apply(self, row: Dict[str, Any], idx: int):
+        key = self._key(row)
+        if key is None or self.seen.add(key):
+            return
+        for attempt in range(1, UNIQUE_MAX_ATTEMPTS + 1):
+            for column, regenerate, _ in self.regenerate:
+                row[column] = regenerate(idx, attempt)
+            key = self._key(row)
+            if key is None or self.seen.add(key):
+                return
+        for column, _, fallback_col in self.regenerate:
+            fallback = _fallback_value(fallback_col, row[column], idx) if fallback_col is not None else None
+            if fallback is not None:
+                row[column] = fallback
+        key = self._key(row)
+        if key is None or self.seen.add(key):
+            return
+        if self.fk_scan and all(pool for _, pool in self.fk_scan):
+            columns = [column for column, _ in self.fk_scan]
+            for values in self._scan_candidates():
+                row.update(zip(columns, values))
+                key = self._key(row)
+                if key is None or self.seen.add(key):
+                    return
+        aviso = " (ou falsos positivos do filtro de Bloom, usado acima de UNIQUE_EXACT_LIMIT linhas)" \
+            if isinstance(self.seen, BloomSeen) else ""
+        raise ValueError(
+            f"Não foi possível gerar valores únicos para {self.table}({', '.join(self.names)}) na linha {idx + 1}: "
+            f"há menos valores distintos possíveis do que linhas pedidas{aviso}"
+        )
+
+
+class UniqueGuard:
+    """
+    Guarda de unicidade de uma tabela: apply(rows, start) corrige em lugar as linhas repetidas de um lote.
+    """
+    def __init__(self, groups: List[_UniqueGroup]):
+        self.groups = groups
+
+    def apply(self, rows: List[Dict[str, Any]], start: int) -> List[Dict[str, Any]]:
+        for offset, row in enumerate(rows):
+            for group in self.groups:
+                group.apply(row, start + offset)
+        return rows
+
+
+def unique_groups(table_meta: Dict[str, Any]) -> List[List[dict]]:
+    """
+    Grupos de colunas da tabela que precisam de verificação: cada coluna is_unique e a PK (simples ou composta),
+    exceto os grupos com uma coluna de sequência, que já não se repetem.
+    """
+    columns = table_meta['columns']
+    pk = [col for col in columns if col.get('is_primary_key')]
+    groups = [[col] for col in columns if col.get('is_unique') and not (len(pk) == 1 and col is pk[0])]
+    if pk:
+        groups.append(pk)
+    return [group for group in groups if not any(dg.is_sequence_column(col) for col in group)]
+
+
+def unique_refs_for(schema_metadata: Dict[str, Any], tables) -> List[Tuple[str, Any]]:
+    """
+    (tabela, coluna) das colunas únicas e (tabela, (colunas, ...)) das PKs compostas das tabelas informadas, no formato
+    de dg.load_existing_keys: os valores já existentes no banco entram na guarda no complemento de dados.
+    """
+    return [(table, group_ref(columns)) for table in tables for columns in unique_groups(schema_metadata[table])]
+
+
+def group_ref(columns: List[dict]):
+    names = tuple(col['column'] for col in columns)
+    return names[0] if len(names) == 1 else names
+
+
+def _domain_size(
+    columns: List[dict], rows_per_table, existing_keys: Dict[Tuple[str, Any], List[Any]]
+) -> Optional[int]:
+    # Quantidade máxima de chaves distintas do grupo, quando limitada; None se algum componente é ilimitado
+    from app.services import check_constraints
+    size = 1
+    for col in columns:
+        if col.get('is_foreign_key') and col.get('references'):
+            ref = (col['references']['table'], col['references']['column'])
+            size *= dg._table_rows(rows_per_table, ref[0]) + len(existing_keys.get(ref, ()))
+        elif col.get('check_constraint') and check_constraints.compile_check(col).choices is not None:
+            size *= len(set(map(repr, check_constraints.compile_check(col).choices)))
+        elif col['type'] in ('boolean', 'bool'):
+            size *= 2
+        else:
+            return None
+    return size
+
+
+def build_unique_guards(
+    schema_metadata: Dict[str, Any],
+    rows_per_table,
+    seed: Optional[int],
+    fk_pools: Dict[Tuple[str, str], List[Any]],
+    existing_keys: Optional[Dict[Tuple[str, str], List[Any]]] = None
+) -> Dict[str, UniqueGuard]:
+    """
+    Guardas de unicidade das tabelas que precisam delas. Valores já existentes no banco (existing_keys, no complemento
+    de dados, nas chaves de unique_refs_for) de colunas únicas e PKs compostas contam como vistos.
+    """
+    existing_keys = existing_keys or {}
+    guards = {}
+    for table, meta in schema_metadata.items():
+        if table == 'nome_schema':
+            continue
+        expected_rows = dg._table_rows(rows_per_table, table)
+        groups = []
+        for columns in unique_groups(meta):
+            existing = existing_keys.get((table, group_ref(columns)), ())
+            domain = _domain_size(columns, rows_per_table, existing_keys)
+            group = _UniqueGroup(table, columns, expected_rows + len(existing), seed, fk_pools, domain)
+            group.preload(existing)
+            groups.append(group)
+        if groups and expected_rows:
+            guards[table] = UniqueGuard(groups)
+    return guards
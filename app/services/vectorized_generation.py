@@ -0,0 +1,200 @@
+"""
+Motor de geração coluna a coluna baseado em NumPy.
+
+Cada coluna de um lote é gerada de uma só vez (inteiros, numéricos, booleanos, datas, timestamps,
+strings de tamanho fixo e valores de CHECK via choice). O Faker continua sendo usado apenas para os
+tipos sem equivalente vetorizado. NumPy é opcional: sem ele, apenas o motor 'faker' fica disponível.
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+import random
+import string
+import uuid
+
+from app.services import check_constraints, data_generation as dg
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+NUMPY_DISPONIVEL = np is not None
+
+if NUMPY_DISPONIVEL:
+    _LETRAS = np.frombuffer(string.ascii_letters.encode(), dtype=np.uint8)
+
+# Um produtor vetorizado recebe (rng, start, end) e devolve uma lista com end - start valores
+VectorProducer = Callable[[Any, int, int], List[Any]]
+
+
+def _fixed_strings(alfabeto, length: int) -> VectorProducer:
+    def produce(rng, start, end):
+        n = end - start
+        codes = alfabeto[rng.integers(0, len(alfabeto), size=(n, length))]
+        return codes.view(f'S{length}').ravel().astype(f'U{length}').tolist()
+    return produce
+
+
+def _choice(values: List[Any]) -> VectorProducer:
+    opcoes = list(values)
+    return lambda rng, start, end: [opcoes[i] for i in rng.integers(0, len(opcoes), size=end - start)]
+
+
+def _int_range(low: int, high: int) -> VectorProducer:
+    # Intervalo fechado [low, high]
+    return lambda rng, start, end: rng.integers(low, high + 1, size=end - start).tolist()
+
+
+def _numeric(rng, start, end):
+    # Equivalente a pydecimal(left_digits=5, right_digits=2): centavos inteiros em ±99999.99
+    return (rng.integers(-9_999_999, 10_000_000, size=end - start) / 100).round(2).tolist()
+
+
+def _boolean(rng, start, end):
+    return (rng.random(end - start) < 0.5).tolist()
+
+
+def _date(rng, start, end):
+    # Mesmo intervalo do fake.date(): de 1970-01-01 até "agora" (data_generation.reference_now)
+    limite = (dg.reference_now().date() - date(1970, 1, 1)).days
+    dias = rng.integers(0, limite + 1, size=end - start)
+    return (np.datetime64('1970-01-01', 'D') + dias).astype(str).tolist()
+
+
+def _timestamp(rng, start, end):
+    # Mesmo intervalo do fake.date_time_this_decade(): do início da década até "agora"
+    agora = dg.reference_now()
+    inicio = datetime(agora.year - agora.year % 10, 1, 1)
+    segundos = rng.integers(0, int((agora - inicio).total_seconds()) + 1, size=end - start)
+    valores = np.datetime64(inicio, 's') + segundos
+    return np.char.replace(np.datetime_as_string(valores, unit='s'), 'T', ' ').tolist()
+
+
+def _uuid4(rng, start, end):
+    brutos = rng.bytes(16 * (end - start))
+    return [str(uuid.UUID(bytes=brutos[i:i + 16], version=4)) for i in range(0, len(brutos), 16)]
+
+
+def _text_length(col: dict, default: int) -> int:
+    try:
+        return int(col.get('length') or default)
+    except Exception:
+        return default
+
+
+def _compile_type_vector(col: dict) -> Optional[VectorProducer]:
+    t = col['type']
+    if t == dg.CHARACTER_VARYING:
+        return _fixed_strings(_LETRAS, max(1, _text_length(col, 20)))
+    if t == 'character':
+        return _fixed_strings(_LETRAS, max(1, _text_length(col, 1)))
+    if t == 'text':
+        length = _text_length(col, 10)
+        return _fixed_strings(_LETRAS, length) if length > 0 else None
+    if t == 'integer':
+        return _int_range(1, 10000)
+    if t == 'numeric':
+        return _numeric
+    if t == 'boolean':
+        return _boolean
+    if t == 'date':
+        return _date
+    if t == dg.TIMESTAMP_WO_TZ:
+        return _timestamp
+    if t == 'uuid':
+        return _uuid4
+    return None
+
+
+def _compile_check_vector(col: dict) -> Optional[VectorProducer]:
+    # Mesmo CHECK compilado de data_generation._compile_check_constraint: valores fixos e intervalos inteiros saem
+    # vetorizados; os demais domínios (regex, datas, comprimentos, ...) valor a valor, semeados pelo rng do lote
+    compiled = check_constraints.compile_check(col)
+    if compiled.choices is not None:
+        return _choice(compiled.choices)
+    if compiled.int_range is not None:
+        return _int_range(*compiled.int_range)
+    if compiled.sample is None:
+        return None
+    sample = compiled.sample
+
+    def produce(rng, start, end):
+        r = random.Random(int(rng.integers(2 ** 63)))
+        return [sample(r) for _ in range(start, end)]
+    return produce
+
+
+def _faker_fallback(col: dict) -> VectorProducer:
+    # Tipos sem equivalente vetorizado continuam célula a célula pelo Faker, semeado a partir do rng do lote
+    produce = dg._compile_value_column(col)
+
+    def fallback(rng, start, end):
+        faker = dg.chunk_faker(int(rng.integers(2 ** 63)))
+        return [produce(idx, faker) for idx in range(start, end)]
+    return fallback
+
+
+def compile_vector_value(col: dict) -> VectorProducer:
+    """
+    Compila uma coluna comum em um produtor vetorizado, caindo para o Faker quando não há equivalente.
+    """
+    if col.get('check_constraint') and 'expression' in col['check_constraint']:
+        from_check = _compile_check_vector(col)
+        if from_check is not None:
+            return from_check
+    vector = _compile_type_vector(col)
+    if vector is None:
+        return _faker_fallback(col)
+    return vector
+
+
+def compile_vector_table_plan(table_meta: Dict[str, Any]) -> List[dg.ColumnPlan]:
+    """
+    Equivalente vetorizado de data_generation.compile_table_plan: o campo produce de cada entrada
+    'value' é um produtor (rng, start, end) -> lista de valores.
+    """
+    plan = []
+    for entry, col in zip(dg.compile_table_plan(table_meta), table_meta['columns']):
+        if entry.kind == 'value':
+            entry = entry._replace(produce=compile_vector_value(col))
+        plan.append(entry)
+    return plan
+
+
+def _fk_vector(pool: Optional[List[Any]]) -> VectorProducer:
+    def produce(rng, start, end):
+        if not pool:
+            return [None] * (end - start)
+        return [pool[i] for i in rng.integers(0, len(pool), size=end - start)]
+    return produce
+
+
+def bind_chunk_generator(
+    table: str, plan: List[dg.ColumnPlan], pk_start_vals, fk_pools, rng=None, seed: Optional[int] = None
+) -> Callable[[int, int], List[Dict[str, Any]]]:
+    """
+    Liga o plano vetorizado à execução atual e devolve uma função (start, end) -> linhas,
+    que gera cada coluna do lote de uma vez e só então monta as linhas.
+    Com seed cada lote usa o próprio gerador, derivado de (seed, tabela, início do lote); senão todos usam rng.
+    """
+    if not NUMPY_DISPONIVEL:
+        raise RuntimeError("O motor 'numpy' requer o pacote numpy instalado.")
+    rng = rng if rng is not None else np.random.default_rng()
+    names = []
+    producers = []
+    for entry in plan:
+        names.append(entry.column)
+        if entry.kind == 'pk_seq':
+            start_val = pk_start_vals.get((table, entry.column), 0)
+            producers.append(lambda rng, start, end, s=start_val: list(range(s + start + 1, s + end + 1)))
+        elif entry.kind == 'fk':
+            producers.append(_fk_vector(fk_pools.get(entry.ref)))
+        else:
+            producers.append(entry.produce)
+
+    def generate_chunk(start, end):
+        chunk_rng = rng if seed is None else np.random.default_rng(dg.derive_seed(seed, table, start))
+        with dg._seeded_reference(seed):
+            columns = [produce(chunk_rng, start, end) for produce in producers]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+    return generate_chunk
@@ -1,4 +1,5 @@
 from cryptography.fernet import Fernet, InvalidToken
+from functools import lru_cache
 import os
 import logging
 from typing import Optional
@@ -12,19 +13,21 @@ def get_crypto_key() -> str:
         raise ValueError("CRYPTO_KEY não definida ou muito curta.")
     return key
 
-try:
-    KEY = get_crypto_key()
-    cipher = Fernet(KEY.encode())
-except Exception as e:
-    logger.error(f"Erro ao inicializar Fernet: {e}")
-    raise
+@lru_cache(maxsize=1)
+def get_cipher() -> Fernet:
+    # Construído na primeira utilização (e não na importação); falhas de configuração aparecem no primeiro uso
+    try:
+        return Fernet(get_crypto_key().encode())
+    except Exception as e:
+        logger.error(f"Erro ao inicializar Fernet: {e}")
+        raise
 
 def encrypt_password(password: str) -> str:
-    return cipher.encrypt(password.encode()).decode()
+    return get_cipher().encrypt(password.encode()).decode()
 
 def decrypt_password(token: str) -> str:
     try:
-        return cipher.decrypt(token.encode()).decode()
+        return get_cipher().decrypt(token.encode()).decode()
     except InvalidToken:
         logger.error("Token de senha inválido para descriptografia.")
         raise ValueError("Token de senha inválido para descriptografia.")
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Respostas das listagens paginadas: JSON (lista) ou NDJSON em streaming (um documento por linha).
+
+A paginação é por cursor: os itens vêm ordenados pela chave de listagem e a próxima página é pedida com
+`apos=<chave do último item recebido>`. Em JSON, quando a página está cheia, a chave também é enviada no
+cabeçalho X-Proximo-Cursor; em NDJSON os cabeçalhos partem antes dos dados, então vale a chave da última linha.
+"""
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FORMATOS_LISTAGEM = ('json', 'ndjson')
+CAMPOS_LISTAGEM = ('completo', 'resumo')
+CABECALHO_PROXIMO_CURSOR = "X-Proximo-Cursor"
+
+
+async def _linhas_ndjson(itens: AsyncIterator[Dict[str, Any]], transformar) -> AsyncIterator[str]:
+    async for item in itens:
+        yield json.dumps(jsonable_encoder(transformar(item)), ensure_ascii=False) + "\n"
+
+
+async def responder_listagem(
+    itens: AsyncIterator[Dict[str, Any]],
+    formato: str,
+    chave_cursor: str,
+    limite: Optional[int],
+    transformar: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+):
+    transformar = transformar or (lambda item: item)
+    if formato == 'ndjson':
+        return StreamingResponse(_linhas_ndjson(itens, transformar), media_type="application/x-ndjson")
+    pagina = [transformar(item) async for item in itens]
+    headers = {}
+    if limite and len(pagina) == limite:
+        headers[CABECALHO_PROXIMO_CURSOR] = str(pagina[-1][chave_cursor])
+    return JSONResponse(jsonable_encoder(pagina), headers=headers)
@@ -0,0 +1,87 @@
+"""
+Benchmark de carga das leituras de schema: endpoint síncrono (def + pymongo, executado no threadpool do
+Starlette) versus endpoint assíncrono (async def + PyMongo Async API) servindo as mesmas requisições concorrentes.
+
+Requer um MongoDB acessível em MONGO_URL. Um schema de teste é gravado em uma coleção temporária e removido ao final.
+Uso: python -m benchmarks.bench_async_reads [requisicoes] [concorrencia]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from pymongo import AsyncMongoClient, MongoClient
+
+from app.core.config import MONGO_URL, DB_NAME
+from app.db.crud import schemas as crud_schemas
+from app.db.crud_async import schemas as crud_schemas_async
+
+COLECAO = "bench_async_reads"
+NOME_SCHEMA = "bench"
+TABELAS = 50
+
+
+def _schema_teste():
+    colunas = [{"column": f"col{i}", "type": "integer", "is_primary_key": i == 0, "is_foreign_key": False} for i in range(20)]
+    return {"nome_schema": NOME_SCHEMA, **{f"tabela{t}": {"columns": colunas} for t in range(TABELAS)}}
+
+
+def _montar_app(sync_col, async_col) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/{nome_schema}")
+    def obter_sync(nome_schema: str):
+        schema = crud_schemas.get_schema_por_nome(nome_schema, sync_col)
+        if not schema:
+            raise HTTPException(status_code=404)
+        return schema
+
+    @app.get("/async/{nome_schema}")
+    async def obter_async(nome_schema: str):
+        schema = await crud_schemas_async.get_schema_por_nome(nome_schema, async_col)
+        if not schema:
+            raise HTTPException(status_code=404)
+        return schema
+
+    return app
+
+
+async def _carga(app: FastAPI, rota: str, requisicoes: int, concorrencia: int) -> float:
+    limite = asyncio.Semaphore(concorrencia)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def uma():
+            async with limite:
+                response = await client.get(rota)
+                response.raise_for_status()
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(uma() for _ in range(requisicoes)))
+        return time.perf_counter() - inicio
+
+
+async def main(requisicoes: int = 2000, concorrencia: int = 500):
+    sync_client = MongoClient(MONGO_URL)
+    async_client = AsyncMongoClient(MONGO_URL)
+    sync_col = sync_client[DB_NAME][COLECAO]
+    async_col = async_client[DB_NAME][COLECAO]
+    sync_col.delete_many({})
+    crud_schemas.insert_schema(_schema_teste(), sync_col)
+    app = _montar_app(sync_col, async_col)
+    try:
+        print(f"{requisicoes} requisições, {concorrencia} concorrentes, schema com {TABELAS} tabelas")
+        print(f"{'endpoint':>10} {'tempo (s)':>10} {'req/s':>10}")
+        for rota in ("sync", "async"):
+            await _carga(app, f"/{rota}/{NOME_SCHEMA}", 50, 10)  # aquecimento
+            tempo = await _carga(app, f"/{rota}/{NOME_SCHEMA}", requisicoes, concorrencia)
+            print(f"{rota:>10} {tempo:>10.2f} {requisicoes / tempo:>10.0f}")
+    finally:
+        sync_col.drop()
+        sync_client.close()
+        await async_client.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(main(*args))
@@ -0,0 +1,41 @@
+"""
+Benchmark da amostragem de FKs: reconstrução da lista de chaves a cada linha (abordagem anterior)
+versus o pool de chaves por (tabela, coluna) usado pelo gerador de linhas (data_generation._fk_sampler).
+
+Uso: python -m benchmarks.bench_fk_sampling [amostras]
+"""
+import random
+import sys
+import time
+
+from app.services import data_generation
+
+TAMANHOS_PAI = (10_000, 100_000, 1_000_000)
+COL_FK = {"column": "pai_id", "references": {"table": "pai", "column": "id"}}
+
+
+def _fk_por_lista(col, data):
+    # Abordagem anterior: percorre todas as linhas pai a cada valor de FK
+    ref_vals = [r[col['references']['column']] for r in data.get(col['references']['table'], [])]
+    return random.choice(ref_vals) if ref_vals else None
+
+
+def _medir(func, *args, amostras):
+    inicio = time.perf_counter()
+    for _ in range(amostras):
+        func(*args)
+    return (time.perf_counter() - inicio) / amostras
+
+
+def main(amostras: int = 200):
+    print(f"{'linhas pai':>12} {'lista (us/FK)':>15} {'pool (us/FK)':>14} {'speedup':>10}")
+    for n in TAMANHOS_PAI:
+        linhas_pai = [{"id": i + 1} for i in range(n)]
+        sampler = data_generation._fk_sampler([r["id"] for r in linhas_pai])
+        t_lista = _medir(_fk_por_lista, COL_FK, {"pai": linhas_pai}, amostras=amostras)
+        t_pool = _medir(sampler, 0, data_generation.fake, amostras=amostras * 100)
+        print(f"{n:>12,} {t_lista * 1e6:>15.1f} {t_pool * 1e6:>14.3f} {t_lista / t_pool:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,76 @@
+"""
+Benchmark das buscas por chave (nome do conector, nome_schema, job_id) com e sem os índices de app.db.indices,
+e verificação de que as consultas quentes usam IXSCAN.
+
+Usa um banco temporário no MongoDB de MONGO_URL, removido ao final. Com --mongomock roda em memória
+(sem o explain(), indisponível no mongomock: os planos aparecem como "n/d" e só os tempos são medidos).
+Uso: python -m benchmarks.bench_indices [documentos_por_colecao] [buscas] [--mongomock]
+"""
+import random
+import sys
+import time
+
+from pymongo import MongoClient
+
+from app.core.config import MONGO_URL
+from app.db import indices
+
+BANCO = "bench_indices"
+
+
+def _popular(db, documentos: int):
+    campos = {indice.colecao: indice.campos[0] for indice in indices.INDICES}
+    for colecao, campo in campos.items():
+        db[colecao].insert_many([{campo: f"chave{i:07d}", "payload": "x" * 200} for i in range(documentos)])
+
+
+def _medir(db, documentos: int, buscas: int) -> float:
+    chaves = [f"chave{random.randrange(documentos):07d}" for _ in range(buscas)]
+    inicio = time.perf_counter()
+    for colecao, filtro in indices.CONSULTAS_QUENTES:
+        campo = next(iter(filtro))
+        for chave in chaves:
+            db[colecao].find_one({campo: chave})
+    return (time.perf_counter() - inicio) * 1000 / (buscas * len(indices.CONSULTAS_QUENTES))
+
+
+def _planos(db) -> dict:
+    planos = {}
+    for colecao, filtro in indices.CONSULTAS_QUENTES:
+        try:
+            planos[f"{colecao} {filtro}"] = indices.estagios_plano(db[colecao], filtro)
+        except (AttributeError, NotImplementedError):
+            # mongomock não implementa explain()
+            planos[f"{colecao} {filtro}"] = "n/d"
+    return planos
+
+
+def main(documentos: int = 20000, buscas: int = 200, usar_mongomock: bool = False):
+    if usar_mongomock:
+        import mongomock
+        cliente = mongomock.MongoClient()
+    else:
+        cliente = MongoClient(MONGO_URL)
+    db = cliente[BANCO]
+    cliente.drop_database(BANCO)
+    try:
+        _popular(db, documentos)
+        sem_indice = _medir(db, documentos, buscas)
+        print(f"Sem índices: {sem_indice:.3f} ms por busca")
+        indices.garantir_indices(db)
+        com_indice = _medir(db, documentos, buscas)
+        print(f"Com índices: {com_indice:.3f} ms por busca ({sem_indice / com_indice:.1f}x)")
+        sem_ixscan = []
+        for consulta, estagios in _planos(db).items():
+            print(f"  {consulta}: {estagios}")
+            if estagios != "n/d" and "IXSCAN" not in estagios:
+                sem_ixscan.append(consulta)
+        if sem_ixscan:
+            raise SystemExit(f"Consultas sem IXSCAN: {sem_ixscan}")
+    finally:
+        cliente.drop_database(BANCO)
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(*(int(a) for a in argumentos), usar_mongomock="--mongomock" in sys.argv)
@@ -0,0 +1,86 @@
+"""
+Benchmark do formato dos INSERTs: um comando por linha versus VALUES de várias linhas
+(iter_insert_sql com rows_per_statement e insert_fake_data com execute_values), comparados ao COPY.
+
+Sempre mede o tamanho e o tempo de renderização do script. Com --dsn (ou BENCH_PG_DSN) também mede a carga em um
+PostgreSQL real, em um schema temporário removido ao final.
+Uso: python -m benchmarks.bench_insert_values [linhas] [--dsn "host=... dbname=... user=... password=..."]
+"""
+import os
+import sys
+import time
+
+import psycopg2
+
+from app.services import data_generation as dg
+from benchmarks.bench_vectorized_engine import SCHEMA
+
+BANCO_SCHEMA = "bench_insert_values"
+LINHAS_POR_COMANDO = (1, 100, 1000)
+DDL = f"""
+CREATE SCHEMA {BANCO_SCHEMA};
+CREATE TABLE {BANCO_SCHEMA}.pedido (
+    id integer PRIMARY KEY, codigo uuid NOT NULL, descricao varchar(30), valor numeric NOT NULL,
+    quantidade integer NOT NULL CHECK (quantidade > 0), pago boolean NOT NULL, status text NOT NULL,
+    data_pedido date NOT NULL, criado_em timestamp NOT NULL
+);
+"""
+
+
+def _dados(linhas: int):
+    return list(dg.iter_fake_data(SCHEMA, linhas, chunk_size=dg.DEFAULT_CHUNK_SIZE, seed=1))
+
+
+def _medir_scripts(schema, chunks):
+    for linhas_por_comando in LINHAS_POR_COMANDO:
+        inicio = time.perf_counter()
+        tamanho = sum(len(bloco.encode('utf-8')) + 1 for bloco in dg.iter_insert_sql(schema, chunks, linhas_por_comando))
+        t = time.perf_counter() - inicio
+        print(f"insert x{linhas_por_comando:<5} script: {tamanho / 1024 / 1024:8.2f} MiB, renderização {t * 1000:8.1f} ms")
+    inicio = time.perf_counter()
+    tamanho = sum(len(bloco.encode('utf-8')) for bloco in dg.iter_copy_sql(schema, chunks))
+    t = time.perf_counter() - inicio
+    print(f"copy         script: {tamanho / 1024 / 1024:8.2f} MiB, renderização {t * 1000:8.1f} ms")
+
+
+def _medir_cargas(dsn: str, schema, chunks, linhas: int):
+    dsn_params = {"dsn": dsn}
+    cargas = {f"insert x{n}": (lambda n=n: dg.execute_inserts(dsn_params, dg.iter_insert_sql(schema, chunks, n)))
+              for n in LINHAS_POR_COMANDO}
+    for n in LINHAS_POR_COMANDO[1:]:
+        cargas[f"execute_values x{n}"] = lambda n=n: dg.insert_fake_data(dsn_params, schema, chunks, page_size=n)
+    cargas["copy"] = lambda: dg.copy_fake_data(dsn_params, schema, chunks)
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BANCO_SCHEMA} CASCADE;" + DDL)
+    try:
+        for nome, carregar in cargas.items():
+            inicio = time.perf_counter()
+            carregar()
+            t = time.perf_counter() - inicio
+            print(f"carga {nome:<20} {t:8.2f}s ({linhas / t:,.0f} linhas/s)")
+            with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+                cur.execute(f"TRUNCATE {BANCO_SCHEMA}.pedido")
+    finally:
+        with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BANCO_SCHEMA} CASCADE")
+
+
+def main(linhas: int = 50_000, dsn: str = None):
+    schema = dict(SCHEMA, nome_schema=BANCO_SCHEMA)
+    chunks = _dados(linhas)
+    print(f"linhas: {linhas:,}")
+    _medir_scripts(schema, chunks)
+    if dsn:
+        _medir_cargas(dsn, schema, chunks, linhas)
+    else:
+        print("(carga não medida: informe --dsn ou BENCH_PG_DSN)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    dsn = os.environ.get("BENCH_PG_DSN")
+    if "--dsn" in args:
+        i = args.index("--dsn")
+        dsn = args[i + 1]
+        del args[i:i + 2]
+    main(int(args[0]) if args else 50_000, dsn)
@@ -0,0 +1,51 @@
+"""
+Benchmark do cache de resultados do modo sql: gerar o script com seed do zero versus obtê-lo do cache
+(memória e disco, ver app.services.result_cache).
+
+Uso: python -m benchmarks.bench_result_cache [linhas]
+"""
+import sys
+import tempfile
+import time
+
+from app.services import data_generation as dg
+from app.services.result_cache import CacheResultados, chave_resultado
+from benchmarks.bench_vectorized_engine import SCHEMA
+
+SEED = 42
+REPETICOES = 20
+
+
+def _gerar(linhas: int):
+    contagem = {}
+    sql = '\n'.join(dg.iter_insert_sql(SCHEMA, dg.count_rows(dg.iter_fake_data(SCHEMA, linhas, seed=SEED), contagem)))
+    return sql, contagem
+
+
+def _medir_obter(cache: CacheResultados, chave: str) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        assert cache.obter(chave) is not None
+    return (time.perf_counter() - inicio) / REPETICOES
+
+
+def main(linhas: int = 20_000):
+    chave = chave_resultado(SCHEMA, linhas, SEED, {}, 'insert', 'faker', dg.DEFAULT_CHUNK_SIZE)
+    inicio = time.perf_counter()
+    sql, contagem = _gerar(linhas)
+    t_gerar = time.perf_counter() - inicio
+    with tempfile.TemporaryDirectory() as diretorio:
+        CacheResultados(diretorio=diretorio).armazenar(chave, sql, contagem)
+        # Cache sem memória: toda leitura vem do disco
+        t_disco = _medir_obter(CacheResultados(max_bytes=0, diretorio=diretorio), chave)
+    memoria = CacheResultados(diretorio=None)
+    memoria.armazenar(chave, sql, contagem)
+    t_memoria = _medir_obter(memoria, chave)
+    print(f"linhas: {linhas:,} ({len(sql.encode('utf-8')) / 1024 / 1024:.1f} MiB de SQL)")
+    print(f"gerar:   {t_gerar * 1000:10.1f} ms")
+    print(f"disco:   {t_disco * 1000:10.1f} ms ({t_gerar / t_disco:,.0f}x)")
+    print(f"memória: {t_memoria * 1000:10.4f} ms ({t_gerar / t_memoria:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,79 @@
+"""
+Benchmark do custo por célula: laço interpretado (relê metadados e reinterpreta o CHECK a cada célula, como o
+gerador fazia antes) versus o plano compilado uma vez por tabela (compile_table_plan + bind_row_generator).
+
+Uso: python -m benchmarks.bench_row_compilation [linhas]
+"""
+import random
+import sys
+import time
+
+from app.services import check_constraints, data_generation as dg
+
+TABELA = {"columns": [
+    {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False, "nullable": "NO"},
+    {"column": "cliente_id", "type": "integer", "is_primary_key": False, "is_foreign_key": True,
+     "references": {"table": "cliente", "column": "id"}, "nullable": "NO"},
+    {"column": "status", "type": "text", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO",
+     "check_constraint": {"expression": "((status)::text = ANY ((ARRAY['ABERTO'::character varying, 'PAGO'::character varying, 'CANCELADO'::character varying])::text[]))"}},
+    {"column": "ativo", "type": "boolean", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO",
+     "check_constraint": {"expression": "(ativo = 't')"}},
+    {"column": "quantidade", "type": "integer", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO",
+     "check_constraint": {"expression": "(quantidade > 0)"}},
+    {"column": "num_cartao", "type": "character varying", "length": 16, "is_primary_key": False, "is_foreign_key": False,
+     "nullable": "NO", "check_constraint": {"expression": "(length((num_cartao)::text) = 16)"}},
+    {"column": "sem_tipo", "type": "interval", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO"},
+    {"column": "obs", "type": "text", "is_primary_key": False, "is_foreign_key": False, "nullable": "YES"},
+]}
+
+
+def _valor_interpretado(col):
+    # Reproduz o caminho antigo: a expressão do CHECK é interpretada de novo a cada célula
+    if col.get('check_constraint') and 'expression' in col['check_constraint']:
+        check_constraints.parse_check(col['check_constraint']['expression'])
+        sample = check_constraints.compile_check(col).sample
+        if sample is not None:
+            return sample(random)
+    return dg._compile_type_producer(col)(dg.fake)
+
+
+def _linha_interpretada(table_meta, idx, pool):
+    row = {}
+    for col in table_meta['columns']:
+        if col['is_primary_key']:
+            row[col['column']] = idx + 1
+        elif col['is_foreign_key'] and col['references']:
+            row[col['column']] = random.choice(pool)
+        else:
+            value = _valor_interpretado(col)
+            if col.get('nullable', 'YES') == 'NO' and value is None:
+                value = dg._get_not_null_fallback(col, idx, dg.fake)
+            if col.get('nullable', 'YES') == 'NO' and value is None:
+                value = dg._get_not_null_final_fallback(col, idx)
+            row[col['column']] = value
+    return row
+
+
+def main(linhas: int = 20_000):
+    pool = list(range(1, 1001))
+    celulas = linhas * len(TABELA["columns"])
+
+    inicio = time.perf_counter()
+    for idx in range(linhas):
+        _linha_interpretada(TABELA, idx, pool)
+    t_interpretado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    generate_row = dg.bind_row_generator("pedido", dg.compile_table_plan(TABELA), {}, {("cliente", "id"): pool})
+    for idx in range(linhas):
+        generate_row(idx)
+    t_compilado = time.perf_counter() - inicio
+
+    print(f"linhas: {linhas:,} ({celulas:,} células)")
+    print(f"interpretado: {t_interpretado / celulas * 1e6:.2f} us/célula")
+    print(f"compilado:    {t_compilado / celulas * 1e6:.2f} us/célula")
+    print(f"speedup:      {t_interpretado / t_compilado:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
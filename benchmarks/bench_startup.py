@@ -0,0 +1,62 @@
+"""
+Benchmark de inicialização: tempo de importação de app.main e tempo do início do processo até a primeira
+resposta HTTP (endpoint sem acesso a bancos), cada medição em um processo Python novo.
+
+Uso: python -m benchmarks.bench_startup [repeticoes]
+Por padrão MONGO_URL aponta para uma porta fechada, simulando um MongoDB indisponível ou lento no boot;
+defina BENCH_MONGO_URL para medir contra um servidor real.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+MONGO_INDISPONIVEL = "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=3000"
+
+_IMPORTACAO = """
+import time
+inicio = time.perf_counter()
+try:
+    import app.main
+    print(time.perf_counter() - inicio)
+except Exception as e:
+    print(f"{time.perf_counter() - inicio} falhou: {type(e).__name__}")
+"""
+
+_PRIMEIRA_REQUISICAO = """
+import time
+inicio = time.perf_counter()
+try:
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as client:
+        client.get("/dicionariodados/connectors/pools/estatisticas").raise_for_status()
+    print(time.perf_counter() - inicio)
+except Exception as e:
+    print(f"{time.perf_counter() - inicio} falhou: {type(e).__name__}")
+"""
+
+
+def _medir(codigo: str, env: dict) -> str:
+    saida = subprocess.run([sys.executable, "-c", codigo], env=env, capture_output=True, text=True, timeout=300)
+    return saida.stdout.strip().splitlines()[-1] if saida.stdout.strip() else f"erro: {saida.stderr.strip()[-200:]}"
+
+
+def _resumo(resultados):
+    tempos = [float(r.split()[0]) for r in resultados if not r.startswith("erro")]
+    falhas = sum(1 for r in resultados if "falhou" in r or r.startswith("erro"))
+    mediana = f"{statistics.median(tempos) * 1000:.0f} ms" if tempos else "-"
+    return f"{mediana:>10} (falhas: {falhas}/{len(resultados)})"
+
+
+def main(repeticoes: int = 5):
+    env = dict(os.environ)
+    env["MONGO_URL"] = os.getenv("BENCH_MONGO_URL", MONGO_INDISPONIVEL)
+    env.setdefault("CRYPTO_KEY", "n3Z0Dq6QdC3B5s2jYdYdN3ZcXzYl8x0pG9pQ1JxQw8E=")
+    print(f"MONGO_URL={env['MONGO_URL']}")
+    print(f"{'importação de app.main':<32} {_resumo([_medir(_IMPORTACAO, env) for _ in range(repeticoes)])}")
+    print(f"{'início até 1ª resposta':<32} {_resumo([_medir(_PRIMEIRA_REQUISICAO, env) for _ in range(repeticoes)])}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,46 @@
+"""
+Benchmark dos motores de geração: 'faker' (célula a célula) versus 'numpy' (coluna a coluna).
+
+Uso: python -m benchmarks.bench_vectorized_engine [linhas]
+"""
+import sys
+import time
+
+from app.services import data_generation as dg
+
+SCHEMA = {
+    "nome_schema": "public",
+    "pedido": {"depends_on": [], "columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False, "nullable": "NO"},
+        {"column": "codigo", "type": "uuid", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO"},
+        {"column": "descricao", "type": "character varying", "length": 30, "is_primary_key": False, "is_foreign_key": False, "nullable": "YES"},
+        {"column": "valor", "type": "numeric", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO"},
+        {"column": "quantidade", "type": "integer", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO",
+         "check_constraint": {"expression": "(quantidade > 0)"}},
+        {"column": "pago", "type": "boolean", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO"},
+        {"column": "status", "type": "text", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO",
+         "check_constraint": {"expression": "ARRAY['ABERTO','PAGO','CANCELADO']"}},
+        {"column": "data_pedido", "type": "date", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO"},
+        {"column": "criado_em", "type": "timestamp without time zone", "is_primary_key": False, "is_foreign_key": False, "nullable": "NO"},
+    ]},
+}
+
+
+def _medir(engine: str, linhas: int) -> float:
+    inicio = time.perf_counter()
+    for _ in dg.iter_fake_data(SCHEMA, linhas, engine=engine, chunk_size=10_000):
+        pass
+    return time.perf_counter() - inicio
+
+
+def main(linhas: int = 100_000):
+    t_faker = _medir('faker', linhas)
+    t_numpy = _medir('numpy', linhas)
+    print(f"linhas: {linhas:,}")
+    print(f"faker: {t_faker:.2f}s ({linhas / t_faker:,.0f} linhas/s)")
+    print(f"numpy: {t_numpy:.2f}s ({linhas / t_numpy:,.0f} linhas/s)")
+    print(f"speedup: {t_faker / t_numpy:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,36 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+# Os índices são exercitados em test_indices; no lifespan dos testes a criação em segundo plano só concorreria
+# com as próprias escritas dos testes
+os.environ.setdefault("MONGO_CRIAR_INDICES", "false")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _lifespan(request):
+    """
+    Abre o `client = TestClient(app)` do módulo como `with TestClient(app) as client:` durante todo o módulo: o
+    lifespan cria o cliente assíncrono do MongoDB e todas as requisições são atendidas no mesmo event loop.
+    """
+    client = getattr(request.module, "client", None)
+    if client is None:
+        yield
+        return
+    with client:
+        yield
+
+
+@pytest.fixture
+def versao_schema_fixa():
+    """
+    Para os testes de endpoint que mockam get_schema_por_nome: o cache de schemas também consulta a versão do
+    documento, que passa a ser fixa (sem ir ao MongoDB), e começa vazio para não devolver o schema ou os planos
+    compilados de outro teste.
+    """
+    from app.services.schema_cache import schema_cache
+    schema_cache.limpar()
+    with patch("app.db.crud.schemas.get_versao_schema", return_value=1) as versao:
+        yield versao
+    schema_cache.limpar()
@@ -0,0 +1,116 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.main import app
+from app.db.crud_async import schemas as crud_schemas_async, connectors as crud_connectors_async
+
+client = TestClient(app)
+
+
+def test_buscar_conector_async_remove_campos_sensiveis():
+    conector = {"_id": "x", "nome": "c1", "host": "h", "porta": 5432, "banco": "b", "nome_schema": None, "usuario": "u", "senha": "token"}
+    with patch("app.db.crud_async.connectors.get_conector_por_nome", AsyncMock(return_value=conector)):
+        response = client.get("/dicionariodados/connectors/c1")
+    assert response.status_code == 200
+    assert "senha" not in response.json()
+    assert response.json()["nome"] == "c1"
+
+
+def _iter_async(itens):
+    async def gerar(collection, apos=None, limite=None, resumo=False):
+        selecionados = [i for i in itens if apos is None or i["nome"] > apos]
+        for item in selecionados[:limite]:
+            yield item
+    return gerar
+
+
+CONECTORES = [{"nome": f"c{i}", "host": "h", "porta": 5432, "banco": "b", "nome_schema": "public", "usuario": "u"} for i in range(3)]
+
+
+def test_listar_conectores_async():
+    with patch("app.db.crud_async.connectors.iter_conectores", _iter_async(CONECTORES)):
+        response = client.get("/dicionariodados/connectors/")
+    assert response.status_code == 200
+    assert [c["nome"] for c in response.json()] == ["c0", "c1", "c2"]
+    assert "X-Proximo-Cursor" not in response.headers
+
+
+def test_listar_conectores_paginado():
+    with patch("app.db.crud_async.connectors.iter_conectores", _iter_async(CONECTORES)):
+        response = client.get("/dicionariodados/connectors/", params={"limite": 2})
+        assert [c["nome"] for c in response.json()] == ["c0", "c1"]
+        cursor = response.headers["X-Proximo-Cursor"]
+        response = client.get("/dicionariodados/connectors/", params={"limite": 2, "apos": cursor})
+    assert [c["nome"] for c in response.json()] == ["c2"]
+    assert "X-Proximo-Cursor" not in response.headers
+
+
+def test_listar_conectores_ndjson():
+    with patch("app.db.crud_async.connectors.iter_conectores", _iter_async(CONECTORES)):
+        response = client.get("/dicionariodados/connectors/", params={"formato": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+    assert [c["nome"] for c in linhas] == ["c0", "c1", "c2"]
+
+
+def test_listar_schemas_async():
+    async def iter_schemas(collection, apos=None, limite=None, resumo=False):
+        yield {"nome_schema": "s1", "total_tabelas": 2} if resumo else {"nome_schema": "s1"}
+    with patch("app.db.crud_async.schemas.iter_schemas", iter_schemas):
+        assert client.get("/dicionariodados/schemas/").json() == [{"nome_schema": "s1"}]
+        response = client.get("/dicionariodados/schemas/", params={"campos": "resumo"})
+    assert response.json() == [{"nome_schema": "s1", "total_tabelas": 2}]
+
+
+def test_listar_parametros_invalidos():
+    assert client.get("/dicionariodados/schemas/", params={"campos": "outro"}).status_code == 400
+    assert client.get("/dicionariodados/connectors/", params={"formato": "xml"}).status_code == 400
+    assert client.get("/dicionariodados/schemas/", params={"limite": 0}).status_code == 422
+
+
+@pytest.mark.anyio
+async def test_crud_async_resumo_conta_tabelas_no_mongo():
+    collection = MagicMock()
+    collection.aggregate = AsyncMock(return_value=_AsyncLista([{"nome_schema": "s1", "total_tabelas": 3}]))
+    itens = [s async for s in crud_schemas_async.iter_schemas(collection, apos="s0", limite=10, resumo=True)]
+    assert itens == [{"nome_schema": "s1", "total_tabelas": 3}]
+    pipeline = collection.aggregate.call_args[0][0]
+    assert pipeline[0] == {"$match": {"nome_schema": {"$gt": "s0"}}}
+    assert {"$limit": 10} in pipeline
+    assert "total_tabelas" in pipeline[-1]["$project"]
+
+
+class _AsyncLista:
+    def __init__(self, itens):
+        self._itens = iter(itens)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._itens)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.anyio
+async def test_crud_async_get_schema_remove_metadados():
+    collection = MagicMock()
+    collection.find_one = AsyncMock(return_value={"_id": "x", "nome_schema": "s1", "_versao": 2})
+    assert await crud_schemas_async.get_schema_por_nome("s1", collection) == {"nome_schema": "s1"}
+
+
+@pytest.mark.anyio
+async def test_crud_async_delete_conector():
+    collection = MagicMock()
+    collection.delete_one = AsyncMock(return_value=MagicMock(deleted_count=1))
+    assert await crud_connectors_async.delete_conector("c1", collection) is True
+    collection.delete_one.assert_awaited_once_with({"nome": "c1"})
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,138 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.services import check_constraints, data_generation, vectorized_generation
+import random
+import re
+
+client = TestClient(app)
+
+requer_numpy = pytest.mark.skipif(not vectorized_generation.NUMPY_DISPONIVEL, reason="numpy não instalado")
+
+
+def _col(expression, type_="integer", column="c", **extra):
+    return {"column": column, "type": type_, "is_primary_key": False, "is_foreign_key": False,
+            "check_constraint": {"expression": expression}, **extra}
+
+
+def _amostra(col, n=200):
+    compiled = check_constraints.compile_check(col)
+    assert compiled.sample is not None, compiled.problems
+    rng = random.Random(7)
+    return [compiled.sample(rng) for _ in range(n)]
+
+
+@pytest.mark.parametrize("expression, type_, valido", [
+    ("((c >= 18) AND (c <= 120))", "integer", lambda v: 18 <= v <= 120),
+    ("(c BETWEEN 0 AND 10)", "numeric", lambda v: 0 <= v <= 10),
+    ("((c > (0)::numeric) AND (c = round(c, 1)))", "numeric", lambda v: v > 0 and round(v, 1) == v),
+    ("((c < 0) OR (c > 20000))", "integer", lambda v: v < 0 or v > 20000),
+    ("((c = ANY (ARRAY[1, 2, 3])) AND (c <> 2))", "integer", lambda v: v in (1, 3)),
+    ("(c < 5)", "integer", lambda v: v < 5),
+    ("((c >= '2020-01-01'::date) AND (c <= CURRENT_DATE))", "date", lambda v: "2020-01-01" <= v <= "2026-12-31"),
+    ("(c > (CURRENT_DATE + 30))", "date", lambda v: v > "2026-01-01"),
+    ("(NOT c)", "boolean", lambda v: v is False),
+])
+def test_dominios_numericos_datas_e_booleanos(expression, type_, valido):
+    with patch("app.services.data_generation.reference_now", return_value=data_generation.datetime(2026, 1, 1)):
+        assert all(valido(v) for v in _amostra(_col(expression, type_)))
+
+
+@pytest.mark.parametrize("expression, length, padrao", [
+    ("((status)::text = ANY ((ARRAY['A'::character varying, 'B'::character varying])::text[]))", 1, r"^[AB]$"),
+    ("((email)::text ~* '^[a-z0-9._]+@[a-z]+\\.(com|br)$'::text)", 40, r"^[a-z0-9._]+@[a-z]+\.(com|br)$"),
+    ("((cpf)::text ~ '^[[:digit:]]{11}$'::text)", 11, r"^\d{11}$"),
+    ("((c)::text ~~ 'AB%'::text)", 6, r"^AB"),
+    ("((length(TRIM(BOTH FROM c)) >= 3) AND ((c)::text <> 'abc'::text) AND (upper((c)::text) = (c)::text))", 5, r"^[A-Z]{3,5}$"),
+])
+def test_dominios_de_texto(expression, length, padrao):
+    valores = _amostra(_col(expression, data_generation.CHARACTER_VARYING, length=length))
+    assert all(re.search(padrao, v, re.I if "~*" in expression else 0) and len(v) <= length for v in valores)
+
+
+def test_fragmentos_sem_a_coluna():
+    assert set(_amostra(_col("ARRAY['A','B']", "text"))) == {"A", "B"}
+    assert set(_amostra(_col("IN ('t','f')", "boolean"))) == {"t", "f"}
+    assert min(_amostra(_col("> 5"))) >= 6
+
+
+def test_problemas_reportados():
+    casos = {
+        "(data_fim >= data_inicio)": "outra coluna (data_inicio)",
+        "((c > 5) AND (c < 3))": "nenhum valor",
+        "(c IN (1, 2) AND c > 5)": "nenhum valor",
+        "(c ~ '(a)\\1'::text)": "expressão regular",
+        "(c > 1 garbage": "não reconhecida",
+        "(foo(c) > 1)": "foo(c)",
+    }
+    for expression, trecho in casos.items():
+        tipo = "text" if "~" in expression else "integer"
+        problemas = check_constraints.compile_check(_col(expression, tipo, column="data_fim" if "data" in expression else "c")).problems
+        assert any(trecho in p for p in problemas), (expression, problemas)
+
+
+def test_sem_problemas_volta_ao_gerador_do_tipo():
+    compiled = check_constraints.compile_check(_col("(id IS NOT NULL)", "uuid", column="id"))
+    assert compiled.sample is None and compiled.problems == ()
+
+
+SCHEMA = {
+    "nome_schema": "public",
+    "conta": {"depends_on": [], "columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False,
+         "check_constraint": {"expression": "(id > 0)"}},
+        _col("(saldo >= (0)::numeric)", "numeric", column="saldo"),
+        _col("((fim)::date >= inicio)", "date", column="fim"),
+    ]},
+    "outra": {"depends_on": [], "columns": [_col("(x > 1)", column="x")]},
+}
+
+
+def test_check_report():
+    report = check_constraints.check_report(SCHEMA)
+    assert report == [{
+        "tabela": "conta", "coluna": "fim", "expressao": "((fim)::date >= inicio)",
+        "problemas": ["depende de outra coluna (inicio)"],
+    }]
+    assert check_constraints.check_report(SCHEMA, ["outra"]) == []
+
+
+@requer_numpy
+def test_motor_numpy_respeita_o_check():
+    plan = vectorized_generation.compile_vector_table_plan({"columns": [
+        _col("((cpf)::text ~ '^[0-9]{11}$'::text)", data_generation.CHARACTER_VARYING, column="cpf", length=11),
+        _col("((n >= 10) AND (n <= 12))", column="n"),
+    ]})
+    rows = vectorized_generation.bind_chunk_generator("t", plan, {}, {}, seed=1)(0, 100)
+    assert all(re.fullmatch(r"\d{11}", r["cpf"]) and 10 <= r["n"] <= 12 for r in rows)
+
+
+def _gerar(**params):
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA), \
+         patch("app.services.data_generation.iter_fake_data", return_value=iter([])) as mock_iter:
+        response = client.post("/dicionariodados/gerar-dados/public/exportar", params=params)
+    return response, mock_iter
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_geracao_recusada_antes_de_gerar():
+    response, mock_iter = _gerar()
+    assert response.status_code == 422
+    assert response.json()["detail"]["checks"][0]["coluna"] == "fim"
+    mock_iter.assert_not_called()
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_ignorar_checks():
+    response, mock_iter = _gerar(ignorar_checks=True)
+    assert response.status_code == 200
+    mock_iter.assert_called_once()
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_endpoint_checks():
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA):
+        response = client.get("/dicionariodados/gerar-dados/public/checks")
+    assert response.status_code == 200
+    assert [c["coluna"] for c in response.json()["checks"]] == ["fim"]
@@ -0,0 +1,296 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.db.crud import dados_sinteticos as crud
+from datetime import datetime
+from unittest.mock import MagicMock
+import gzip
+import hashlib
+
+mongomock = pytest.importorskip("mongomock")
+
+client = TestClient(app)
+
+SCRIPT = "".join(f"INSERT INTO public.t (id) VALUES ({i});\n" for i in range(20))
+
+
+@pytest.fixture
+def colecao():
+    return mongomock.MongoClient()["teste"]["dados_sinteticos"]
+
+
+def _gravar(colecao, texto=SCRIPT, tamanho_bloco=64, nome_schema="s1", **chave):
+    gravador = crud.GravadorScript(nome_schema, colecao, tamanho_bloco=tamanho_bloco)
+    for i in range(0, len(texto), 50):
+        gravador.escrever(texto[i:i + 50])
+    gravador.contar_linhas("t", 20)
+    return gravador.finalizar(rows_per_table=20, **chave)
+
+
+def test_gravador_divide_em_blocos_com_metadados(colecao):
+    metadados = _gravar(colecao)
+    dados = SCRIPT.encode()
+    assert metadados["bytes"] == len(dados)
+    assert metadados["sha256"] == hashlib.sha256(dados).hexdigest()
+    assert metadados["linhas"] == {"t": 20}
+    assert metadados["blocos"] == -(-len(dados) // 64)
+    blocos = list(crud.blocos_collection(colecao).find({"script_id": metadados["script_id"]}).sort("n", 1))
+    assert [b["tamanho"] for b in blocos[:-1]] == [64] * (len(blocos) - 1)
+    assert "sql" not in colecao.find_one({"nome_schema": "s1"})
+    assert crud.get_sql("s1", colecao)["sql"] == SCRIPT
+
+
+def test_iter_script_faixa(colecao):
+    metadados = _gravar(colecao)
+    assert b"".join(crud.iter_script(metadados, colecao, 100, 229)) == SCRIPT.encode()[100:230]
+    assert b"".join(crud.iter_script(metadados, colecao)) == SCRIPT.encode()
+
+
+def test_blocos_concatenados_formam_gzip_valido(colecao):
+    metadados = _gravar(colecao)
+    comprimido = b"".join(crud.iter_script_gzip(metadados, colecao))
+    assert len(comprimido) == metadados["bytes_comprimidos"]
+    assert gzip.decompress(comprimido) == SCRIPT.encode()
+
+
+def test_regravar_cria_nova_versao(colecao):
+    anterior = _gravar(colecao)
+    atual = _gravar(colecao, texto="SELECT 1;\n")
+    assert [v["script_id"] for v in crud.listar_versoes("s1", colecao)] == [atual["script_id"], anterior["script_id"]]
+    assert crud.get_sql("s1", colecao)["sql"] == "SELECT 1;\n"
+    assert crud.get_sql("s1", colecao, anterior["script_id"])["sql"] == SCRIPT
+
+
+def test_retencao_descarta_versoes_antigas_exceto_fixadas(colecao):
+    versoes = [_gravar(colecao, texto=f"SELECT {i};\n") for i in range(3)]
+    crud.fixar_versao("s1", versoes[0]["script_id"], True, colecao)
+    with patch("app.db.crud.dados_sinteticos.SQL_VERSOES_MAX", 2):
+        versoes.append(_gravar(colecao, texto="SELECT 3;\n"))
+    restantes = [v["script_id"] for v in crud.listar_versoes("s1", colecao)]
+    assert restantes == [versoes[3]["script_id"], versoes[2]["script_id"], versoes[0]["script_id"]]
+    assert crud.blocos_collection(colecao).count_documents({"script_id": versoes[1]["script_id"]}) == 0
+
+
+def test_retencao_por_idade(colecao):
+    antiga = _gravar(colecao)
+    colecao.update_one({"script_id": antiga["script_id"]}, {"$set": {"created_at": datetime(2020, 1, 1)}})
+    atual = _gravar(colecao)
+    assert crud.aplicar_retencao("s1", colecao, retencao_dias=30) == 1
+    assert [v["script_id"] for v in crud.listar_versoes("s1", colecao)] == [atual["script_id"]]
+
+
+def test_mesma_chave_com_seed_substitui_versao(colecao):
+    chave = {"seed": 7, "versao_schema": 3, "formato_sql": "insert"}
+    primeira = _gravar(colecao, **chave)
+    outra_seed = _gravar(colecao, **{**chave, "seed": 8})
+    segunda = _gravar(colecao, **chave)
+    restantes = {v["script_id"] for v in crud.listar_versoes("s1", colecao)}
+    assert restantes == {outra_seed["script_id"], segunda["script_id"]}
+    assert primeira["script_id"] not in restantes
+
+
+def test_mesma_seed_com_conteudo_diferente_mantem_versao(colecao):
+    # Ex.: PKs iniciais diferentes no banco de destino
+    chave = {"seed": 7, "versao_schema": 3, "formato_sql": "insert"}
+    primeira = _gravar(colecao, **chave)
+    segunda = _gravar(colecao, texto="SELECT 1;\n", **chave)
+    assert {v["script_id"] for v in crud.listar_versoes("s1", colecao)} == {primeira["script_id"], segunda["script_id"]}
+
+
+def test_remover_versao(colecao):
+    versao = _gravar(colecao)
+    assert crud.remover_versao("s1", versao["script_id"], colecao)
+    assert crud.get_metadados("s1", colecao) is None
+    assert crud.blocos_collection(colecao).count_documents({}) == 0
+    assert not crud.remover_versao("s1", versao["script_id"], colecao)
+
+
+def test_gravar_script_com_erro_descarta_blocos(colecao):
+    def partes():
+        yield "x" * 200
+        raise RuntimeError("falhou")
+
+    with patch("app.db.crud.dados_sinteticos.SQL_BLOCO_BYTES", 64):
+        with pytest.raises(RuntimeError):
+            crud.gravar_script("s1", partes(), colecao)
+    assert crud.blocos_collection(colecao).count_documents({}) == 0
+    assert crud.get_metadados("s1", colecao) is None
+
+
+def test_documento_legado_com_campo_sql(colecao):
+    colecao.insert_one({"nome_schema": "s1", "sql": "SELECT 1;"})
+    metadados = crud.get_metadados("s1", colecao)
+    assert "sql" not in metadados
+    assert b"".join(crud.iter_script(metadados, colecao, 0, 5)) == b"SELECT"
+    assert crud.get_sql("s1", colecao)["sql"] == "SELECT 1;"
+
+
+def test_documento_legado_le_o_conteudo_da_propria_versao(colecao):
+    colecao.insert_one({"nome_schema": "s1", "sql": "SELECT 1;", "created_at": datetime(2024, 1, 1)})
+    colecao.insert_one({"nome_schema": "s1", "sql": "SELECT 2;", "created_at": datetime(2025, 1, 1)})
+    metadados = crud.get_metadados("s1", colecao)
+    assert b"".join(crud.iter_script(metadados, colecao)) == b"SELECT 2;"
+
+
+@pytest.fixture
+def script_no_endpoint(colecao):
+    # A rota é assíncrona: delega as leituras ao CRUD síncrono sobre a coleção do mongomock
+    async def get_metadados(nome_schema, collection, versao=None):
+        return crud.get_metadados(nome_schema, colecao, versao)
+
+    async def listar_versoes(nome_schema, collection):
+        return crud.listar_versoes(nome_schema, colecao)
+
+    async def iter_script(metadados, collection, inicio=0, fim=None):
+        for parte in crud.iter_script(metadados, colecao, inicio, fim):
+            yield parte
+
+    async def iter_script_gzip(metadados, collection):
+        for parte in crud.iter_script_gzip(metadados, colecao):
+            yield parte
+
+    with patch.multiple(
+        "app.db.crud_async.dados_sinteticos",
+        get_metadados=get_metadados, listar_versoes=listar_versoes, iter_script=iter_script, iter_script_gzip=iter_script_gzip
+    ):
+        yield _gravar(colecao)
+
+
+def test_baixar_script_inteiro(script_no_endpoint):
+    response = client.get("/dicionariodados/gerar-dados/s1/script")
+    assert response.status_code == 200
+    assert response.text == SCRIPT
+    assert response.headers["content-length"] == str(len(SCRIPT))
+    assert response.headers["etag"] == f'"{script_no_endpoint["sha256"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_baixar_script_faixa(script_no_endpoint):
+    response = client.get("/dicionariodados/gerar-dados/s1/script", headers={"Range": "bytes=60-139"})
+    assert response.status_code == 206
+    assert response.content == SCRIPT.encode()[60:140]
+    assert response.headers["content-range"] == f"bytes 60-139/{len(SCRIPT)}"
+
+    response = client.get("/dicionariodados/gerar-dados/s1/script", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == SCRIPT.encode()[-10:]
+
+    response = client.get("/dicionariodados/gerar-dados/s1/script", headers={"Range": f"bytes={len(SCRIPT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(SCRIPT)}"
+
+
+def test_baixar_script_gzip_repassa_blocos(script_no_endpoint):
+    response = client.get("/dicionariodados/gerar-dados/s1/script", params={"gzip": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(response.content) == SCRIPT.encode()
+
+
+def test_metadados_script(script_no_endpoint):
+    response = client.get("/dicionariodados/gerar-dados/s1/metadados")
+    assert response.status_code == 200
+    assert response.json()["linhas"] == {"t": 20}
+    assert response.json()["bytes"] == len(SCRIPT)
+    assert "_id" not in response.json()
+    assert client.get("/dicionariodados/gerar-dados/outro/metadados").status_code == 404
+
+
+def test_gerar_dados_executar_persiste_em_blocos(colecao, versao_schema_fixa):
+    from app.api.v1.endpoints import generate_data
+    schema = {"nome_schema": "public", "t": {"columns": [{"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False}]}}
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    chunks = [("t", [{"id": 1}, {"id": 2}]), ("t", [{"id": 3}])]
+    app.dependency_overrides[generate_data.get_dados_sinteticos_collection] = lambda: colecao
+    try:
+        with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema), \
+             patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector), \
+             patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+             patch("app.services.data_generation.iter_fake_data", return_value=iter(chunks)), \
+             patch("app.services.data_generation.copy_fake_data", side_effect=lambda conn, schema, lotes, on_table_loaded=None: list(lotes)):
+            response = client.post("/dicionariodados/gerar-dados/public", params={"conector_nome": "fake", "persistir_sql": True})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    metadados = crud.get_metadados("public", colecao)
+    assert metadados["linhas"] == {"t": 3}
+    assert crud.get_sql("public", colecao)["sql"].count("INSERT INTO public.t") == 3
+
+
+def test_listar_versoes_endpoint(script_no_endpoint):
+    response = client.get("/dicionariodados/gerar-dados/s1/versoes")
+    assert response.status_code == 200
+    assert [v["script_id"] for v in response.json()] == [script_no_endpoint["script_id"]]
+
+
+def _replay(colecao, versao):
+    from app.api.v1.endpoints import generate_data
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    copiados = []
+    cur.copy_expert.side_effect = lambda sql, arquivo, size=None: copiados.append((sql, arquivo.read()))
+    app.dependency_overrides[generate_data.get_dados_sinteticos_collection] = lambda: colecao
+    try:
+        with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector), \
+             patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+             patch("app.db.crud.schemas.get_versao_schema", return_value=2), \
+             patch("app.db.postgres_pool.PoolConexoes.obter", return_value=conn), \
+             patch("app.db.postgres_pool.PoolConexoes.devolver"):
+            response = client.post(f"/dicionariodados/gerar-dados/s1/versoes/{versao}/replay", params={"conector_nome": "fake"})
+    finally:
+        app.dependency_overrides.clear()
+    return response, cur, copiados, conn
+
+
+def test_replay_versao_copy_sem_regerar(colecao):
+    script = "COPY public.t (id, nome) FROM stdin;\n1\ta\\nb\n2\t\\N\n\\.\nCOPY public.u (id) FROM stdin;\n9\n\\.\n"
+    versao = _gravar(colecao, texto=script, tamanho_bloco=16, formato_sql="copy", versao_schema=1)
+    with patch("app.services.data_generation.iter_fake_data") as mock_gerar:
+        response, cur, copiados, conn = _replay(colecao, versao["script_id"])
+    assert response.status_code == 200
+    assert response.json()["schema_alterado"] is True
+    mock_gerar.assert_not_called()
+    assert copiados == [
+        ("COPY public.t (id, nome) FROM stdin", "1\ta\\nb\n2\t\\N\n"),
+        ("COPY public.u (id) FROM stdin", "9\n"),
+    ]
+    conn.commit.assert_called_once()
+
+
+def test_replay_versao_insert_em_lotes(colecao):
+    versao = _gravar(colecao, formato_sql="insert")
+    with patch("app.services.data_generation.REPLAY_BATCH_BYTES", 100):
+        response, cur, _, _ = _replay(colecao, versao["script_id"])
+    assert response.status_code == 200
+    executados = [c[0][0] for c in cur.execute.call_args_list]
+    assert len(executados) > 1
+    assert "".join(executados) == SCRIPT
+    assert all(lote.startswith("INSERT INTO ") for lote in executados)
+
+
+def test_replay_versao_insert_multi_linhas(colecao):
+    script = "INSERT INTO public.t (a) VALUES\n(1),\n(2);\nINSERT INTO public.t (a) VALUES\n(3);\n"
+    versao = _gravar(colecao, texto=script, formato_sql="insert", linhas_por_insert=2)
+    with patch("app.services.data_generation.REPLAY_BATCH_BYTES", 10):
+        response, cur, _, _ = _replay(colecao, versao["script_id"])
+    assert response.status_code == 200
+    assert [c[0][0] for c in cur.execute.call_args_list] == [
+        "INSERT INTO public.t (a) VALUES\n(1),\n(2);\n", "INSERT INTO public.t (a) VALUES\n(3);\n"
+    ]
+
+
+def test_replay_versao_insert_nao_corta_literal_multilinha(colecao):
+    primeiro = "INSERT INTO public.t (a, b) VALUES (1, 'x;\nINSERT INTO public.t (a) VALUES (''y'');\nz');\n"
+    script = primeiro + "INSERT INTO public.t (a) VALUES (2);\n"
+    versao = _gravar(colecao, texto=script, formato_sql="insert")
+    with patch("app.services.data_generation.REPLAY_BATCH_BYTES", 10):
+        response, cur, _, _ = _replay(colecao, versao["script_id"])
+    assert response.status_code == 200
+    assert [c[0][0] for c in cur.execute.call_args_list] == [primeiro, "INSERT INTO public.t (a) VALUES (2);\n"]
+
+
+def test_replay_versao_inexistente(colecao):
+    response, _, _, _ = _replay(colecao, "inexistente")
+    assert response.status_code == 404
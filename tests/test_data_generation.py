@@ -2,7 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.main import app
-from app.services import data_generation
+from app.services import check_constraints, data_generation, vectorized_generation
 import os
 import json
 
@@ -10,48 +10,33 @@ client = TestClient(app)
 
 PSYCOPG2_CONNECT_PATH = "psycopg2.connect"
 
+requer_numpy = pytest.mark.skipif(not vectorized_generation.NUMPY_DISPONIVEL, reason="numpy não instalado")
+
 def load_payload(filename):
     with open(os.path.join(os.path.dirname(__file__), "payloads", filename), encoding="utf-8") as f:
         return json.load(f)
 
-def test_extract_check_values_array():
-    expr = "ARRAY['A','B','C']"
-    assert data_generation.extract_check_values(expr) == ['A', 'B', 'C']
-
-def test_extract_check_values_in():
-    expr = "IN ('X','Y')"
-    assert data_generation.extract_check_values(expr) == ['X', 'Y']
-
-def test_extract_check_values_none():
-    expr = "SOMETHING ELSE"
-    assert data_generation.extract_check_values(expr) is None
-
-def test_extract_numeric_constraint_gt():
-    assert data_generation.extract_numeric_constraint("col > 10") == 11
-
-def test_extract_numeric_constraint_lt():
-    assert data_generation.extract_numeric_constraint("col < 5") == 4
-
-def test_extract_numeric_constraint_none():
-    assert data_generation.extract_numeric_constraint("col = 5") is None
-
-def test_extract_boolean_constraint_in():
-    assert data_generation.extract_boolean_constraint("IN ('t','f')") == ['t', 'f']
-
-def test_extract_boolean_constraint_eq():
-    assert data_generation.extract_boolean_constraint("= 't'") == ['t']
-
-def test_extract_boolean_constraint_none():
-    assert data_generation.extract_boolean_constraint("col = 1") is None
-
-def test_extract_length_equals_constraint_eq():
-    assert data_generation.extract_length_equals_constraint("length(col) = 16") == 16
-
-def test_extract_length_equals_constraint_spaces():
-    assert data_generation.extract_length_equals_constraint("length(col)    =    8") == 8
-
-def test_extract_length_equals_constraint_none():
-    assert data_generation.extract_length_equals_constraint("col = 5") is None
+@pytest.mark.parametrize("expression, type_, length, esperado", [
+    ("ARRAY['A','B','C']", "text", None, lambda v: v in ('A', 'B', 'C')),
+    ("IN ('X','Y')", "text", None, lambda v: v in ('X', 'Y')),
+    ("col > 10", "integer", None, lambda v: v >= 11),
+    ("col < 5", "integer", None, lambda v: v <= 4),
+    ("col = 5", "integer", None, lambda v: v == 5),
+    ("IN ('t','f')", "boolean", None, lambda v: v in ('t', 'f')),
+    ("= 't'", "boolean", None, lambda v: v == 't'),
+    ("length(col) = 16", data_generation.CHARACTER_VARYING, 16, lambda v: len(v) == 16),
+    ("length(col)    =    8", data_generation.CHARACTER_VARYING, 20, lambda v: len(v) == 8),
+])
+def test_check_constraint_sample(expression, type_, length, esperado):
+    sample = data_generation._compile_check_constraint(
+        {"column": "col", "type": type_, "length": length, "check_constraint": {"expression": expression}}
+    )
+    assert all(esperado(sample(data_generation.chunk_faker(seed))) for seed in range(20))
+
+def test_check_constraint_nao_reconhecido():
+    col = {"column": "col", "type": "text", "check_constraint": {"expression": "SOMETHING ELSE"}}
+    assert data_generation._compile_check_constraint(col) is None
+    assert check_constraints.compile_check(col).problems
 
 def test_topological_sort_tables():
     schema = {
@@ -122,7 +107,7 @@ def test_get_max_pk_value_success():
         mock_cursor = MagicMock()
         mock_cursor.fetchone.return_value = [42]
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-        mock_connect.return_value.__enter__.return_value = mock_conn
+        mock_connect.return_value = mock_conn
         val = data_generation.get_max_pk_value({'host': 'x'}, 'schema', 'table', 'pk')
         assert val == 42
 
@@ -132,7 +117,7 @@ def test_get_max_pk_value_none():
         mock_cursor = MagicMock()
         mock_cursor.fetchone.return_value = [None]
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-        mock_connect.return_value.__enter__.return_value = mock_conn
+        mock_connect.return_value = mock_conn
         val = data_generation.get_max_pk_value({'host': 'x'}, 'schema', 'table', 'pk')
         assert val == 0
 
@@ -141,6 +126,56 @@ def test_get_max_pk_value_exception():
         val = data_generation.get_max_pk_value({}, "schema", "table", "pk")
         assert val == 0
 
+PK_SCHEMA = {
+    "nome_schema": "public",
+    "tabela1": {"columns": [{"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False}]},
+    "tabela2": {"columns": [{"column": "cod", "type": "bigint", "is_primary_key": True, "is_foreign_key": False}]}
+}
+
+def test_pk_start_vals_single_query():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [(0, 7), (1, None)]
+        vals = data_generation._get_pk_start_vals(PK_SCHEMA, ["tabela1", "tabela2"], {'host': 'x'})
+        assert vals == {("tabela1", "id"): 7, ("tabela2", "cod"): 0}
+        mock_connect.assert_called_once()
+        query = mock_cursor.execute.call_args_list[0][0][0]
+        assert mock_cursor.execute.call_count == 1
+        assert "FROM public.tabela1" in query and "FROM public.tabela2" in query and "UNION ALL" in query
+
+def test_pk_start_vals_fallback_per_pk():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.execute.side_effect = [Exception("relation does not exist"), None, Exception("relation does not exist")]
+        mock_cursor.fetchone.return_value = [5]
+        vals = data_generation._get_pk_start_vals(PK_SCHEMA, ["tabela1", "tabela2"], {'host': 'x'})
+        assert vals == {("tabela1", "id"): 5, ("tabela2", "cod"): 0}
+
+def test_pk_start_vals_reservar_ids():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_conn = mock_connect.return_value
+        mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.side_effect = [
+            [(0, "public.tabela1_id_seq"), (1, None)],
+            [(0, 40), (1, 3)]
+        ]
+        vals = data_generation._get_pk_start_vals(PK_SCHEMA, ["tabela1", "tabela2"], {'host': 'x'}, 10, reservar_ids=True)
+        assert vals == {("tabela1", "id"): 40, ("tabela2", "cod"): 3}
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert "pg_advisory_xact_lock" in queries[0]
+        assert "FROM public.tabela1_id_seq" in queries[2]
+        assert "setval" in queries[3]
+        assert mock_cursor.execute.call_args_list[3][0][1] == ["public.tabela1_id_seq", 50]
+        mock_conn.commit.assert_called_once()
+
+def test_pk_start_vals_reservar_ids_propagates_errors():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.execute.side_effect = Exception("permission denied")
+        with pytest.raises(Exception, match="permission denied"):
+            data_generation._get_pk_start_vals(PK_SCHEMA, ["tabela1"], {'host': 'x'}, 10, reservar_ids=True)
+        mock_connect.return_value.rollback.assert_called()
+
 def test_generate_fake_data_no_conn_params():
     schema = load_payload("schema_simple.json")
     data = data_generation.generate_fake_data(schema, 2)
@@ -153,9 +188,13 @@ def test_generate_fake_data_with_conn_params():
     schema = load_payload("schema_simple.json")
     schema["tabela1"]["columns"][0]["is_primary_key"] = True
     schema["tabela1"]["columns"][0]["type"] = "integer"
-    with patch("app.services.data_generation.get_max_pk_value", return_value=100):
-        data = data_generation.generate_fake_data(schema, 1, conn_params={})
-        assert data["tabela1"][0]["id"] in (1, 101)
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [(0, 100)]
+        data = data_generation.generate_fake_data(schema, 1, conn_params={'host': 'x'})
+        assert data["tabela1"][0]["id"] == 101
+        mock_connect.assert_called_once()
+        mock_cursor.execute.assert_called_once_with('SELECT 0, COALESCE(MAX(id), 0) FROM public.tabela1')
 
 def test_generate_fake_data_not_null_fallback():
     schema = load_payload("schema_notnull.json")
@@ -163,15 +202,270 @@ def test_generate_fake_data_not_null_fallback():
     assert data["tabela1"][0]["id"] is not None
     assert data["tabela1"][0]["nome"] is not None
 
+def test_iter_insert_sql_multi_row_values():
+    schema = {"nome_schema": "public", "tabela1": {"columns": [{"column": "id"}, {"column": "nome"}]}}
+    rows = [{"id": i, "nome": f"n'{i}"} for i in range(5)]
+    sql = data_generation.generate_insert_sql(schema, {"tabela1": rows}, rows_per_statement=2)
+    comandos = sql.split(";\n")
+    assert len(comandos) == 3
+    assert all(c.startswith("INSERT INTO public.tabela1 (id, nome) VALUES\n") for c in comandos)
+    assert sql.count("INSERT INTO") == 3 and sql.endswith("(4, 'n''4');")
+    assert "(0, 'n''0'),\n(1, 'n''1');" in sql
+    assert data_generation.generate_insert_sql(schema, {"tabela1": rows}, rows_per_statement=1) == data_generation.generate_insert_sql(schema, {"tabela1": rows})
+
+def test_insert_fake_data_execute_values():
+    schema = {"nome_schema": "public", "tabela1": {"columns": [{"column": "id"}, {"column": "nome"}]}}
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}, {"id": 2, "nome": None}]), ("tabela1", [{"id": 3, "nome": "c"}])]
+    carregadas = []
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect, \
+         patch("app.services.data_generation.execute_values") as mock_values:
+        data_generation.insert_fake_data({'host': 'x'}, schema, iter(chunks), page_size=500,
+                                         on_table_loaded=lambda t, n: carregadas.append((t, n)))
+    primeira = mock_values.call_args_list[0]
+    assert primeira[0][1] == "INSERT INTO public.tabela1 (id, nome) VALUES %s"
+    assert primeira[0][2] == [(1, "a"), (2, None)] and primeira[1]["page_size"] == 500
+    assert carregadas == [("tabela1", 2), ("tabela1", 1)]
+    mock_connect.return_value.commit.assert_called_once()
+
 def test_execute_inserts_success():
     with patch(PSYCOPG2_CONNECT_PATH):
         data_generation.execute_inserts({'host': 'x'}, "INSERT INTO t (a) VALUES (1);INSERT INTO t (a) VALUES (2)")
 
+def test_execute_inserts_blocks_keep_semicolons():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        blocos = iter(["INSERT INTO t (a) VALUES ('x;y');", "  ", "INSERT INTO t (a) VALUES ('z');"])
+        data_generation.execute_inserts({'host': 'x'}, blocos)
+        assert [c[0][0] for c in mock_cursor.execute.call_args_list] == [
+            "INSERT INTO t (a) VALUES ('x;y');", "INSERT INTO t (a) VALUES ('z');"
+        ]
+        mock_connect.return_value.commit.assert_called_once()
+
+def test_iter_fake_data_chunks():
+    schema = load_payload("schema_simple.json")
+    chunks = list(data_generation.iter_fake_data(schema, 5, chunk_size=2))
+    assert [(t, len(rows)) for t, rows in chunks] == [("tabela1", 2), ("tabela1", 2), ("tabela1", 1)]
+    assert [r["id"] for _, rows in chunks for r in rows] == [1, 2, 3, 4, 5]
+
+def test_iter_fake_data_fk_uses_parent_keys():
+    schema = {
+        "nome_schema": "public",
+        "pai": {"depends_on": [], "columns": [
+            {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+            {"column": "nome", "type": "text", "is_primary_key": False, "is_foreign_key": False}
+        ]},
+        "filho": {"depends_on": ["pai"], "columns": [
+            {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+            {"column": "pai_id", "type": "integer", "is_primary_key": False, "is_foreign_key": True,
+             "references": {"table": "pai", "column": "id"}}
+        ]}
+    }
+    chunks = list(data_generation.iter_fake_data(schema, 7, chunk_size=3))
+    assert [t for t, _ in chunks] == ["pai"] * 3 + ["filho"] * 3
+    filhos = [r for t, rows in chunks if t == "filho" for r in rows]
+    assert all(1 <= r["pai_id"] <= 7 for r in filhos)
+
+def test_fk_sampler_from_pool():
+    pool = []
+    sampler = data_generation._fk_sampler(pool)
+    assert sampler(0, data_generation.fake) is None
+    pool.append(7)
+    assert sampler(1, data_generation.fake) == 7
+    assert data_generation._fk_sampler(None)(0, data_generation.fake) is None
+
+def test_compile_table_plan_kinds():
+    table_meta = {"columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "codigo", "type": "uuid", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "pai_id", "type": "integer", "is_primary_key": False, "is_foreign_key": True,
+         "references": {"table": "pai", "column": "id"}},
+        {"column": "status", "type": "text", "is_primary_key": False, "is_foreign_key": False,
+         "check_constraint": {"expression": "ARRAY['A','B']"}}
+    ]}
+    plan = data_generation.compile_table_plan(table_meta)
+    assert [(p.column, p.kind) for p in plan] == [("id", "pk_seq"), ("codigo", "value"), ("pai_id", "fk"), ("status", "value")]
+    generate_row = data_generation.bind_row_generator("filho", plan, {("filho", "id"): 10}, {("pai", "id"): [3]})
+    row = generate_row(4)
+    assert row["id"] == 15 and row["pai_id"] == 3 and row["status"] in ("A", "B")
+    assert isinstance(row["codigo"], str)
+
+def test_compile_check_constraint_parsed_once():
+    col = {"column": "status", "type": "text", "check_constraint": {"expression": "IN ('X','Y','Z')"}}
+    with patch("app.services.check_constraints.parse_check", wraps=check_constraints.parse_check) as mock_parse:
+        produce = data_generation.compile_value_producer(col)
+        data_generation.compile_value_producer(col)
+        valores = {produce(data_generation.fake) for _ in range(50)}
+        assert mock_parse.call_count == 1
+    assert valores <= {"X", "Y", "Z"}
+
+@requer_numpy
+def test_vector_engine_types_and_constraints():
+    table_meta = {"columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "nome", "type": data_generation.CHARACTER_VARYING, "length": 7, "is_primary_key": False, "is_foreign_key": False},
+        {"column": "valor", "type": "numeric", "is_primary_key": False, "is_foreign_key": False},
+        {"column": "ativo", "type": "boolean", "is_primary_key": False, "is_foreign_key": False},
+        {"column": "nascimento", "type": "date", "is_primary_key": False, "is_foreign_key": False},
+        {"column": "criado_em", "type": data_generation.TIMESTAMP_WO_TZ, "is_primary_key": False, "is_foreign_key": False},
+        {"column": "codigo", "type": "uuid", "is_primary_key": False, "is_foreign_key": False},
+        {"column": "status", "type": "text", "is_primary_key": False, "is_foreign_key": False,
+         "check_constraint": {"expression": "ARRAY['A','B']"}},
+        {"column": "qtd", "type": "integer", "is_primary_key": False, "is_foreign_key": False,
+         "check_constraint": {"expression": "qtd > 5"}},
+        {"column": "num_cartao", "type": data_generation.CHARACTER_VARYING, "is_primary_key": False, "is_foreign_key": False,
+         "check_constraint": {"expression": "length(num_cartao) = 16"}},
+        {"column": "pai_id", "type": "integer", "is_primary_key": False, "is_foreign_key": True,
+         "references": {"table": "pai", "column": "id"}},
+    ]}
+    plan = vectorized_generation.compile_vector_table_plan(table_meta)
+    generate_chunk = vectorized_generation.bind_chunk_generator("t", plan, {("t", "id"): 100}, {("pai", "id"): [1, 2]})
+    rows = generate_chunk(10, 60)
+    assert len(rows) == 50
+    assert [r["id"] for r in rows] == list(range(111, 161))
+    for r in rows:
+        assert isinstance(r["nome"], str) and len(r["nome"]) == 7
+        assert isinstance(r["valor"], float) and abs(r["valor"]) < 100000
+        assert isinstance(r["ativo"], bool)
+        assert len(r["nascimento"]) == 10 and len(r["criado_em"]) == 19 and r["criado_em"][10] == " "
+        assert len(r["codigo"]) == 36 and r["codigo"][14] == "4"
+        assert r["status"] in ("A", "B")
+        assert isinstance(r["qtd"], int) and r["qtd"] >= 6
+        assert r["num_cartao"].isdigit() and len(r["num_cartao"]) == 16
+        assert r["pai_id"] in (1, 2)
+
+@requer_numpy
+def test_iter_fake_data_numpy_engine():
+    schema = load_payload("schema_simple.json")
+    chunks = list(data_generation.iter_fake_data(schema, 5, chunk_size=2, engine="numpy"))
+    assert [r["id"] for _, rows in chunks for r in rows] == [1, 2, 3, 4, 5]
+    assert all(isinstance(r["nome"], str) for _, rows in chunks for r in rows)
+
+def test_iter_fake_data_engine_invalido():
+    with pytest.raises(ValueError):
+        list(data_generation.iter_fake_data(load_payload("schema_simple.json"), 1, engine="outro"))
+
+def test_topological_levels():
+    schema = {
+        "nome_schema": "public",
+        "a": {"depends_on": []},
+        "b": {"depends_on": []},
+        "c": {"depends_on": ["a"]},
+        "d": {"depends_on": ["b", "c"]}
+    }
+    assert data_generation.topological_levels(schema) == [["a", "b"], ["c"], ["d"]]
+
+def test_iter_fake_data_parallel_workers():
+    schema = {
+        "nome_schema": "public",
+        "pai": {"depends_on": [], "columns": [
+            {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False}
+        ]},
+        "outro": {"depends_on": [], "columns": [
+            {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False}
+        ]},
+        "filho": {"depends_on": ["pai"], "columns": [
+            {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+            {"column": "pai_id", "type": "integer", "is_primary_key": False, "is_foreign_key": True,
+             "references": {"table": "pai", "column": "id"}}
+        ]}
+    }
+    chunks = list(data_generation.iter_fake_data(schema, 9, chunk_size=4, workers=2))
+    assert [t for t, _ in chunks] == ["pai"] * 3 + ["outro"] * 3 + ["filho"] * 3
+    assert [r["id"] for t, rows in chunks if t == "filho" for r in rows] == list(range(1, 10))
+    assert all(1 <= r["pai_id"] <= 9 for t, rows in chunks if t == "filho" for r in rows)
+
+SCHEMA_SEED = {
+    "nome_schema": "public",
+    "pai": {"depends_on": [], "columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "nome", "type": data_generation.CHARACTER_VARYING, "length": 8, "is_primary_key": False, "is_foreign_key": False},
+        {"column": "nascimento", "type": "date", "is_primary_key": False, "is_foreign_key": False},
+        {"column": "criado_em", "type": data_generation.TIMESTAMP_WO_TZ, "is_primary_key": False, "is_foreign_key": False}
+    ]},
+    "filho": {"depends_on": ["pai"], "columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "pai_id", "type": "integer", "is_primary_key": False, "is_foreign_key": True,
+         "references": {"table": "pai", "column": "id"}},
+        {"column": "status", "type": "text", "is_primary_key": False, "is_foreign_key": False,
+         "check_constraint": {"expression": "ARRAY['A','B','C']"}},
+        {"column": "codigo", "type": "uuid", "is_primary_key": False, "is_foreign_key": False}
+    ]}
+}
+
+def _gerar_por_tabela(**kwargs):
+    data = {}
+    for table, rows in data_generation.iter_fake_data(SCHEMA_SEED, 9, chunk_size=4, **kwargs):
+        data.setdefault(table, []).extend(rows)
+    return data
+
+@pytest.mark.parametrize("engine", ["faker", pytest.param("numpy", marks=requer_numpy)])
+def test_seed_reproduzivel_com_qualquer_numero_de_workers(engine):
+    base = _gerar_por_tabela(engine=engine, seed=42)
+    assert base == _gerar_por_tabela(engine=engine, seed=42)
+    assert base == _gerar_por_tabela(engine=engine, seed=42, workers=2)
+    assert base != _gerar_por_tabela(engine=engine, seed=43)
+    assert all(r["nascimento"] <= "2025-01-01" and r["criado_em"] >= "2020-01-01" for r in base["pai"])
+
+def test_seed_lote_independe_de_outras_tabelas_e_da_ordem():
+    chunk_a = data_generation._bind_chunk_generator("faker", "pai", SCHEMA_SEED["pai"], {}, None, seed=7)
+    chunk_b = data_generation._bind_chunk_generator("faker", "pai", SCHEMA_SEED["pai"], {}, None, seed=7)
+    depois = chunk_a(4, 8)
+    chunk_a(0, 4)
+    assert chunk_b(4, 8) == depois
+    assert data_generation.derive_seed(None, "pai", 0) is None
+
+def test_generate_fake_data_seed():
+    schema = load_payload("schema_simple.json")
+    assert data_generation.generate_fake_data(schema, 5, seed=1) == data_generation.generate_fake_data(schema, 5, seed=1)
+
+def test_generate_insert_sql_matches_stream():
+    schema = load_payload("schema_simple.json")
+    fake_data = {"tabela1": [{"id": 1, "nome": "O'Neil"}, {"id": 2, "nome": None}]}
+    sql = data_generation.generate_insert_sql(schema, fake_data)
+    assert sql == "\n".join(data_generation.iter_insert_sql(schema, iter(fake_data.items())))
+    assert "VALUES (1, 'O''Neil');" in sql and "VALUES (2, NULL);" in sql
+
+def test_generate_copy_rows_escapes():
+    rows = [{"id": 1, "nome": "a;b\tc\nd\\e", "ativo": True, "obs": None}]
+    out = data_generation.generate_copy_rows(["id", "nome", "ativo", "obs"], rows)
+    assert out == "1\ta;b\\tc\\nd\\\\e\tt\t\\N\n"
+
+def test_copy_fake_data_success():
+    schema = load_payload("schema_simple.json")
+    chunks = iter([("tabela1", [{"id": 1, "nome": "x;y"}]), ("tabela1", [{"id": 2, "nome": "z"}]), ("vazia", [])])
+    enviados = []
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_conn = mock_connect.return_value
+        mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.copy_expert.side_effect = lambda stmt, f, size=8192: enviados.append((stmt, f.read()))
+        data_generation.copy_fake_data({'host': 'x'}, schema, chunks)
+        assert enviados == [("COPY public.tabela1 (id, nome) FROM STDIN", "1\tx;y\n2\tz\n")]
+        mock_conn.commit.assert_called_once()
+        mock_conn.close.assert_called_once()
+
+def test_chunk_reader_partial_reads():
+    reader = data_generation._ChunkReader(iter(["abc", "", "defg"]))
+    assert reader.read(2) == "ab"
+    assert reader.read(4) == "cdef"
+    assert reader.read(10) == "g"
+    assert reader.read(10) == ""
+
+def test_copy_fake_data_rollback_on_error():
+    schema = load_payload("schema_simple.json")
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_conn = mock_connect.return_value
+        mock_conn.cursor.return_value.__enter__.return_value.copy_expert.side_effect = Exception("fail")
+        with pytest.raises(Exception):
+            data_generation.copy_fake_data({'host': 'x'}, schema, {"tabela1": [{"id": 1, "nome": "a"}]})
+        mock_conn.rollback.assert_called_once()
+        mock_conn.commit.assert_not_called()
+
 def test_generate_data_schema_not_found():
     response = client.post("/dicionariodados/gerar-dados/inexistente", params={"conector_nome": "fake"})
     assert response.status_code == 404
     assert "Schema não encontrado" in response.text
 
+@pytest.mark.usefixtures("versao_schema_fixa")
 def test_generate_data_conector_not_found(monkeypatch):
     # Mocka o schema existente
     with patch("app.db.crud.schemas.get_schema_por_nome", return_value={"nome_schema": "schema_teste"}):
@@ -180,22 +474,211 @@ def test_generate_data_conector_not_found(monkeypatch):
             assert response.status_code == 404
             assert "Conector não encontrado" in response.text
 
+@pytest.mark.usefixtures("versao_schema_fixa")
 def test_generate_data_success(monkeypatch):
-    schema = {"nome_schema": "schema_teste"}
+    schema = load_payload("schema_simple.json")
     conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
-    fake_data = {"tabela": [{"id": 1}]}
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}])]
     with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema):
         with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector):
             with patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"):
-                with patch("app.services.data_generation.generate_fake_data", return_value=fake_data):
-                    with patch("app.services.data_generation.generate_insert_sql", return_value="INSERT;"):
-                        with patch("app.services.data_generation.execute_inserts") as mock_exec:
+                with patch("app.services.data_generation.iter_fake_data", return_value=iter(chunks)):
+                    with patch("app.services.data_generation.iter_insert_sql") as mock_sql:
+                        with patch("app.services.data_generation.copy_fake_data") as mock_copy:
                             response = client.post("/dicionariodados/gerar-dados/schema_teste", params={"conector_nome": "fake"})
                             assert response.status_code == 200
                             assert "Dados gerados e inseridos com sucesso" in response.text
-                            mock_exec.assert_called()
+                            mock_copy.assert_called()
+                            mock_sql.assert_not_called()
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_success_insert(monkeypatch):
+    schema = load_payload("schema_simple.json")
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}])]
+    executados = []
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema):
+        with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector):
+            with patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"):
+                with patch("app.services.data_generation.iter_fake_data", return_value=iter(chunks)):
+                    with patch("app.services.data_generation.execute_inserts", side_effect=lambda params, sql: executados.extend(sql)) as mock_exec:
+                        response = client.post(
+                            "/dicionariodados/gerar-dados/schema_teste",
+                            params={"conector_nome": "fake", "metodo_carga": "insert"}
+                        )
+                        assert response.status_code == 200
+                        assert mock_exec.call_args[0][0].conn_params == {'host': 'localhost', 'port': 5432, 'dbname': 'test', 'user': 'user', 'password': 'senha'}
+                        assert executados == ["INSERT INTO public.tabela1 (id, nome) VALUES (1, 'a');"]
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_insert_multi_row_usa_execute_values():
+    schema = load_payload("schema_simple.json")
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}])]
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema), \
+         patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector), \
+         patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+         patch("app.services.data_generation.iter_fake_data", return_value=iter(chunks)), \
+         patch("app.services.data_generation.execute_inserts") as mock_exec, \
+         patch("app.services.data_generation.insert_fake_data") as mock_insert:
+        response = client.post(
+            "/dicionariodados/gerar-dados/schema_teste",
+            params={"conector_nome": "fake", "metodo_carga": "insert", "linhas_por_insert": 200}
+        )
+    assert response.status_code == 200
+    mock_exec.assert_not_called()
+    assert mock_insert.call_args[1]["page_size"] == 200
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_modo_sql_persiste(monkeypatch):
+    schema = load_payload("schema_simple.json")
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}]), ("tabela1", [{"id": 2, "nome": "b"}])]
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema):
+        with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector):
+            with patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"):
+                with patch("app.services.data_generation.iter_fake_data", return_value=iter(chunks)):
+                    with patch("app.db.crud.dados_sinteticos.upsert_sql") as mock_upsert:
+                        response = client.post(
+                            "/dicionariodados/gerar-dados/schema_teste",
+                            params={"conector_nome": "fake", "modo": "sql", "persistir_sql": True}
+                        )
+                        assert response.status_code == 200
+                        sql = response.json()["sql"]
+                        assert sql.count("INSERT INTO public.tabela1") == 2
+                        assert mock_upsert.call_args[0][1] == sql
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_seed_repassada_e_persistida(monkeypatch):
+    schema = load_payload("schema_simple.json")
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema):
+        with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector):
+            with patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"):
+                with patch("app.services.data_generation.iter_fake_data", return_value=iter([("tabela1", [{"id": 1, "nome": "a"}])])) as mock_iter:
+                    with patch("app.db.crud.dados_sinteticos.upsert_sql") as mock_upsert:
+                        response = client.post(
+                            "/dicionariodados/gerar-dados/schema_teste",
+                            params={"conector_nome": "fake", "modo": "sql", "persistir_sql": True, "seed": 42}
+                        )
+    assert response.status_code == 200
+    assert mock_iter.call_args.kwargs["seed"] == 42
+    assert mock_upsert.call_args.kwargs["seed"] == 42 and mock_upsert.call_args.kwargs["engine"] == "faker"
+
+def _post_sql_stream(params, chunks):
+    schema = load_payload("schema_simple.json")
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema):
+        with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector):
+            with patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"):
+                with patch("app.services.data_generation.iter_fake_data", return_value=iter(chunks)):
+                    return client.post(
+                        "/dicionariodados/gerar-dados/schema_teste",
+                        params={"conector_nome": "fake", "modo": "sql_stream", **params}
+                    )
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_sql_stream_insert():
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}]), ("tabela1", [{"id": 2, "nome": "b"}])]
+    response = _post_sql_stream({}, chunks)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text == (
+        "INSERT INTO public.tabela1 (id, nome) VALUES (1, 'a');\n"
+        "INSERT INTO public.tabela1 (id, nome) VALUES (2, 'b');\n"
+    )
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_sql_stream_copy_gzip():
+    chunks = [("tabela1", [{"id": 1, "nome": "a"}]), ("tabela1", [{"id": 2, "nome": None}])]
+    response = _post_sql_stream({"formato_sql": "copy", "gzip": True}, chunks)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "COPY public.tabela1 (id, nome) FROM stdin;\n1\ta\n2\t\\N\n\\.\n"
+
+def test_generate_data_modo_invalido():
+    response = client.post("/dicionariodados/gerar-dados/schema_teste", params={"conector_nome": "fake", "modo": "outro"})
+    assert response.status_code == 400
+
+def test_generate_data_metodo_carga_invalido():
+    response = client.post("/dicionariodados/gerar-dados/schema_teste", params={"conector_nome": "fake", "metodo_carga": "outro"})
+    assert response.status_code == 400
 
 def test_get_dados_gerados_not_found():
     response = client.get("/dicionariodados/gerar-dados/inexistente")
     assert response.status_code == 404
-    assert "Nenhum dado sintético encontrado" in response.text 
\ No newline at end of file
+    assert "Nenhum dado sintético encontrado" in response.text 
+
+def test_iter_fake_data_completar_com_chaves_existentes():
+    chunks = list(data_generation.iter_fake_data(
+        SCHEMA_SEED, {"filho": 6}, chunk_size=4, seed=3, existing_keys={("pai", "id"): [100, 101]}
+    ))
+    assert [t for t, _ in chunks] == ["filho", "filho"]
+    assert {r["pai_id"] for _, rows in chunks for r in rows} <= {100, 101}
+    paralelo = data_generation.iter_fake_data(
+        SCHEMA_SEED, {"filho": 6}, chunk_size=4, seed=3, existing_keys={("pai", "id"): [100, 101]}, workers=2
+    )
+    assert [r for _, rows in paralelo for r in rows] == [r for _, rows in chunks for r in rows]
+
+def test_count_table_rows_single_query():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [(0, 3), (1, 0)]
+        assert data_generation.count_table_rows({'host': 'x'}, PK_SCHEMA, ["tabela1", "tabela2"]) == {"tabela1": 3, "tabela2": 0}
+        assert mock_cursor.execute.call_count == 1
+        assert "COUNT(*) FROM public.tabela2" in mock_cursor.execute.call_args[0][0]
+
+def test_load_existing_keys_server_side_cursor():
+    from datetime import date
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_conn = mock_connect.return_value
+        mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.__iter__.side_effect = [iter([(1,), (2,)]), iter([(date(2024, 1, 2),)])]
+        keys = data_generation.load_existing_keys({'host': 'x'}, PK_SCHEMA, [("tabela1", "id"), ("tabela2", "cod")], limit=50)
+    assert keys == {("tabela1", "id"): [1, 2], ("tabela2", "cod"): ["2024-01-02"]}
+    assert all("name" in c.kwargs for c in mock_conn.cursor.call_args_list)
+    assert mock_cursor.execute.call_args_list[0][0][1] == (50,)
+
+def test_load_existing_keys_tuplas_sem_limite():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.__iter__.side_effect = [iter([(1, 2), (3, 4)])]
+        keys = data_generation.load_existing_keys({'host': 'x'}, PK_SCHEMA, [("tabela2", ("a", "b"))], limit=None)
+    assert keys == {("tabela2", ("a", "b")): [(1, 2), (3, 4)]}
+    sql, params = mock_cursor.execute.call_args[0]
+    assert "SELECT a, b FROM public.tabela2 WHERE a IS NOT NULL AND b IS NOT NULL" in sql and params == (None,)
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_completar_dados_gera_so_o_que_falta():
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    carregado = {}
+
+    def copy_consumindo(conn_params, schema, chunks, on_table_loaded=None):
+        for table, rows in chunks:
+            carregado.setdefault(table, []).extend(rows)
+
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA_SEED), \
+         patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector), \
+         patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+         patch("app.services.data_generation._get_pk_start_vals", return_value={("pai", "id"): 4, ("filho", "id"): 10}), \
+         patch("app.services.data_generation.count_table_rows", return_value={"pai": 4, "filho": 10}), \
+         patch("app.services.data_generation.load_existing_keys", return_value={("pai", "id"): [1, 2, 3, 4]}) as mock_chaves, \
+         patch("app.services.data_generation.copy_fake_data", side_effect=copy_consumindo):
+        response = client.post(
+            "/dicionariodados/gerar-dados/public/completar", params={"conector_nome": "fake"}, json={"pai": 3, "filho": 13}
+        )
+    assert response.status_code == 200
+    assert response.json()["linhas_geradas"] == {"filho": 3}
+    assert mock_chaves.call_args[0][2] == [("pai", "id")]
+    assert list(carregado) == ["filho"]
+    assert [r["id"] for r in carregado["filho"]] == [11, 12, 13]
+    assert all(r["pai_id"] in (1, 2, 3, 4) for r in carregado["filho"])
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_completar_dados_tabela_inexistente():
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA_SEED):
+        response = client.post(
+            "/dicionariodados/gerar-dados/public/completar", params={"conector_nome": "fake"}, json={"outra": 3}
+        )
+    assert response.status_code == 400
+    assert "outra" in response.json()["detail"]
@@ -2,4 +2,22 @@ def test_get_settings():
     from app.api.deps import get_settings
     settings = get_settings()
     assert settings is not None
-    assert hasattr(settings, "settings") or hasattr(settings, "__file__") 
\ No newline at end of file
+    assert hasattr(settings, "settings") or hasattr(settings, "__file__") 
+
+def test_crypto_cipher_lazy(monkeypatch):
+    import pytest
+    from app.utils import crypto
+    crypto.get_cipher.cache_clear()
+    monkeypatch.delenv("CRYPTO_KEY", raising=False)
+    try:
+        with pytest.raises(ValueError):
+            crypto.encrypt_password("segredo")
+    finally:
+        crypto.get_cipher.cache_clear()
+
+def test_mongo_client_lazy():
+    from app.db import mongo
+    mongo.fechar_client()
+    assert mongo._client is None
+    assert mongo.tabelas_collection() is not None
+    assert mongo._client is not None
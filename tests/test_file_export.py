@@ -0,0 +1,135 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.services import file_export
+import io
+import json
+import os
+import tarfile
+import zipfile
+
+client = TestClient(app)
+
+
+def _col(column, type_):
+    return {"column": column, "type": type_, "is_primary_key": False, "is_foreign_key": False}
+
+
+SCHEMA = {
+    "nome_schema": "public",
+    "pai": {"depends_on": [], "columns": [
+        _col("id", "integer"),
+        _col("nome", "text"),
+        _col("ativo", "boolean"),
+        _col("nascimento", "date"),
+    ]},
+    "filho": {"depends_on": ["pai"], "columns": [_col("id", "integer"), _col("pai_id", "integer")]},
+}
+CHUNKS = [
+    ("pai", [{"id": 1, "nome": 'a,"b"', "ativo": True, "nascimento": "2020-01-02"},
+             {"id": 2, "nome": "", "ativo": False, "nascimento": None}]),
+    ("pai", [{"id": 3, "nome": None, "ativo": True, "nascimento": "2021-03-04"}]),
+    ("filho", [{"id": 1, "pai_id": 3}]),
+]
+
+
+def test_csv_no_formato_do_copy(tmp_path):
+    arquivos = file_export.export_tables(SCHEMA, iter(CHUNKS), str(tmp_path), 'csv')
+    assert arquivos["pai"].arquivo == "pai.csv" and arquivos["pai"].linhas == 3
+    assert (tmp_path / "pai.csv").read_text(encoding="utf-8") == (
+        'id,nome,ativo,nascimento\n1,"a,""b""",t,2020-01-02\n2,"",f,\n3,,t,2021-03-04\n'
+    )
+    assert (tmp_path / "filho.csv").read_text(encoding="utf-8") == "id,pai_id\n1,3\n"
+
+
+def test_ndjson(tmp_path):
+    file_export.export_tables(SCHEMA, iter(CHUNKS), str(tmp_path), 'ndjson')
+    linhas = [json.loads(l) for l in (tmp_path / "pai.ndjson").read_text(encoding="utf-8").splitlines()]
+    assert linhas[0] == {"id": 1, "nome": 'a,"b"', "ativo": True, "nascimento": "2020-01-02"}
+    assert len(linhas) == 3 and linhas[2]["nome"] is None
+
+
+def test_parquet_com_tipos(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    file_export.export_tables(SCHEMA, iter(CHUNKS), str(tmp_path), 'parquet')
+    tabela = pq.read_table(tmp_path / "pai.parquet")
+    assert tabela.num_rows == 3
+    assert str(tabela.schema.field("nascimento").type) == "date32[day]"
+    assert tabela.column("ativo").to_pylist() == [True, False, True]
+    assert tabela.column("nome").to_pylist() == ['a,"b"', "", None]
+
+
+def test_lotes_consumidos_sob_demanda(tmp_path):
+    consumidos = []
+
+    def gerar():
+        for i in range(10):
+            consumidos.append(i)
+            yield "filho", [{"id": i, "pai_id": 1}]
+
+    arquivos = file_export.export_tables(SCHEMA, gerar(), str(tmp_path), 'csv', max_escritores=1)
+    assert arquivos["filho"].linhas == 10 and len(consumidos) == 10
+
+
+def test_erro_do_escritor_propagado(tmp_path):
+    with pytest.raises(KeyError):
+        file_export.export_tables(SCHEMA, iter([("filho", [{"id": 1}])] * 5), str(tmp_path), 'csv')
+
+
+def test_lotes_fora_de_ordem(tmp_path):
+    with pytest.raises(ValueError, match="consecutivos"):
+        file_export.export_tables(SCHEMA, iter([CHUNKS[0], CHUNKS[2], CHUNKS[1]]), str(tmp_path), 'csv')
+
+
+@pytest.mark.parametrize("empacotamento", ["zip", "tar", "tar.gz"])
+def test_export_archive(tmp_path, empacotamento):
+    destino = tmp_path / f"saida.{empacotamento}"
+    file_export.export_archive(SCHEMA, iter(CHUNKS), str(destino), 'csv', empacotamento)
+    if empacotamento == "zip":
+        with zipfile.ZipFile(destino) as zf:
+            nomes = zf.namelist()
+    else:
+        with tarfile.open(destino) as tf:
+            nomes = tf.getnames()
+    assert sorted(nomes) == ["filho.csv", "pai.csv"]
+    assert os.listdir(tmp_path) == [destino.name]
+
+
+def test_formato_invalido():
+    with pytest.raises(ValueError):
+        file_export.validar_formato("xml")
+
+
+def _exportar(**params):
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA), \
+         patch("app.services.data_generation.iter_fake_data", return_value=iter(CHUNKS)):
+        return client.post("/dicionariodados/gerar-dados/public/exportar", params=params)
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_exportar_download_zip():
+    response = _exportar(formato="csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert 'filename="public_csv.zip"' in response.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.read("filho.csv") == b"id,pai_id\n1,3\n"
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_exportar_salvar_em_diretorio_local(tmp_path):
+    with patch("app.api.v1.endpoints.generate_data.EXPORTACAO_DIR", str(tmp_path)):
+        response = _exportar(formato="ndjson", empacotamento="tar.gz", salvar_em="lote1")
+        invalido = _exportar(salvar_em="..")
+    assert response.status_code == 200
+    assert response.json()["arquivo"] == str(tmp_path / "lote1" / "public_ndjson.tar.gz")
+    assert response.json()["tabelas"]["pai"]["linhas"] == 3
+    assert invalido.status_code == 400
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_exportar_salvar_em_sem_diretorio_configurado():
+    with patch("app.api.v1.endpoints.generate_data.EXPORTACAO_DIR", ""):
+        response = _exportar(salvar_em="lote1")
+    assert response.status_code == 400
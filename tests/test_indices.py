@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from pymongo.errors import DuplicateKeyError
+from app.main import app
+from app.core.config import MONGO_URL, COLLECTION_CONECTORES, COLLECTION_SCHEMAS, COLLECTION_DADOS_SINTETICOS
+from app.db import indices
+from app.db.crud import dados_sinteticos as crud_dados_sinteticos
+from datetime import datetime
+import io
+import json
+
+mongomock = pytest.importorskip("mongomock")
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["teste_indices"]
+
+
+@pytest.fixture
+def db_real():
+    # O explain() só existe em um mongod de verdade; sem um acessível em MONGO_URL o teste é ignorado
+    import pymongo
+    try:
+        mongo_client = pymongo.MongoClient(MONGO_URL, serverSelectionTimeoutMS=500)
+        mongo_client.admin.command("ping")
+        mongo_client["teste_indices"][COLLECTION_CONECTORES].find({}).explain()
+    except Exception as e:
+        pytest.skip(f"mongod indisponível: {e}")
+    yield mongo_client["teste_indices"]
+    mongo_client.drop_database("teste_indices")
+    mongo_client.close()
+
+
+def test_garantir_indices_cria_unicos(db):
+    estado = indices.garantir_indices(db)
+    assert set(estado.values()) == {"ok"}
+    assert db[COLLECTION_CONECTORES].index_information()["uniq_conectores_nome"]["unique"] is True
+    db[COLLECTION_CONECTORES].insert_one({"nome": "c1"})
+    with pytest.raises(DuplicateKeyError):
+        db[COLLECTION_CONECTORES].insert_one({"nome": "c1"})
+    # Idempotente
+    assert indices.garantir_indices(db) == estado
+
+
+def test_migracao_remove_sql_duplicado_mantendo_o_mais_recente(db):
+    sql = db[COLLECTION_DADOS_SINTETICOS]
+    sql.insert_many([
+        {"nome_schema": "s1", "sql": "antigo", "created_at": datetime(2024, 1, 1)},
+        {"nome_schema": "s1", "sql": "novo", "created_at": datetime(2024, 2, 1)},
+        {"nome_schema": "s2", "sql": "unico", "created_at": datetime(2024, 1, 1)},
+    ])
+    assert indices.aplicar_migracoes(db) == indices.MIGRACOES[-1].versao
+    assert sql.count_documents({}) == 2
+    assert crud_dados_sinteticos.get_sql("s1", sql)["sql"] == "novo"
+    assert indices.versao_atual(db) == indices.MIGRACOES[-1].versao
+    # Já aplicada: não roda de novo
+    with patch.object(indices, "_descartar_sql_duplicado") as mock_descartar:
+        indices.aplicar_migracoes(db)
+    mock_descartar.assert_not_called()
+
+
+def test_migracao_com_nomes_duplicados_nao_bloqueia_demais_indices(db):
+    db[COLLECTION_SCHEMAS].insert_many([{"nome_schema": "s1"}, {"nome_schema": "s1"}])
+    with pytest.raises(indices.MigracaoFalhou, match="s1"):
+        indices.aplicar_migracoes(db)
+    assert indices.versao_atual(db) == 0
+
+    estado = indices.inicializar(db)
+    assert estado["uniq_schemas_nome_schema"] != "ok"
+    assert estado["uniq_conectores_nome"] == "ok"
+    assert db[COLLECTION_SCHEMAS].count_documents({}) == 2
+
+
+def test_cadastrar_conector_nome_duplicado_concorrente():
+    payload = {"nome": "dup", "host": "localhost", "porta": 5432, "banco": "b", "usuario": "u", "senha": "senha123", "nome_schema": "public"}
+    with patch("app.db.crud.connectors.get_conector_por_nome", return_value=None), \
+         patch("app.api.v1.endpoints.connectors._testar_conexao"), \
+         patch("app.db.crud.connectors.insert_conector", side_effect=DuplicateKeyError("E11000")):
+        response = client.post("/dicionariodados/connectors/", json=payload)
+    assert response.status_code == 400
+    assert "Já existe um conector" in response.json()["detail"]
+
+
+def test_cadastrar_schema_nome_duplicado():
+    arquivo = io.BytesIO(json.dumps({"tabela1": {"columns": []}}).encode())
+    with patch("app.api.v1.endpoints.schemas.validar_schema_json", return_value=True), \
+         patch("app.db.crud.schemas.insert_schema", side_effect=DuplicateKeyError("E11000")):
+        response = client.post(
+            "/dicionariodados/schemas/upload",
+            data={"nome_schema": "s1"},
+            files={"file": ("schema.json", arquivo, "application/json")}
+        )
+    assert response.status_code == 400
+    assert "Já existe um schema" in response.json()["detail"]
+
+
+def test_consultas_quentes_usam_ixscan(db_real):
+    indices.garantir_indices(db_real)
+    for colecao, filtro in indices.CONSULTAS_QUENTES:
+        estagios = indices.estagios_plano(db_real[colecao], filtro)
+        assert "IXSCAN" in estagios and "COLLSCAN" not in estagios, (colecao, filtro, estagios)
@@ -0,0 +1,219 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from app.main import app
+from app.services import job_service
+import os
+import json
+
+client = TestClient(app)
+
+JOB_ID = "job_teste"
+SCHEMA = {
+    "nome_schema": "public",
+    "tabela1": {"columns": [{"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False}]}
+}
+PARAMETROS = {"rows_per_table": 3, "modo": "executar", "chunk_size": 2, "engine": "faker", "workers": 1}
+
+
+class JobsEmMemoria:
+    """Substitui app.db.crud.jobs guardando os jobs em um dict."""
+    def __init__(self):
+        self.jobs = {}
+
+    def insert_job(self, job, collection):
+        self.jobs[job["job_id"]] = dict(job)
+        return job["job_id"]
+
+    def get_job(self, job_id, collection):
+        return self.jobs.get(job_id)
+
+    def update_job(self, job_id, campos, collection):
+        self.jobs[job_id].update(campos)
+        return True
+
+    def incrementar_progresso(self, job_id, tabela, campo, quantidade, collection):
+        progresso = self.jobs[job_id].setdefault("progresso", {}).setdefault(tabela, {})
+        progresso[campo] = progresso.get(campo, 0) + quantidade
+
+    def solicitar_cancelamento(self, job_id, collection):
+        job = self.jobs.get(job_id)
+        if not job or job["status"] in job_service.STATUS_FINAIS:
+            return False
+        job["cancelamento_solicitado"] = True
+        return True
+
+    def cancelamento_solicitado(self, job_id, collection):
+        return self.jobs[job_id].get("cancelamento_solicitado", False)
+
+    async def get_job_async(self, job_id, collection):
+        return self.get_job(job_id, collection)
+
+
+@pytest.fixture
+def jobs():
+    memoria = JobsEmMemoria()
+    with patch.multiple("app.db.crud.jobs", **{
+        nome: getattr(memoria, nome) for nome in (
+            "insert_job", "get_job", "update_job", "incrementar_progresso",
+            "solicitar_cancelamento", "cancelamento_solicitado"
+        )
+    }), patch("app.db.crud_async.jobs.get_job", memoria.get_job_async):
+        yield memoria
+
+
+def _copy_consumindo(conn_params, schema, chunks, on_table_loaded=None):
+    total = sum(len(rows) for _, rows in chunks)
+    if on_table_loaded:
+        on_table_loaded("tabela1", total)
+
+
+def test_executar_job_executar_atualiza_progresso(jobs):
+    job_id = job_service.criar_job("public", "conector", PARAMETROS, None)
+    with patch("app.services.data_generation.copy_fake_data", side_effect=_copy_consumindo):
+        job_service.executar_job(job_id, SCHEMA, {}, PARAMETROS, None, None)
+    job = jobs.jobs[job_id]
+    assert job["status"] == job_service.STATUS_CONCLUIDO
+    assert job["progresso"] == {"tabela1": {"linhas_geradas": 3, "linhas_inseridas": 3}}
+
+
+def test_executar_job_sql_persiste(jobs):
+    parametros = dict(PARAMETROS, modo="sql")
+    job_id = job_service.criar_job("public", "conector", parametros, None)
+    gravado = {}
+
+    def gravar_script(nome_schema, partes, collection, linhas=None, **extra):
+        gravado.update(sql=''.join(partes), linhas=dict(linhas))
+        return {"script_id": "v1", "bytes": len(gravado["sql"]), "sha256": "abc"}
+
+    with patch("app.db.crud.dados_sinteticos.gravar_script", side_effect=gravar_script):
+        job_service.executar_job(job_id, SCHEMA, {}, parametros, None, None)
+    assert jobs.jobs[job_id]["status"] == job_service.STATUS_CONCLUIDO
+    assert gravado["sql"].count("INSERT INTO public.tabela1") == 3
+    assert gravado["linhas"] == {"tabela1": 3}
+    assert jobs.jobs[job_id]["resultado"] == {"sql_persistido": True, "versao": "v1", "bytes": len(gravado["sql"]), "sha256": "abc"}
+
+
+def test_executar_job_cancelado(jobs):
+    job_id = job_service.criar_job("public", "conector", PARAMETROS, None)
+    assert job_service.solicitar_cancelamento(job_id, None)
+    with patch("app.services.data_generation.copy_fake_data", side_effect=_copy_consumindo) as mock_copy:
+        job_service.executar_job(job_id, SCHEMA, {}, PARAMETROS, None, None)
+    assert jobs.jobs[job_id]["status"] == job_service.STATUS_CANCELADO
+    mock_copy.assert_not_called()
+
+
+def test_executar_job_erro(jobs):
+    job_id = job_service.criar_job("public", "conector", PARAMETROS, None)
+    with patch("app.services.data_generation.copy_fake_data", side_effect=Exception("falhou")):
+        job_service.executar_job(job_id, SCHEMA, {}, PARAMETROS, None, None)
+    assert jobs.jobs[job_id]["status"] == job_service.STATUS_ERRO
+    assert jobs.jobs[job_id]["erro"] == "falhou"
+
+
+def test_criar_job_endpoint(jobs, versao_schema_fixa):
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA):
+        with patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector):
+            with patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"):
+                with patch("app.services.job_service.submeter_job") as mock_submeter:
+                    response = client.post("/dicionariodados/gerar-dados/public/jobs", params={"conector_nome": "fake"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert jobs.jobs[job_id]["status"] == job_service.STATUS_PENDENTE
+    mock_submeter.assert_called_once()
+
+    response = client.get(f"/dicionariodados/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["parametros"]["rows_per_table"] == 10
+
+    response = client.get(f"/dicionariodados/jobs/{job_id}/resultado")
+    assert response.status_code == 409
+
+    response = client.post(f"/dicionariodados/jobs/{job_id}/cancelar")
+    assert response.status_code == 200
+    assert jobs.jobs[job_id]["cancelamento_solicitado"] is True
+
+
+def test_resultado_job_concluido(jobs):
+    jobs.insert_job({"job_id": JOB_ID, "nome_schema": "public", "status": job_service.STATUS_CONCLUIDO,
+                     "parametros": {"modo": "executar"}, "progresso": {"tabela1": {"linhas_geradas": 3}}}, None)
+    response = client.get(f"/dicionariodados/jobs/{JOB_ID}/resultado")
+    assert response.status_code == 200
+    assert response.json()["progresso"] == {"tabela1": {"linhas_geradas": 3}}
+
+    response = client.post(f"/dicionariodados/jobs/{JOB_ID}/cancelar")
+    assert response.status_code == 409
+
+
+def test_job_not_found(jobs):
+    response = client.get("/dicionariodados/jobs/inexistente")
+    assert response.status_code == 404
+    assert "Job não encontrado" in response.text
+
+
+def test_resultado_job_sql_aponta_para_a_propria_versao(jobs):
+    mongomock = pytest.importorskip("mongomock")
+    from app.api.v1.endpoints import generate_data
+    from app.db.crud import dados_sinteticos as crud_dados_sinteticos
+    colecao = mongomock.MongoClient()["teste"]["dados_sinteticos"]
+    do_job = crud_dados_sinteticos.gravar_script("public", ["SELECT 1;\n"], colecao, linhas={"tabela1": 1})
+    mais_recente = crud_dados_sinteticos.gravar_script("public", ["SELECT 2;\n"], colecao, linhas={"tabela1": 2})
+    resultado = {"sql_persistido": True, "versao": do_job["script_id"], "bytes": do_job["bytes"], "sha256": do_job["sha256"]}
+    jobs.insert_job({"job_id": JOB_ID, "nome_schema": "public", "status": job_service.STATUS_CONCLUIDO,
+                     "parametros": {"modo": "sql"}, "progresso": {}, "resultado": resultado}, None)
+    app.dependency_overrides[generate_data.get_dados_sinteticos_collection] = lambda: colecao
+    try:
+        response = client.get(f"/dicionariodados/jobs/{JOB_ID}/resultado")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.json()["resultado"] == resultado
+    assert response.json()["script"]["script_id"] == do_job["script_id"] != mais_recente["script_id"]
+    assert response.json()["script"]["linhas"] == {"tabela1": 1}
+
+
+def test_encerrar_interrompe_jobs_em_execucao_e_pendentes(jobs):
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    iniciado = threading.Event()
+
+    def copy_ate_encerrar(conn_params, schema, chunks, on_table_loaded=None):
+        chunks = iter(chunks)
+        next(chunks)
+        iniciado.set()
+        while not job_service._cancelamentos[em_execucao].is_set():
+            threading.Event().wait(0.01)
+        list(chunks)
+
+    job_service._executor = ThreadPoolExecutor(max_workers=1)
+    em_execucao = job_service.criar_job("public", "conector", PARAMETROS, None)
+    pendente = job_service.criar_job("public", "conector", PARAMETROS, None)
+    with patch("app.services.data_generation.copy_fake_data", side_effect=copy_ate_encerrar):
+        job_service.submeter_job(em_execucao, SCHEMA, {}, PARAMETROS, None, None)
+        job_service.submeter_job(pendente, SCHEMA, {}, PARAMETROS, None, None)
+        assert iniciado.wait(5)
+        job_service.encerrar(timeout=5)
+    for job_id in (em_execucao, pendente):
+        assert jobs.jobs[job_id]["status"] == job_service.STATUS_ERRO
+        assert jobs.jobs[job_id]["erro"] == job_service.ERRO_ENCERRAMENTO
+    assert job_service._executor is None and not job_service._interrompidos
+
+
+def test_executar_job_carga_por_insert(jobs):
+    parametros = dict(PARAMETROS, metodo_carga="insert", linhas_por_insert=2)
+    job_id = job_service.criar_job("public", "conector", parametros, None)
+    carregado = []
+
+    def insert_consumindo(conn_params, schema, chunks, page_size=None, on_table_loaded=None):
+        for table, rows in chunks:
+            carregado.append((table, len(rows), page_size))
+            on_table_loaded(table, len(rows))
+
+    with patch("app.services.data_generation.insert_fake_data", side_effect=insert_consumindo), \
+         patch("app.services.data_generation.copy_fake_data") as mock_copy:
+        job_service.executar_job(job_id, SCHEMA, {}, parametros, None, None)
+    assert jobs.jobs[job_id]["status"] == job_service.STATUS_CONCLUIDO
+    mock_copy.assert_not_called()
+    assert carregado == [("tabela1", 2, 2), ("tabela1", 1, 2)]
+    assert jobs.jobs[job_id]["progresso"] == {"tabela1": {"linhas_geradas": 3, "linhas_inseridas": 3}}
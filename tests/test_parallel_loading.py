@@ -0,0 +1,125 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from app.main import app
+from app.db import postgres_pool
+from app.services import parallel_loading
+import threading
+import time
+
+client = TestClient(app)
+
+PSYCOPG2_CONNECT_PATH = "psycopg2.connect"
+COLUNA_ID = {"column": "id", "type": "integer", "is_primary_key": False, "is_foreign_key": False}
+SCHEMA = {
+    "nome_schema": "public",
+    "pai": {"depends_on": [], "columns": [COLUNA_ID]},
+    "outra": {"depends_on": [], "columns": [COLUNA_ID]},
+    "filho": {"depends_on": ["pai"], "columns": [COLUNA_ID, dict(COLUNA_ID, column="pai_id")]},
+}
+CHUNKS = [
+    ("pai", [{"id": 1}]), ("pai", [{"id": 2}]), ("outra", [{"id": 1}]),
+    ("filho", [{"id": 1, "pai_id": 1}]), ("filho", [{"id": 2, "pai_id": 2}]),
+]
+
+
+class CargaFalsa:
+    """Substitui data_generation.copy_fake_data registrando início/fim de cada shard e a concorrência."""
+    def __init__(self, duracao=0.02, falhar_em=None):
+        self.duracao = duracao
+        self.falhar_em = falhar_em
+        self.eventos = []
+        self.ativas = 0
+        self.max_ativas = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, conn_source, schema, chunks, on_table_loaded=None):
+        (table, rows), = chunks
+        with self._lock:
+            self.ativas += 1
+            self.max_ativas = max(self.max_ativas, self.ativas)
+            self.eventos.append(("inicio", table))
+        time.sleep(self.duracao)
+        with self._lock:
+            self.ativas -= 1
+            self.eventos.append(("fim", table))
+        if table == self.falhar_em:
+            raise RuntimeError(f"falha em {table}")
+        if on_table_loaded:
+            on_table_loaded(table, len(rows))
+
+
+def test_filhos_comecam_depois_dos_pais():
+    carga = CargaFalsa()
+    carregadas = []
+    with patch("app.services.data_generation.copy_fake_data", side_effect=carga):
+        parallel_loading.parallel_load({"host": "x"}, SCHEMA, iter(CHUNKS), 3, on_table_loaded=lambda t, n: carregadas.append(t))
+    ultimo_fim_pai = max(i for i, e in enumerate(carga.eventos) if e == ("fim", "pai"))
+    primeiro_filho = carga.eventos.index(("inicio", "filho"))
+    assert primeiro_filho > ultimo_fim_pai
+    assert carga.max_ativas > 1
+    assert sorted(carregadas) == ["filho", "filho", "outra", "pai", "pai"]
+
+
+def test_limite_de_conexoes_por_conector():
+    carga = CargaFalsa()
+    chunks = [("outra", [{"id": i}]) for i in range(8)]
+    with patch("app.services.parallel_loading.CARGA_PARALELA_MAX_CONEXOES", 2), \
+         patch("app.services.data_generation.copy_fake_data", side_effect=carga):
+        parallel_loading.parallel_load({"host": "x"}, SCHEMA, iter(chunks), 4)
+    assert carga.max_ativas == 2
+
+
+def test_limite_compartilhado_pelo_pool():
+    pool = postgres_pool.PoolConexoes({"host": "x"}, minconn=0, maxconn=2)
+    limite = parallel_loading.connector_limit(pool)
+    assert parallel_loading.connector_limit(pool) is limite
+    assert limite.acquire(blocking=False) and limite.acquire(blocking=False)
+    assert not limite.acquire(blocking=False)
+
+
+def test_falha_em_shard_interrompe_a_carga():
+    carga = CargaFalsa(falhar_em="pai")
+    with patch("app.services.data_generation.copy_fake_data", side_effect=carga):
+        with pytest.raises(RuntimeError, match="falha em pai"):
+            parallel_loading.parallel_load({"host": "x"}, SCHEMA, iter(CHUNKS), 2)
+    assert ("inicio", "filho") not in carga.eventos
+
+
+def test_recriar_indices_em_volta_da_carga():
+    with patch(PSYCOPG2_CONNECT_PATH) as mock_connect, \
+         patch("app.services.data_generation.copy_fake_data", side_effect=CargaFalsa(falhar_em="filho")):
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [('"idx_pai_x"', "CREATE INDEX idx_pai_x ON public.pai USING btree (x)")]
+        with pytest.raises(RuntimeError):
+            parallel_loading.parallel_load({"host": "x"}, SCHEMA, iter(CHUNKS), 2, rebuild_tables=["pai", "inexistente"])
+    comandos = [c[0][0] for c in mock_cursor.execute.call_args_list]
+    assert comandos[0] == parallel_loading.SQL_INDICES_AVULSOS
+    assert comandos[1:3] == ['DROP INDEX public."idx_pai_x"', "ALTER TABLE public.pai DISABLE TRIGGER USER"]
+    # Mesmo com a falha no meio da carga, o índice é recriado e os triggers reativados
+    assert comandos[-2:] == ["CREATE INDEX idx_pai_x ON public.pai USING btree (x)", "ALTER TABLE public.pai ENABLE TRIGGER USER"]
+
+
+def test_large_tables():
+    assert parallel_loading.large_tables(SCHEMA, {"pai": 500, "filho": 50}, min_rows=100) == ["pai"]
+    assert parallel_loading.large_tables(SCHEMA, 10, min_rows=10) == ["pai", "outra", "filho"]
+
+
+@pytest.mark.usefixtures("versao_schema_fixa")
+def test_generate_data_conexoes_carga_usa_carga_paralela():
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=SCHEMA), \
+         patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector), \
+         patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+         patch("app.services.data_generation.iter_fake_data", return_value=iter(CHUNKS)), \
+         patch("app.services.data_generation.copy_fake_data") as mock_copy, \
+         patch("app.services.parallel_loading.parallel_load") as mock_paralela:
+        response = client.post(
+            "/dicionariodados/gerar-dados/public",
+            params={"conector_nome": "fake", "conexoes_carga": 4, "metodo_carga": "insert", "rows_per_table": 200_000, "recriar_indices": True}
+        )
+    assert response.status_code == 200
+    mock_copy.assert_not_called()
+    args, kwargs = mock_paralela.call_args
+    assert args[3] == 4 and kwargs["method"] == "insert"
+    assert kwargs["rebuild_tables"] == ["pai", "outra", "filho"]
@@ -0,0 +1,189 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from app.main import app
+from app.db import postgres_pool
+from psycopg2 import extensions
+import threading
+
+client = TestClient(app)
+
+PSYCOPG2_CONNECT_PATH = "psycopg2.connect"
+CONN_PARAMS = {'host': 'x', 'port': 5432, 'dbname': 'db', 'user': 'u', 'password': 'p'}
+
+
+def _nova_conexao_fake(*args, **kwargs):
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@pytest.fixture(autouse=True)
+def limpar_pools():
+    postgres_pool.fechar_pools()
+    yield
+    postgres_pool.fechar_pools()
+
+
+def test_pool_reutiliza_conexao():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, minconn=1, maxconn=2)
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake) as mock_connect:
+        with pool.conexao() as primeira:
+            pass
+        with pool.conexao() as segunda:
+            pass
+    assert primeira is segunda
+    mock_connect.assert_called_once()
+    stats = pool.estatisticas()
+    assert stats["criadas"] == 1 and stats["reutilizadas"] == 1 and stats["ociosas"] == 1
+
+
+def test_pool_esgotado():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, minconn=0, maxconn=1, timeout=0.01)
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake):
+        conn = pool.obter()
+        with pytest.raises(postgres_pool.PoolEsgotado):
+            pool.obter()
+        pool.devolver(conn)
+        assert pool.obter() is conn
+
+
+def test_pool_desfaz_transacao_aberta_na_devolucao():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS)
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake):
+        conn = pool.obter()
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+    pool.devolver(conn)
+    conn.rollback.assert_called_once()
+    assert pool.estatisticas()["ociosas"] == 1
+
+
+def test_pool_despeja_ociosas_preservando_minimo():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, minconn=1, maxconn=3, tempo_ocioso=0)
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake):
+        conexoes = [pool.obter() for _ in range(3)]
+        for conn in conexoes:
+            pool.devolver(conn)
+        pool.devolver(pool.obter())
+    stats = pool.estatisticas()
+    assert stats["ociosas"] == 1
+    assert stats["descartadas"] == 2
+
+
+def test_pool_health_check_descarta_conexao_quebrada():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, intervalo_healthcheck=0)
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake):
+        quebrada = pool.obter()
+        pool.devolver(quebrada)
+        quebrada.cursor.side_effect = Exception("server closed the connection")
+        nova = pool.obter()
+    assert nova is not quebrada
+    quebrada.close.assert_called_once()
+    assert pool.estatisticas()["falhas_healthcheck"] == 1
+
+
+def test_pool_conecta_fora_do_lock():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, minconn=0, maxconn=2, timeout=0.2)
+    liberar, conectando = threading.Event(), threading.Event()
+
+    def connect_lento(*args, **kwargs):
+        if not conectando.is_set():
+            conectando.set()
+            liberar.wait(5)
+        return _nova_conexao_fake()
+
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=connect_lento):
+        lenta = threading.Thread(target=pool.obter)
+        lenta.start()
+        assert conectando.wait(5)
+        # Com a primeira conexão ainda abrindo, a segunda vaga é emprestada e devolvida sem esperar
+        pool.devolver(pool.obter())
+        assert pool.estatisticas()["ociosas"] == 1
+        pool.obter()
+        # Uma vaga reservada pela conexão em andamento e outra em uso: a reserva conta para o máximo
+        with pytest.raises(postgres_pool.PoolEsgotado):
+            pool.obter()
+        liberar.set()
+        lenta.join(5)
+    assert pool.estatisticas()["em_uso"] == 2
+
+
+def test_pool_desfaz_transacao_fora_do_lock():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, minconn=0, maxconn=2, timeout=0.01)
+    desfazendo, liberar = threading.Event(), threading.Event()
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake):
+        lenta = pool.obter()
+        lenta.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+        lenta.rollback.side_effect = lambda: (desfazendo.set(), liberar.wait(5))
+        devolucao = threading.Thread(target=pool.devolver, args=(lenta,))
+        devolucao.start()
+        assert desfazendo.wait(5)
+        # Durante o rollback a outra vaga é emprestada e devolvida; a conexão em rollback ainda conta como em uso
+        pool.devolver(pool.obter())
+        assert pool.estatisticas()["em_uso"] == 1
+        liberar.set()
+        devolucao.join(5)
+    assert pool.estatisticas()["ociosas"] == 2
+
+
+def test_pool_libera_vaga_quando_conexao_falha():
+    pool = postgres_pool.PoolConexoes(CONN_PARAMS, minconn=0, maxconn=1, timeout=0.01)
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=Exception("host inacessível")):
+        with pytest.raises(Exception, match="inacessível"):
+            pool.obter()
+    with patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake):
+        assert pool.obter() is not None
+
+
+def test_obter_pool_recria_quando_parametros_mudam():
+    pool = postgres_pool.obter_pool("conector", CONN_PARAMS)
+    assert postgres_pool.obter_pool("conector", dict(CONN_PARAMS)) is pool
+    novo = postgres_pool.obter_pool("conector", dict(CONN_PARAMS, password='outra'))
+    assert novo is not pool
+    with pytest.raises(postgres_pool.PoolEsgotado):
+        pool.obter()
+
+
+def test_estatisticas_pools_endpoint():
+    postgres_pool.obter_pool("conector", CONN_PARAMS)
+    response = client.get("/dicionariodados/connectors/pools/estatisticas")
+    assert response.status_code == 200
+    assert response.json()["conector"]["maxconn"] == postgres_pool.POOL_MAX_CONEXOES
+
+
+def test_remover_conector_invalida_pool():
+    postgres_pool.obter_pool("conector", CONN_PARAMS)
+    with patch("app.db.crud.connectors.delete_conector", return_value=True):
+        response = client.delete("/dicionariodados/connectors/conector")
+    assert response.status_code == 200
+    assert "conector" not in postgres_pool.estatisticas_pools()
+
+
+CONECTOR = {"nome": "conector", "host": "x", "porta": 5432, "banco": "db", "usuario": "u", "senha": "senha_nova"}
+
+
+def test_atualizar_conector_com_falha_preserva_pool_registrado():
+    pool = postgres_pool.obter_pool("conector", CONN_PARAMS)
+    with patch("app.db.crud.connectors.get_conector_por_nome", return_value=dict(CONECTOR, senha="cifrada")), \
+         patch("app.db.crud.connectors.update_conector") as mock_update, \
+         patch(PSYCOPG2_CONNECT_PATH, side_effect=Exception("senha inválida")):
+        response = client.put("/dicionariodados/connectors/conector", json=CONECTOR)
+    assert response.status_code == 400
+    mock_update.assert_not_called()
+    assert postgres_pool.obter_pool("conector", CONN_PARAMS) is pool
+
+
+def test_pool_do_teste_registrado_apos_gravar():
+    anterior = postgres_pool.obter_pool("conector", CONN_PARAMS)
+    with patch("app.db.crud.connectors.get_conector_por_nome", return_value=dict(CONECTOR, senha="cifrada")), \
+         patch("app.db.crud.connectors.update_conector", return_value=True), \
+         patch("app.api.v1.endpoints.connectors.encrypt_password", return_value="cifrada"), \
+         patch(PSYCOPG2_CONNECT_PATH, side_effect=_nova_conexao_fake) as mock_connect:
+        response = client.put("/dicionariodados/connectors/conector", json=CONECTOR)
+    assert response.status_code == 200
+    stats = postgres_pool.estatisticas_pools()["conector"]
+    # A conexão aberta no teste fica ociosa no pool novo; o antigo foi fechado
+    assert stats["ociosas"] == 1 and mock_connect.call_count == 1
+    with pytest.raises(postgres_pool.PoolEsgotado):
+        anterior.obter()
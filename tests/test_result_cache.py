@@ -0,0 +1,109 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.services.result_cache import CacheResultados, chave_resultado
+import os
+import json
+
+client = TestClient(app)
+
+SCHEMA = {
+    "nome_schema": "public",
+    "tabela1": {"columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "nome", "type": "text", "is_primary_key": False, "is_foreign_key": False}
+    ]}
+}
+CONECTOR = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+
+
+def _chave(**kwargs):
+    parametros = {"schema": SCHEMA, "rows_per_table": 10, "seed": 1, "pk_start_vals": {("tabela1", "id"): 0},
+                  "formato_sql": "insert", "engine": "faker", "chunk_size": 1000, **kwargs}
+    return chave_resultado(**parametros)
+
+
+def test_chave_depende_do_conteudo_e_das_pks():
+    base = _chave()
+    assert base == _chave(schema={**SCHEMA, "_id": "x", "_versao": 9})
+    assert base != _chave(pk_start_vals={("tabela1", "id"): 5})
+    assert base != _chave(seed=2)
+    assert base == _chave(linhas_por_insert=1) != _chave(linhas_por_insert=100)
+    assert base != _chave(schema={**SCHEMA, "tabela2": {"columns": []}})
+
+
+def test_lru_limitado_em_bytes():
+    cache = CacheResultados(max_bytes=10, diretorio=None)
+    cache.armazenar("a", "12345", {})
+    cache.armazenar("b", "12345", {})
+    assert cache.obter("a") is not None
+    cache.armazenar("c", "12345", {})
+    assert cache.obter("b") is None
+    assert cache.obter("a").sql == "12345" and cache.obter("c") is not None
+    cache.armazenar("grande", "x" * 11, {})
+    assert cache.obter("grande") is None
+    estatisticas = cache.estatisticas()
+    assert estatisticas["despejos"] == 1 and estatisticas["bytes"] == 10
+
+
+def test_nivel_em_disco_sobrevive_e_volta_para_memoria(tmp_path):
+    cache = CacheResultados(max_bytes=100, diretorio=str(tmp_path))
+    cache.armazenar("k1", "SELECT 1;", {"t": 1})
+    novo = CacheResultados(max_bytes=100, diretorio=str(tmp_path))
+    resultado = novo.obter("k1")
+    assert resultado.sql == "SELECT 1;" and resultado.linhas == {"t": 1}
+    assert novo.estatisticas()["hits_disco"] == 1
+    novo.obter("k1")
+    assert novo.estatisticas()["hits_memoria"] == 1
+
+
+def test_disco_remove_os_menos_usados(tmp_path):
+    cache = CacheResultados(max_bytes=0, diretorio=str(tmp_path), max_bytes_disco=120)
+    cache.armazenar("antigo", "x" * 50, {})
+    os.utime(tmp_path / "antigo.json", (1, 1))
+    cache.armazenar("novo", "y" * 50, {})
+    assert sorted(os.listdir(tmp_path)) == ["novo.json"]
+
+
+def _post_sql(headers=None, **params):
+    return client.post(
+        "/dicionariodados/gerar-dados/public",
+        params={"conector_nome": "fake", "modo": "sql", "rows_per_table": 3, **params},
+        headers=headers or {}
+    )
+
+
+@pytest.fixture
+def cache(versao_schema_fixa):
+    novo = CacheResultados(max_bytes=1024 * 1024, diretorio=None)
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=json.loads(json.dumps(SCHEMA))), \
+         patch("app.db.crud.connectors.get_conector_por_nome", return_value=CONECTOR), \
+         patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+         patch("app.services.data_generation.get_pk_start_vals", return_value={("tabela1", "id"): 0}), \
+         patch("app.api.v1.endpoints.generate_data.cache_resultados", novo):
+        yield novo
+
+
+def test_gerar_dados_sql_com_seed_responde_do_cache(cache):
+    primeira = _post_sql(seed=7)
+    assert primeira.status_code == 200 and primeira.headers["X-Cache"] == "MISS"
+    with patch("app.api.v1.endpoints.generate_data._renderizar_sql") as mock_renderizar:
+        segunda = _post_sql(seed=7)
+    mock_renderizar.assert_not_called()
+    assert segunda.headers["X-Cache"] == "HIT"
+    assert segunda.json()["sql"] == primeira.json()["sql"]
+    assert segunda.headers["ETag"] == primeira.headers["ETag"]
+
+    revalidacao = _post_sql(headers={"If-None-Match": primeira.headers["ETag"]}, seed=7)
+    assert revalidacao.status_code == 304
+
+    outra_seed = _post_sql(seed=8)
+    assert outra_seed.headers["ETag"] != primeira.headers["ETag"]
+
+
+def test_gerar_dados_sql_sem_seed_nao_usa_cache(cache):
+    response = _post_sql()
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert cache.estatisticas()["itens"] == 0
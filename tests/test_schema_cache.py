@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.main import app
+from app.db.crud import schemas as crud_schemas
+from app.services import data_generation
+from app.services.schema_cache import SchemaCache, schema_cache
+
+client = TestClient(app)
+
+SCHEMA = {
+    "nome_schema": "public",
+    "tabela1": {"columns": [
+        {"column": "id", "type": "integer", "is_primary_key": True, "is_foreign_key": False},
+        {"column": "nome", "type": "text", "is_primary_key": False, "is_foreign_key": False, "length": 10}
+    ]}
+}
+VERSAO_PATH = "app.db.crud.schemas.get_versao_schema"
+GET_SCHEMA_PATH = "app.db.crud.schemas.get_schema_por_nome"
+
+
+def test_cache_hit_mesma_versao():
+    cache = SchemaCache(max_itens=2)
+    with patch(VERSAO_PATH, return_value=1), patch(GET_SCHEMA_PATH, return_value=dict(SCHEMA)) as mock_get:
+        primeiro = cache.obter("public", None)
+        segundo = cache.obter("public", None)
+    assert primeiro is segundo
+    mock_get.assert_called_once()
+    stats = cache.estatisticas()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["taxa_acerto"] == 0.5
+
+
+def test_cache_recarrega_quando_versao_muda():
+    cache = SchemaCache()
+    with patch(VERSAO_PATH, side_effect=[1, 2]), patch(GET_SCHEMA_PATH, side_effect=[dict(SCHEMA), dict(SCHEMA, extra={})]) as mock_get:
+        cache.obter("public", None)
+        atualizado = cache.obter("public", None)
+    assert "extra" in atualizado
+    assert mock_get.call_count == 2
+
+
+def test_cache_schema_inexistente_nao_armazena():
+    cache = SchemaCache()
+    with patch(VERSAO_PATH, return_value=None), patch(GET_SCHEMA_PATH, return_value=None):
+        assert cache.obter("public", None) is None
+    assert cache.estatisticas()["itens"] == 0
+
+
+def test_cache_lru_despeja_menos_usado():
+    cache = SchemaCache(max_itens=2)
+    with patch(VERSAO_PATH, return_value=1), patch(GET_SCHEMA_PATH, side_effect=lambda nome, col: dict(SCHEMA, nome_schema=nome)):
+        cache.obter("a", None)
+        cache.obter("b", None)
+        cache.obter("a", None)
+        cache.obter("c", None)
+    assert set(cache._itens) == {"a", "c"}
+    assert cache.estatisticas()["despejos"] == 1
+
+
+def test_cache_planos_compilados_uma_vez():
+    cache = SchemaCache()
+    with patch(VERSAO_PATH, return_value=1), patch(GET_SCHEMA_PATH, return_value=dict(SCHEMA)):
+        schema = cache.obter("public", None)
+    with patch("app.services.data_generation.compile_table_plan", wraps=data_generation.compile_table_plan) as mock_compile:
+        planos = cache.planos("public", schema, "faker")
+        assert cache.planos("public", schema, "faker") is planos
+        assert mock_compile.call_count == 1
+    assert [entry.kind for entry in planos["tabela1"]] == ["pk_seq", "value"]
+    assert cache.planos("public", dict(schema), "faker") is None
+
+
+def test_crud_update_incrementa_versao():
+    collection = MagicMock()
+    collection.update_one.return_value.modified_count = 1
+    assert crud_schemas.update_schema("public", {"tabela1": {}, crud_schemas.CAMPO_VERSAO: 99}, collection)
+    filtro, update = collection.update_one.call_args[0]
+    assert update == {"$set": {"tabela1": {}}, "$inc": {crud_schemas.CAMPO_VERSAO: 1}}
+
+
+def test_crud_get_schema_remove_versao():
+    collection = MagicMock()
+    collection.find_one.return_value = {"_id": "x", "nome_schema": "public", crud_schemas.CAMPO_VERSAO: 3}
+    assert crud_schemas.get_schema_por_nome("public", collection) == {"nome_schema": "public"}
+
+
+def test_estatisticas_endpoint_e_invalidacao_no_delete():
+    schema_cache.limpar()
+    with patch("app.db.crud_async.schemas.get_versao_schema", AsyncMock(return_value=1)), \
+            patch("app.db.crud_async.schemas.get_schema_por_nome", AsyncMock(return_value=dict(SCHEMA))):
+        assert client.get("/dicionariodados/schemas/public").status_code == 200
+        assert client.get("/dicionariodados/schemas/public").status_code == 200
+    assert schema_cache.estatisticas()["hits"] >= 1
+    assert schema_cache.estatisticas()["itens"] == 1
+    with patch("app.db.crud.schemas.delete_schema", return_value=True):
+        assert client.delete("/dicionariodados/schemas/public").status_code == 200
+    response = client.get("/dicionariodados/schemas/cache/estatisticas")
+    assert response.status_code == 200
+    assert response.json()["itens"] == 0
+    assert response.json()["invalidacoes"] >= 1
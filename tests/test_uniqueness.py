@@ -0,0 +1,156 @@
+import pytest
+from app.services import data_generation, uniqueness, vectorized_generation
+
+requer_numpy = pytest.mark.skipif(not vectorized_generation.NUMPY_DISPONIVEL, reason="numpy não instalado")
+
+
+def _col(column, type_, **extra):
+    return {"column": column, "type": type_, "is_primary_key": False, "is_foreign_key": False, **extra}
+
+
+def _fk(column, table):
+    return {"column": column, "type": "integer", "is_primary_key": True, "is_foreign_key": True,
+            "references": {"table": table, "column": "id"}}
+
+
+SCHEMA = {
+    "nome_schema": "public",
+    "pessoa": {"depends_on": [], "columns": [
+        _col("id", "integer", is_primary_key=True),
+        _col("sigla", data_generation.CHARACTER_VARYING, length=2, is_unique=True),
+        _col("matricula", "integer", is_unique=True),
+        _col("nascimento", "date", is_unique=True),
+    ]},
+    "grupo": {"depends_on": [], "columns": [_col("id", "integer", is_primary_key=True)]},
+    "pessoa_grupo": {"depends_on": ["pessoa", "grupo"], "columns": [_fk("pessoa_id", "pessoa"), _fk("grupo_id", "grupo")]},
+}
+
+
+def _gerar(schema=SCHEMA, rows=40, **kwargs):
+    data = {}
+    for table, rows_ in data_generation.iter_fake_data(schema, rows, chunk_size=7, **kwargs):
+        data.setdefault(table, []).extend(rows_)
+    return data
+
+
+def test_colunas_unicas_sem_repeticao():
+    data = _gerar(rows={"pessoa": 300, "grupo": 5, "pessoa_grupo": 0})
+    for coluna in ("sigla", "matricula", "nascimento"):
+        valores = [r[coluna] for r in data["pessoa"]]
+        assert len(set(valores)) == len(valores)
+    assert all(len(r["sigla"]) <= 2 for r in data["pessoa"])
+
+
+def test_coluna_unica_inteira_vira_sequencia():
+    plan = {p.column: p.kind for p in data_generation.compile_table_plan(SCHEMA["pessoa"])}
+    assert plan["matricula"] == "pk_seq" and plan["sigla"] == "value"
+    assert uniqueness.unique_groups(SCHEMA["pessoa"]) == [[SCHEMA["pessoa"]["columns"][1]], [SCHEMA["pessoa"]["columns"][3]]]
+
+
+def test_pk_composta_de_fks():
+    data = _gerar(rows={"pessoa": 6, "grupo": 5, "pessoa_grupo": 30})
+    pares = [(r["pessoa_id"], r["grupo_id"]) for r in data["pessoa_grupo"]]
+    assert len(set(pares)) == 30
+    assert {p for p, _ in pares} <= {r["id"] for r in data["pessoa"]}
+    assert {g for _, g in pares} <= {r["id"] for r in data["grupo"]}
+
+
+def test_pk_composta_sem_pares_suficientes():
+    with pytest.raises(ValueError, match="pessoa_grupo"):
+        _gerar(rows={"pessoa": 2, "grupo": 2, "pessoa_grupo": 5})
+
+
+def test_check_com_menos_opcoes_que_linhas():
+    schema = {"nome_schema": "public", "t": {"depends_on": [], "columns": [
+        _col("status", "text", is_unique=True, check_constraint={"expression": "ARRAY['A','B','C']"})
+    ]}}
+    assert sorted(r["status"] for r in _gerar(schema, 3)["t"]) == ["A", "B", "C"]
+    with pytest.raises(ValueError, match="menos valores distintos"):
+        _gerar(schema, 4)
+
+
+def test_complemento_considera_chaves_existentes():
+    schema = {"nome_schema": "public", "t": {"depends_on": [], "columns": [
+        _col("codigo", "character", length=1, is_unique=True)
+    ]}}
+    existentes = [chr(c) for c in range(ord("a"), ord("z"))]
+    data = _gerar(schema, 1, seed=1, existing_keys={("t", "codigo"): existentes})
+    assert data["t"][0]["codigo"] not in existentes
+
+
+@pytest.mark.parametrize("engine", ["faker", pytest.param("numpy", marks=requer_numpy)])
+def test_seed_reproduzivel_com_qualquer_numero_de_workers(engine):
+    rows = {"pessoa": 60, "grupo": 4, "pessoa_grupo": 50}
+    base = _gerar(rows=rows, seed=7, engine=engine)
+    assert base == _gerar(rows=rows, seed=7, engine=engine, workers=2)
+
+
+def test_bloom_sem_falsos_negativos():
+    bloom = uniqueness.BloomSeen(4000, error=0.01)
+    for i in range(0, 4000, 2):
+        bloom.add(("k", i))
+    assert not any(bloom.add(("k", i)) for i in range(0, 4000, 2))
+    novos = sum(bloom.add(("k", i)) for i in range(1, 4000, 2))
+    assert novos > 1950
+
+
+def test_conjunto_por_tamanho():
+    assert isinstance(uniqueness.new_seen(10), uniqueness.ExactSeen)
+    assert isinstance(uniqueness.new_seen(uniqueness.UNIQUE_EXACT_LIMIT + 1), uniqueness.BloomSeen)
+    # Domínio pequeno (ex.: pares de FKs): set exato, sem falsos positivos perto da saturação
+    assert isinstance(uniqueness.new_seen(uniqueness.UNIQUE_EXACT_LIMIT + 1, domain=1000), uniqueness.ExactSeen)
+    linhas = {"pessoa": 2000, "grupo": 2000, "pessoa_grupo": uniqueness.UNIQUE_EXACT_LIMIT + 1}
+    guard = uniqueness.build_unique_guards(SCHEMA, linhas, None, {})
+    assert isinstance(guard["pessoa_grupo"].groups[0].seen, uniqueness.BloomSeen)
+    guard = uniqueness.build_unique_guards(SCHEMA, dict(linhas, pessoa=10), None, {})
+    assert isinstance(guard["pessoa_grupo"].groups[0].seen, uniqueness.ExactSeen)
+
+
+def test_varredura_dos_pares_continua_de_onde_parou():
+    pools = {("pessoa", "id"): [1, 2, 3], ("grupo", "id"): [1, 2, 3]}
+    group = uniqueness.build_unique_guards(SCHEMA, {"pessoa_grupo": 9}, 1, pools)["pessoa_grupo"].groups[0]
+    candidatos = group._scan_candidates()
+    next(candidatos)
+    assert group._scan_candidates() is candidatos
+    pools[("pessoa", "id")].append(4)
+    assert group._scan_candidates() is not candidatos
+
+
+def test_completar_considera_valores_unicos_e_pares_existentes(versao_schema_fixa):
+    from fastapi.testclient import TestClient
+    from unittest.mock import patch
+    from app.main import app
+    schema = dict(SCHEMA, t={"depends_on": [], "columns": [
+        _col("status", "text", is_unique=True, check_constraint={"expression": "ARRAY['A','B','C']"})
+    ]})
+    existentes = {
+        ("pessoa", "id"): [1, 2], ("grupo", "id"): [1, 2],
+        ("t", "status"): ["A", "B"], ("pessoa_grupo", ("pessoa_id", "grupo_id")): [(1, 1), (1, 2), (2, 1)],
+    }
+    lidas, carregado = [], {}
+
+    def load_existing_keys(conn_params, schema_metadata, refs, limit=data_generation.EXISTING_KEYS_LIMIT):
+        lidas.append((list(refs), limit))
+        return {ref: existentes[ref] for ref in refs}
+
+    def copy_consumindo(conn_params, schema_metadata, chunks, on_table_loaded=None):
+        for table, rows in chunks:
+            carregado.setdefault(table, []).extend(rows)
+
+    conector = {"host": "localhost", "porta": 5432, "banco": "test", "usuario": "user", "senha": "token_fake"}
+    with patch("app.db.crud.schemas.get_schema_por_nome", return_value=schema), \
+         patch("app.db.crud.connectors.get_conector_por_nome", return_value=conector), \
+         patch("app.api.v1.endpoints.generate_data.decrypt_password", return_value="senha"), \
+         patch("app.services.data_generation._get_pk_start_vals", return_value={}), \
+         patch("app.services.data_generation.count_table_rows", return_value={"t": 2, "pessoa_grupo": 3}), \
+         patch("app.services.data_generation.load_existing_keys", side_effect=load_existing_keys), \
+         patch("app.services.data_generation.copy_fake_data", side_effect=copy_consumindo):
+        response = TestClient(app).post(
+            "/dicionariodados/gerar-dados/public/completar", params={"conector_nome": "fake"}, json={"t": 3, "pessoa_grupo": 4}
+        )
+    assert response.status_code == 200, response.text
+    assert carregado["t"] == [{"status": "C"}]
+    assert carregado["pessoa_grupo"] == [{"pessoa_id": 2, "grupo_id": 2}]
+    # Valores únicos e pares são lidos por inteiro; as chaves das FKs, até EXISTING_KEYS_LIMIT
+    assert lidas == [([("pessoa", "id"), ("grupo", "id")], data_generation.EXISTING_KEYS_LIMIT),
+                     ([("t", "status"), ("pessoa_grupo", ("pessoa_id", "grupo_id"))], None)]